@@ -13,6 +13,12 @@ from app.core.supabase import get_supabase_client
 from app.core.auth import get_current_user_id, require_user_match
 from app.services.upload_service import upload_service
 from app.services.background_extraction_service import stream_background_extraction
+from app.services.qa_generation_service import (
+    QAGenerationService,
+    get_qa_generation_service,
+    invalidate_user_cache,
+)
+from app.services.llm_service import llm_service
 from app.core.rate_limit import limiter
 
 logger = logging.getLogger(__name__)
@@ -93,6 +99,9 @@ async def upload_resume(
         if not saved.data:
             raise HTTPException(500, "Failed to save context to database")
 
+        invalidate_user_cache(user_id, 'contexts')
+        llm_service.invalidate_user_answers(user_id)
+
         logger.info(f"Successfully uploaded resume for user {user_id}")
 
         return {
@@ -172,6 +181,9 @@ async def upload_screenshot(
         if not saved.data:
             raise HTTPException(500, "Failed to save context to database")
 
+        invalidate_user_cache(user_id, 'contexts')
+        llm_service.invalidate_user_answers(user_id)
+
         logger.info(f"Successfully uploaded screenshot for user {user_id}")
 
         return {
@@ -243,6 +255,9 @@ async def upload_text_context(
         if not saved.data:
             raise HTTPException(500, "Failed to save context to database")
 
+        invalidate_user_cache(user_id, 'contexts')
+        llm_service.invalidate_user_answers(user_id)
+
         logger.info(f"Successfully uploaded text for user {user_id}, profile {data.profile_id}")
 
         return {
@@ -387,6 +402,9 @@ async def delete_context(
         if not result.data:
             raise HTTPException(404, "Context not found")
 
+        invalidate_user_cache(user_id, 'contexts')
+        llm_service.invalidate_user_answers(user_id)
+
         logger.info(f"Successfully deleted context {context_id}")
 
         return {"message": "Context deleted successfully"}
@@ -408,6 +426,7 @@ async def generate_qa_pairs(
     user_id: str,
     body: Optional[GenerateQARequest] = None,
     current_user_id: str = Depends(get_current_user_id),
+    qa_service: QAGenerationService = Depends(get_qa_generation_service),
 ):
     """
     Generate initial 30 Q&A pairs from all uploaded contexts.
@@ -434,9 +453,6 @@ async def generate_qa_pairs(
     logger.info(f"Q&A generation requested for user {user_id}, profile {profile_id}")
 
     try:
-        # Import here to avoid circular dependency
-        from app.services.qa_generation_service import qa_generation_service
-
         # Check if resume exists (for this profile if specified)
         supabase = get_supabase_client()
         query = supabase.table("user_contexts") \
@@ -457,7 +473,7 @@ async def generate_qa_pairs(
 
         # Start generation
         logger.info(f"Starting Q&A generation for user {user_id}, profile {profile_id}")
-        result = await qa_generation_service.generate_initial_qa_batch(user_id, profile_id)
+        result = await qa_service.generate_initial_qa_batch(user_id, profile_id)
 
         logger.info(f"✅ Generated {result['generated_count']} Q&A pairs for user {user_id}")
 
@@ -484,6 +500,7 @@ async def generate_incremental_qa(
     user_id: str,
     body: Optional[GenerateIncrementalRequest] = None,
     current_user_id: str = Depends(get_current_user_id),
+    qa_service: QAGenerationService = Depends(get_qa_generation_service),
 ):
     """
     Generate 10 additional Q&A pairs after new context is added.
@@ -512,11 +529,8 @@ async def generate_incremental_qa(
     logger.info(f"Incremental Q&A generation requested for user {user_id}, profile {profile_id}")
 
     try:
-        # Import here to avoid circular dependency
-        from app.services.qa_generation_service import qa_generation_service
-
         # Start incremental generation
-        result = await qa_generation_service.generate_incremental_qa_batch(
+        result = await qa_service.generate_incremental_qa_batch(
             user_id,
             profile_id,
             new_context_ids
@@ -9,6 +9,7 @@ from typing import Optional, List
 from supabase import create_client, Client
 from app.core.config import settings
 from app.core.auth import get_current_user_id, require_user_match
+from app.services.llm_service import llm_service
 
 router = APIRouter(prefix="/api/interview-profiles", tags=["interview-profiles"])
 
@@ -233,6 +234,9 @@ async def update_interview_profile(
     if not response.data:
         raise HTTPException(status_code=500, detail="Failed to update profile")
 
+    # Cached answers were generated from the old profile fields
+    llm_service.invalidate_user_answers(user_id)
+
     return {"profile": response.data[0]}
 
 
@@ -3,19 +3,22 @@ Q&A Pairs API endpoints
 Manage user-uploaded expected interview questions and answers
 """
 
+import asyncio
 import csv
 import io
 import logging
 from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from supabase import Client
 
 from app.core.supabase import get_supabase_client
 from app.core.auth import get_current_user_id, require_user_match
 from app.core.config import settings
+from app.services.qa_generation_service import invalidate_user_cache
+from app.services.llm_service import llm_service
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +36,7 @@ def get_qdrant_service():
         from app.services.qdrant_service import QdrantService
         _qdrant_service = QdrantService(
             qdrant_url=settings.QDRANT_URL,
-            openai_api_key=settings.OPENAI_API_KEY
+            supabase=get_supabase_client()
         )
     return _qdrant_service
 
@@ -189,6 +192,9 @@ async def create_qa_pair(
             raise HTTPException(status_code=400, detail="Failed to create Q&A pair")
 
         created_qa = result.data[0]
+        # Q&A generation dedups against a cached question list
+        invalidate_user_cache(user_id, 'questions')
+        llm_service.invalidate_user_answers(user_id)
 
         # Sync to Qdrant in background (after embedding is generated)
         # Note: Embedding will be generated by a separate process/trigger
@@ -201,7 +207,8 @@ async def create_qa_pair(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/{user_id}/bulk-parse", response_model=BulkParseResponse)
+# Bulk endpoints return up to hundreds of Q&A pairs - serialize with orjson
+@router.post("/{user_id}/bulk-parse", response_model=BulkParseResponse, response_class=ORJSONResponse)
 async def bulk_parse_qa_pairs(
     user_id: str,
     request: BulkParseRequest,
@@ -236,7 +243,7 @@ class BulkUploadRequest(BaseModel):
     profile_id: Optional[str] = None  # Can set at batch level
 
 
-@router.post("/{user_id}/bulk-upload", response_model=List[QAPairResponse])
+@router.post("/{user_id}/bulk-upload", response_model=List[QAPairResponse], response_class=ORJSONResponse)
 async def bulk_upload_qa_pairs(
     user_id: str,
     request: BulkUploadRequest,
@@ -265,6 +272,8 @@ async def bulk_upload_qa_pairs(
 
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to upload Q&A pairs")
+        invalidate_user_cache(user_id, 'questions')
+        llm_service.invalidate_user_answers(user_id)
 
         logger.info(f"Bulk uploaded {len(result.data)} Q&A pairs for user {user_id}, profile {request.profile_id}")
         return result.data
@@ -297,6 +306,8 @@ async def update_qa_pair(
             raise HTTPException(status_code=404, detail="Q&A pair not found")
 
         updated_qa = result.data[0]
+        invalidate_user_cache(updated_qa["user_id"], 'questions')
+        llm_service.invalidate_user_answers(updated_qa["user_id"])
 
         # Sync to Qdrant in background
         background_tasks.add_task(sync_qa_pair_to_qdrant, updated_qa)
@@ -327,6 +338,8 @@ async def delete_qa_pair(
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Q&A pair not found")
+        invalidate_user_cache(result.data[0]["user_id"], 'questions')
+        llm_service.invalidate_user_answers(result.data[0]["user_id"])
 
         return {"message": "Q&A pair deleted successfully"}
     except HTTPException:
@@ -364,6 +377,8 @@ async def delete_all_qa_pairs(
 
         result = delete_query.execute()
         deleted_count = len(result.data) if result.data else 0
+        invalidate_user_cache(user_id, 'questions')
+        llm_service.invalidate_user_answers(user_id)
 
         # Delete from Qdrant in background
         if background_tasks:
@@ -537,7 +552,7 @@ async def migrate_user_embeddings_to_qdrant(
         logger.info(f"Migration complete: {success_count} success, {failed_count} failed")
         
         # Get collection info
-        collection_info = qdrant.get_collection_info()
+        collection_info = await asyncio.to_thread(qdrant.get_collection_info)
         
         return {
             "message": "Migration completed",
@@ -567,7 +582,7 @@ async def check_qdrant_status(
             return {"error": "Qdrant not available"}
         
         # Get collection info
-        collection_info = qdrant.get_collection_info()
+        collection_info = await asyncio.to_thread(qdrant.get_collection_info)
         
         # Try a test search
         test_results = await qdrant.search_similar_qa_pairs(
@@ -579,7 +594,8 @@ async def check_qdrant_status(
         
         # Scroll to see what's actually in the collection for this user
         from qdrant_client.models import Filter, FieldCondition, MatchValue
-        scroll_result = qdrant.client.scroll(
+        scroll_result = await asyncio.to_thread(
+            qdrant.client.scroll,
             collection_name=qdrant.COLLECTION_NAME,
             scroll_filter=Filter(
                 must=[
@@ -8,8 +8,9 @@ import logging
 import time
 from datetime import datetime
 import uuid
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.deepgram_service import deepgram_service
+from app.services.deepgram_service import deepgram_service, PCM16_FORMAT
 from app.services.claude import get_claude_service, detect_question_fast
 from app.services.llm_service import llm_service
 from app.core.supabase import get_supabase_client, verify_access_token
@@ -198,8 +199,8 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: list[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, subprotocol: Optional[str] = None):
+        await websocket.accept(subprotocol=subprotocol)
         self.active_connections.append(websocket)
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
@@ -326,7 +327,9 @@ async def websocket_transcribe(websocket: WebSocket):
     WebSocket endpoint for real-time audio transcription using Deepgram streaming.
 
     Client sends:
-        - Binary audio data (WebM/Opus format chunks)
+        - Binary audio data (WebM/Opus format chunks), or raw 16 kHz mono Int16 PCM
+          when connecting with ?format=pcm16 or the "pcm16" subprotocol
+          (see frontend/public/audio-processor.js)
         - JSON messages: {"type": "config", "language": "en"}
 
     Server sends:
@@ -335,7 +338,16 @@ async def websocket_transcribe(websocket: WebSocket):
         - {"type": "answer", "answer": "..."}
         - {"type": "error", "message": "..."}
     """
-    await manager.connect(websocket)
+    # Audio format negotiation: raw PCM skips transcoding entirely
+    requested_protocols = websocket.scope.get("subprotocols", [])
+    input_is_pcm = (
+        websocket.query_params.get("format") == PCM16_FORMAT
+        or PCM16_FORMAT in requested_protocols
+    )
+    await manager.connect(
+        websocket,
+        subprotocol=PCM16_FORMAT if PCM16_FORMAT in requested_protocols else None
+    )
 
     # Initialize Claude service with Qdrant support
     claude_service = get_claude_service()
@@ -362,6 +374,7 @@ async def websocket_transcribe(websocket: WebSocket):
     total_audio_bytes = 0
     last_processed_question = ""
     deepgram_connected = False
+    credit_pending = False  # start_recording arrived before the context message (no user_id yet)
 
     # Generate unique connection ID for debugging
     connection_id = str(uuid.uuid4())[:8]
@@ -674,6 +687,23 @@ async def websocket_transcribe(websocket: WebSocket):
             except Exception as e:
                 logger.error(f"Error closing WebSocket: {e}")
 
+    async def consume_recording_credit():
+        """Consume one interview credit for the current recording and tell the client."""
+        credit_result = await consume_interview_credit(user_id, session_id)
+        if credit_result.get("success"):
+            logger.info(f"Credit consumed on recording start. Remaining: {credit_result.get('remaining_credits')}")
+            await manager.send_json(websocket, {
+                "type": "credit_consumed",
+                "remaining_credits": credit_result.get("remaining_credits"),
+                "message": "Credit consumed"
+            })
+        else:
+            logger.warning(f"Failed to consume credit for user {user_id}")
+            await manager.send_json(websocket, {
+                "type": "no_credits",
+                "message": "No interview credits available"
+            })
+
     # Connect to Deepgram using context manager
     try:
         logger.info("Attempting to create Deepgram connection...")
@@ -683,7 +713,7 @@ async def websocket_transcribe(websocket: WebSocket):
         ) as dg_connection:
             logger.info("Deepgram connection created, setting up handlers...")
             # Set up event handlers and start listening
-            await deepgram_service.setup_connection(dg_connection)
+            await deepgram_service.setup_connection(dg_connection, input_is_pcm=input_is_pcm)
             deepgram_connected = True
             logger.info("✓ Deepgram connected and ready")
 
@@ -860,6 +890,11 @@ async def websocket_transcribe(websocket: WebSocket):
                             })
                             logger.info(f"[{connection_id}] Context acknowledged for user {user_id}")
 
+                            # Recording started before we knew the user: charge the credit now
+                            if credit_pending and user_id:
+                                credit_pending = False
+                                await consume_recording_credit()
+
                         elif msg_type == "clear":
                             # Log session completion to Statsig before clearing
                             if session_id and user_id and session_start_time:
@@ -888,32 +923,14 @@ async def websocket_transcribe(websocket: WebSocket):
                             })
 
                         elif msg_type == "start_recording":
-                            # Wait for user_id if not yet set (race condition with context message)
-                            if not user_id:
-                                logger.info("start_recording received before user_id set, waiting up to 2s...")
-                                for _ in range(20):  # 20 x 100ms = 2s max
-                                    await asyncio.sleep(0.1)
-                                    if user_id:
-                                        break
-
                             # Consume credit when recording starts
                             if user_id:
-                                credit_result = await consume_interview_credit(user_id, session_id)
-                                if credit_result.get("success"):
-                                    logger.info(f"Credit consumed on recording start. Remaining: {credit_result.get('remaining_credits')}")
-                                    await manager.send_json(websocket, {
-                                        "type": "credit_consumed",
-                                        "remaining_credits": credit_result.get("remaining_credits"),
-                                        "message": "Credit consumed"
-                                    })
-                                else:
-                                    logger.warning(f"Failed to consume credit for user {user_id}")
-                                    await manager.send_json(websocket, {
-                                        "type": "no_credits",
-                                        "message": "No interview credits available"
-                                    })
+                                await consume_recording_credit()
                             else:
-                                logger.warning("start_recording received but no user_id set after 2s wait")
+                                # user_id only arrives with the context message, which this same loop
+                                # handles; sleeping here would just stall audio forwarding. Defer instead.
+                                credit_pending = True
+                                logger.info("start_recording received before user_id set, deferring credit until context arrives")
 
                         elif msg_type == "generate_answer":
                             # Manual answer generation request
@@ -1014,7 +1031,9 @@ async def websocket_transcribe(websocket: WebSocket):
                                         user_profile=manual_profile_with_variant,
                                         session_history=session_history,
                                         examples_used=session_examples,
-                                        pre_fetched_qa_pairs=manual_pre_fetched_qa
+                                        pre_fetched_qa_pairs=manual_pre_fetched_qa,
+                                        # Typed questions ask for a fresh answer
+                                        no_cache=True
                                     ):
                                         generated_answer += chunk
                                         await manager.send_json(websocket, {
@@ -1069,10 +1088,10 @@ async def websocket_transcribe(websocket: WebSocket):
                             await manager.send_json(websocket, {"type": "feedback_ack"})
 
                         elif msg_type == "finalize":
-                            # Signal end of audio stream to Deepgram
+                            # End the current turn; the Deepgram stream stays open for the next one
                             if deepgram_connected:
-                                logger.info("Finalizing Deepgram stream")
-                                await deepgram_service.finish()
+                                logger.info("Finalizing Deepgram turn")
+                                deepgram_service.finalize_turn()
                                 await manager.send_json(websocket, {
                                     "type": "finalized",
                                     "message": "Audio stream finalized"
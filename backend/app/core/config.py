@@ -32,6 +32,11 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_ORG_ID: Optional[str] = None
+    OPENAI_RPM: int = 500        # Requests per minute allowed for Q&A generation
+    OPENAI_TPM: int = 200000     # Tokens per minute allowed for Q&A generation
+    OPENAI_MAX_RETRIES: int = 4  # SDK retries (429/5xx/timeouts) with exponential backoff
+    EMBEDDING_DIMENSIONS: int = 1536  # Qdrant vector size; 512/768 = shortened embeddings (recreate the collection)
+    QA_SINGLE_CALL_GENERATION: bool = False  # Initial Q&As in one OpenAI call instead of one per category
     
     # Anthropic
     ANTHROPIC_API_KEY: str = ""
@@ -109,6 +114,7 @@ class Settings(BaseSettings):
     
     # AI Services
     WHISPER_MODEL: str = "whisper-1"
+    WHISPER_CACHE_SIZE: int = 256  # Recent transcriptions kept in-process (0 = off)
     CLAUDE_MODEL: str = "claude-3-sonnet-20240229"
     MAX_TOKENS: int = 1024
     TEMPERATURE: float = 0.7
@@ -124,6 +130,8 @@ class Settings(BaseSettings):
     # Qdrant (Vector Search)
     QDRANT_URL: str = ""  # e.g., "http://qdrant:6333" (Railway internal) or "https://qdrant.railway.app"
     QDRANT_API_KEY: Optional[str] = None  # Optional for local/Railway internal
+    QDRANT_PREFER_GRPC: bool = False  # Protobuf over gRPC instead of REST/JSON; needs the gRPC port reachable
+    QDRANT_GRPC_PORT: int = 6334
     
     # File Storage
     UPLOAD_DIR: str = "uploads"
@@ -0,0 +1,8 @@
+"""
+User-facing messages shared across services
+"""
+
+# Yielded as the final chunk by the answer streams (Claude, GLM, LLMService)
+# when generation fails. LLMService compares against it to keep failed
+# answers out of its semantic cache, so every stream must use this constant.
+ANSWER_ERROR_MESSAGE = "\n\n⚠️ Error generating answer. Please try again."
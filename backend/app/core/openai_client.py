@@ -0,0 +1,52 @@
+"""
+Shared OpenAI client configuration
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+
+
+# Module-level singleton, same reasoning as get_supabase_client: every
+# service used to build its own AsyncOpenAI, each with its own httpx pool,
+# so embeddings, Vision extraction and Q&A generation never reused each
+# other's warm TLS connections.
+#
+# HTTP/2 multiplexes concurrent requests over one connection; the pool is
+# sized for embedding fan-out (QdrantService.EMBEDDING_CONCURRENCY per call)
+# across overlapping callers.
+_openai_client: Optional[AsyncOpenAI] = None
+# Services are constructed lazily from FastAPI's threadpool too
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client.
+
+    Callers needing different request options should derive a client with
+    .with_options(...), which keeps sharing the same connection pool.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _openai_client_lock:
+            if _openai_client is None:
+                _openai_client = AsyncOpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    # No pool-wide timeout (SDK default applies): Q&A generation
+                    # and Vision calls legitimately run long. Callers wanting a
+                    # tighter bound use .with_options(timeout=...)
+                    http_client=httpx.AsyncClient(
+                        http2=True,
+                        limits=httpx.Limits(
+                            max_connections=100,
+                            max_keepalive_connections=50,
+                            keepalive_expiry=300.0
+                        )
+                    )
+                )
+    return _openai_client
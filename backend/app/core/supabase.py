@@ -3,6 +3,7 @@ Supabase client configuration and dependency injection
 """
 
 import logging
+import threading
 from typing import Optional
 from supabase import create_client, Client
 from app.core.config import settings
@@ -22,6 +23,8 @@ logger = logging.getLogger(__name__)
 # are thread-safe so a single shared instance is fine across FastAPI's
 # worker threads.
 _supabase_client: Optional[Client] = None
+# FastAPI runs this sync dependency in its threadpool, so first requests can race
+_supabase_client_lock = threading.Lock()
 
 
 def get_supabase_client() -> Client:
@@ -31,10 +34,12 @@ def get_supabase_client() -> Client:
     """
     global _supabase_client
     if _supabase_client is None:
-        _supabase_client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY,
-        )
+        with _supabase_client_lock:
+            if _supabase_client is None:
+                _supabase_client = create_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_SERVICE_ROLE_KEY,
+                )
     return _supabase_client
 
 
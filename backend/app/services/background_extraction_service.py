@@ -17,6 +17,7 @@ Distinct from qa_generation_service:
     endpoint (auto-save picks it up)
 """
 
+import asyncio
 import io
 import json
 import logging
@@ -24,11 +25,12 @@ from pathlib import Path
 from typing import AsyncIterator
 
 import docx2txt
+import pypdfium2 as pdfium
 from anthropic import AsyncAnthropic
 from fastapi import UploadFile, HTTPException
-from PyPDF2 import PdfReader
 
 from app.core.config import settings
+from app.services.upload_service import PDFIUM_LOCK
 
 logger = logging.getLogger(__name__)
 
@@ -69,8 +71,13 @@ def _extract_resume_text(file: UploadFile, raw_bytes: bytes) -> str:
 
     try:
         if suffix == ".pdf":
-            reader = PdfReader(io.BytesIO(raw_bytes))
-            text = "\n".join((page.extract_text() or "") for page in reader.pages)
+            # Shared with upload_service: PDFium is not thread-safe
+            with PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(raw_bytes)
+                try:
+                    text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+                finally:
+                    pdf.close()
         elif suffix == ".md":
             # markdown is already plain text for our purposes — the LLM
             # doesn't need # headers stripped, it'll handle them.
@@ -155,11 +162,12 @@ async def stream_background_extraction(
         yield f"data: {json.dumps({'type': 'error', 'message': 'Anthropic API key not configured'})}\n\n"
         return
 
-    # Read + parse the file. _extract_resume_text raises HTTPException on bad
-    # input; catch it so the stream surfaces the message instead of dying mid-event.
+    # Read + parse the file (parsing in a worker thread, it's CPU-bound).
+    # _extract_resume_text raises HTTPException on bad input; catch it so the
+    # stream surfaces the message instead of dying mid-event.
     raw_bytes = await file.read()
     try:
-        resume_text = _extract_resume_text(file, raw_bytes)
+        resume_text = await asyncio.to_thread(_extract_resume_text, file, raw_bytes)
     except HTTPException as e:
         yield f"data: {json.dumps({'type': 'error', 'message': e.detail})}\n\n"
         return
@@ -185,7 +193,7 @@ async def stream_background_extraction(
         yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
 
 
-# Module-level singleton instance — mirrors qa_generation_service.py convention
+# Module-level name kept for importers; nothing is instantiated at import time
 background_extraction_service = None  # actual binding via lazy init below
 
 
@@ -4,13 +4,15 @@ Anthropic Claude API integration for AI answer generation with semantic similari
 
 import asyncio
 import re
+import sys
 import logging
 from typing import Optional, List
 from difflib import SequenceMatcher
 from anthropic import Anthropic
-from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
 from app.core.config import settings
+from app.core.openai_client import get_openai_client
+from app.core.messages import ANSWER_ERROR_MESSAGE
 from supabase import Client
 
 # 로거 설정
@@ -29,6 +31,27 @@ def normalize_question(question: str) -> str:
     return normalized
 
 
+def _prepare_qa_pair(qa_pair: dict) -> dict:
+    """
+    Precompute normalized question + variations for a stored Q&A pair.
+
+    Stored Q&A pairs are static between context loads, so normalizing them on
+    every match query is wasted work. Results are interned so repeated lookups
+    compare by identity first.
+
+    Sets:
+        qa_pair["_norm_q"]: normalized main question
+        qa_pair["_norm_variations"]: list of (normalized, original) variation tuples
+    """
+    qa_pair["_norm_q"] = sys.intern(normalize_question(qa_pair.get("question", "")))
+    qa_pair["_norm_variations"] = [
+        (sys.intern(normalize_question(variation)), variation)
+        for variation in (qa_pair.get("question_variations") or [])
+        if variation and variation.strip()
+    ]
+    return qa_pair
+
+
 def calculate_similarity(str1: str, str2: str) -> float:
     """
     Calculate similarity ratio between two strings with intelligent matching.
@@ -67,8 +90,14 @@ def calculate_similarity(str1: str, str2: str) -> float:
     else:
         token_similarity = 0.0
 
-    # Strategy 3: Sequence matching (original approach)
-    sequence_similarity = SequenceMatcher(None, str1, str2).ratio()
+    # Strategy 3: Sequence matching (original approach; the 0.85 thresholds
+    # were tuned against this Ratcliff/Obershelp ratio)
+    matcher = SequenceMatcher(None, str1, str2)
+    # quick_ratio() is an upper bound on ratio(): skip the full match when it
+    # cannot beat the token score, the result is the same
+    if matcher.quick_ratio() <= token_similarity:
+        return token_similarity
+    sequence_similarity = matcher.ratio()
 
     # Return the maximum similarity from all strategies
     return max(token_similarity, sequence_similarity)
@@ -207,6 +236,53 @@ def detect_question_fast(text: str) -> dict:
     }
 
 
+# Uploads with explicit "Q:" / "Q." line prefixes are simple enough for the fast model
+QA_PREFIX_PATTERN = re.compile(r'^\s*Q\s*[:.]', re.MULTILINE)
+
+
+# System prompt for Claude-based question detection (low-confidence fallback path)
+DETECT_QUESTION_SYSTEM_PROMPT = """Analyze the transcription and determine if it contains an interview question.
+Return your analysis in this exact format:
+IS_QUESTION: yes/no
+QUESTION: [the extracted question, or "none" if no question]
+TYPE: behavioral/technical/situational/general/none"""
+
+# Tool schema for Claude Tool Use Q&A extraction (built once, passed by reference)
+EXTRACT_QA_TOOLS = [{
+    "name": "save_qa_pairs",
+    "description": "Save extracted interview Q&A pairs. Use this to store all question-answer pairs you find in the text, regardless of formatting (markdown, code blocks, tables, etc.).",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "qa_pairs": {
+                "type": "array",
+                "description": "Array of all Q&A pairs found in the text",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question": {
+                            "type": "string",
+                            "description": "The interview question (cleaned up, no Q: prefix, no markdown headers)"
+                        },
+                        "answer": {
+                            "type": "string",
+                            "description": "The corresponding answer (cleaned up, no A: prefix, no code block markers)"
+                        },
+                        "question_type": {
+                            "type": "string",
+                            "enum": ["behavioral", "technical", "situational", "general"],
+                            "description": "Type of question: behavioral (tell me about, describe), technical (how does X work, explain), situational (what would you do), general (other)"
+                        }
+                    },
+                    "required": ["question", "answer", "question_type"]
+                }
+            }
+        },
+        "required": ["qa_pairs"]
+    }
+}]
+
+
 # Pydantic schemas for OpenAI Structured Outputs
 class QAPairItem(BaseModel):
     question: str = Field(description="The interview question")
@@ -226,8 +302,9 @@ class DecomposedQueries(BaseModel):
 class ClaudeService:
     def __init__(self, supabase: Optional[Client] = None, qdrant_service=None):
         self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai_client = get_openai_client()
         self.model = "claude-sonnet-4-6"
+        self.fast_model = "claude-haiku-4-5"  # Cheap tier for well-formatted Q:/A: uploads
 
         # Initialize vector search service (Qdrant only)
         self.qdrant_service = qdrant_service
@@ -243,6 +320,9 @@ class ClaudeService:
         # Format: {user_id: {normalized_question: qa_pair_dict}}
         self._qa_indices = {}
         self._qa_pairs_lists = {}  # {user_id: [qa_pairs]} for similarity fallback
+        # Similarity scan order, most frequently matched first so the early exit fires sooner
+        # Format: {user_id: [(normalized_question, qa_pair)]}
+        self._qa_scan_orders = {}
 
         logger.info("Claude service initialized with OpenAI Embeddings and Anthropic Prompt Caching")
 
@@ -319,6 +399,20 @@ class ClaudeService:
             sub_questions = await self.decompose_question(question)
             logger.warning(f"RAG_SEARCH: Decomposed into {len(sub_questions)} sub-questions: {sub_questions}")
 
+            # Embed every sub-question once, in a single request, up front.
+            # Searches reuse these instead of each paying its own embedding RTT.
+            # On failure each search embeds its own sub-question (under its
+            # own 5s timeout) rather than losing the whole RAG context.
+            try:
+                async with asyncio.timeout(5.0):
+                    query_embeddings = await self.qdrant_service.generate_embeddings(sub_questions)
+            except asyncio.TimeoutError:
+                logger.warning(f"RAG_SEARCH: Batch embedding timed out (5s) for {len(sub_questions)} sub-questions")
+                query_embeddings = [None] * len(sub_questions)
+            except Exception as e:
+                logger.error(f"RAG_SEARCH: Batch embedding failed: {e}")
+                query_embeddings = [None] * len(sub_questions)
+
             # Step 2: PARALLEL searches using asyncio.gather
             async def search_one(sub_q: str, index: int) -> List[dict]:
                 """Search for one sub-question with timeout and error handling"""
@@ -331,7 +425,8 @@ class ClaudeService:
                             query_text=sub_q,
                             user_id=user_id,
                             similarity_threshold=0.55,
-                            limit=3
+                            limit=3,
+                            query_embedding=query_embeddings[index]
                         )
 
                     logger.warning(f"RAG_SEARCH: [{index+1}/{len(sub_questions)}] Found {len(matches)} matches")
@@ -470,6 +565,7 @@ class ClaudeService:
         self._answer_cache.clear()
         self._qa_indices.clear()
         self._qa_pairs_lists.clear()
+        self._qa_scan_orders.clear()
         logger.info("Answer cache cleared")
 
     def build_qa_index(self, qa_pairs: list, user_id: str = None):
@@ -491,22 +587,48 @@ class ClaudeService:
 
         total_entries = 0
         for qa_pair in qa_pairs:
+            # Normalize once at load time (reused by find_matching_qa_pair)
+            _prepare_qa_pair(qa_pair)
+
             # Index main question
-            question = qa_pair.get("question", "")
-            normalized = normalize_question(question)
-            self._qa_indices[key][normalized] = qa_pair
+            self._qa_indices[key][qa_pair["_norm_q"]] = qa_pair
             total_entries += 1
 
             # Index all question variations
-            variations = qa_pair.get("question_variations", [])
-            if variations:
-                for variation in variations:
-                    if variation and variation.strip():
-                        normalized_var = normalize_question(variation)
-                        self._qa_indices[key][normalized_var] = qa_pair
-                        total_entries += 1
+            for normalized_var, _ in qa_pair["_norm_variations"]:
+                self._qa_indices[key][normalized_var] = qa_pair
+                total_entries += 1
+
+        self._qa_scan_orders[key] = list(self._qa_indices[key].items())
+
+        logger.info(
+            "Built Q&A index for user %s with %d entries from %d Q&A pairs (including variations)",
+            key, total_entries, len(qa_pairs)
+        )
+
+    def _record_qa_hit(self, key: str, qa_pair: dict):
+        """
+        Count a match and re-rank the user's scan order by hit frequency.
+
+        Interviewers tend to re-ask the same few questions, so checking popular
+        pairs first lets the near-exact early exit fire after fewer comparisons.
+        The list stays ordered by hit count, so a hit only moves the matched
+        pair's entries (main question + variations) forward past the pairs it
+        now outranks; nothing is re-sorted on the per-query scan path.
+        """
+        hit_count = qa_pair.get("_hit_count", 0) + 1
+        qa_pair["_hit_count"] = hit_count
+        scan_order = self._qa_scan_orders.get(key)
+        if not scan_order:
+            return
 
-        logger.info(f"Built Q&A index for user {key} with {total_entries} entries from {len(qa_pairs)} Q&A pairs (including variations)")
+        # Entries in list order, so they keep their relative order when moved
+        positions = [i for i, item in enumerate(scan_order) if item[1] is qa_pair]
+        for i in positions:
+            # Strictly greater: upload order is kept among equally popular pairs
+            while i > 0 and hit_count > scan_order[i - 1][1].get("_hit_count", 0):
+                scan_order[i - 1], scan_order[i] = scan_order[i], scan_order[i - 1]
+                i -= 1
 
     def find_matching_qa_pair_fast(self, question: str, user_id: str = None) -> Optional[dict]:
         """
@@ -527,7 +649,7 @@ class ClaudeService:
         qa_index = self._qa_indices.get(key, {})
 
         if not qa_index:
-            logger.warning(f"Q&A index not built for user {key} - call build_qa_index() first")
+            logger.warning("Q&A index not built for user %s - call build_qa_index() first", key)
             return None
 
         normalized_q = normalize_question(question)
@@ -536,14 +658,16 @@ class ClaudeService:
         # Step 1: O(1) exact match check using hash index
         if normalized_q in qa_index:
             qa_pair = qa_index[normalized_q]
-            logger.info(f"✓ Exact Q&A match: '{question}' (user: {key}, took <1ms)")
+            logger.info("✓ Exact Q&A match: '%s' (user: %s, took <1ms)", question, key)
+            self._record_qa_hit(key, qa_pair)
             return qa_pair
 
         # Step 2: Similarity matching with early exit optimization
+        # Scan most frequently matched pairs first (see _record_qa_hit)
         best_match = None
         best_similarity = 0.0
 
-        for normalized_qa, qa_pair in qa_index.items():
+        for normalized_qa, qa_pair in self._qa_scan_orders.get(key) or qa_index.items():
             similarity = calculate_similarity(normalized_q, normalized_qa)
 
             if similarity > best_similarity:
@@ -552,15 +676,26 @@ class ClaudeService:
 
                 # Early exit: if we find a very high match, stop searching
                 if similarity >= 0.95:
-                    logger.warning(f"QA_FAST_MATCH: Near-exact ({similarity:.2%}): '{question[:80]}' ~ '{qa_pair['question'][:80]}' (user: {key})")
+                    logger.warning(
+                        "QA_FAST_MATCH: Near-exact (%.2f%%): '%.80s' ~ '%.80s' (user: %s)",
+                        similarity * 100, question, qa_pair['question'], key
+                    )
+                    self._record_qa_hit(key, best_match)
                     return best_match
 
         # Step 3: Return best match if above threshold
         if best_similarity >= threshold:
-            logger.warning(f"QA_FAST_MATCH: Similar ({best_similarity:.2%}): '{question[:80]}' ~ '{best_match['question'][:80]}' (user: {key})")
+            logger.warning(
+                "QA_FAST_MATCH: Similar (%.2f%%): '%.80s' ~ '%.80s' (user: %s)",
+                best_similarity * 100, question, best_match['question'], key
+            )
+            self._record_qa_hit(key, best_match)
             return best_match
 
-        logger.info(f"QA_FAST_MATCH: No match for user {key} (best: {best_similarity:.2%}, needed: {threshold})")
+        logger.info(
+            "QA_FAST_MATCH: No match for user %s (best: %.2f%%, needed: %s)",
+            key, best_similarity * 100, threshold
+        )
         return None
 
     async def generate_answer_stream(
@@ -730,7 +865,7 @@ Generate a suggested answer ({instruction}):"""
 
         except Exception as e:
             logger.error(f"Claude streaming error: {str(e)}", exc_info=True)
-            yield "\n\n⚠️ Error generating answer. Please try again."
+            yield ANSWER_ERROR_MESSAGE
 
     def _detect_question_context(self, question: str) -> dict:
         """
@@ -1092,27 +1227,21 @@ Generate a suggested answer ({instruction}):"""
                 "question_type": str (behavioral/technical/situational)
             }
         """
-        logger.info(f"Detecting question in transcription: '{transcription}'")
-        
-        system_prompt = """Analyze the transcription and determine if it contains an interview question.
-Return your analysis in this exact format:
-IS_QUESTION: yes/no
-QUESTION: [the extracted question, or "none" if no question]
-TYPE: behavioral/technical/situational/general/none"""
+        logger.debug("Detecting question in transcription: '%s'", transcription)
 
         try:
             logger.info("Sending question detection request to Claude API")
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=256,
-                system=system_prompt,
+                system=DETECT_QUESTION_SYSTEM_PROMPT,
                 messages=[
                     {"role": "user", "content": f"Transcription: {transcription}"}
                 ]
             )
 
             result_text = response.content[0].text
-            logger.info(f"Question detection raw response: {result_text}")
+            logger.debug("Question detection raw response: %s", result_text)
 
             # Parse response
             lines = result_text.strip().split("\n")
@@ -1135,11 +1264,11 @@ TYPE: behavioral/technical/situational/general/none"""
                 "question": question,
                 "question_type": question_type
             }
-            logger.info(f"Question detection result: {result}")
+            logger.debug("Question detection result: %s", result)
             return result
             
         except Exception as e:
-            logger.error(f"Question detection error: {str(e)}", exc_info=True)
+            logger.error("Question detection error: %s", e, exc_info=True)
             return {"is_question": False, "question": "", "question_type": "none"}
 
 
@@ -1156,7 +1285,7 @@ TYPE: behavioral/technical/situational/general/none"""
         Returns:
             List of dicts with keys: question, answer, question_type, source
         """
-        logger.info(f"Extracting Q&A pairs from text using OpenAI Structured Outputs ({len(text)} chars)")
+        logger.info("Extracting Q&A pairs from text using OpenAI Structured Outputs (%d chars)", len(text))
 
         try:
             completion = await self.openai_client.beta.chat.completions.parse(
@@ -1182,7 +1311,8 @@ Text to parse:
                 logger.warning("No Q&A pairs extracted by OpenAI")
                 return []
 
-            # Convert Pydantic models to dicts and add source field
+            # Convert Pydantic models to plain dicts (JSON-native types only, so the
+            # ORJSONResponse fast path in the bulk-parse endpoint applies) and add source field
             qa_pairs = []
             for pair in parsed_data.qa_pairs:
                 qa_pairs.append({
@@ -1192,11 +1322,11 @@ Text to parse:
                     "source": "bulk_upload"
                 })
 
-            logger.info(f"Successfully extracted {len(qa_pairs)} Q&A pairs using OpenAI Structured Outputs")
+            logger.info("Successfully extracted %d Q&A pairs using OpenAI Structured Outputs", len(qa_pairs))
             return qa_pairs
 
         except Exception as e:
-            logger.error(f"OpenAI Q&A extraction error: {str(e)}", exc_info=True)
+            logger.error("OpenAI Q&A extraction error: %s", e, exc_info=True)
             logger.warning("Falling back to Claude Tool Use")
             return await self.extract_qa_pairs_claude(text)
 
@@ -1216,49 +1346,32 @@ Text to parse:
         Returns:
             List of dicts with keys: question, answer, question_type, source
         """
-        logger.info(f"Extracting Q&A pairs from text ({len(text)} chars)")
-
-        # Define tool schema for structured extraction
-        tools = [{
-            "name": "save_qa_pairs",
-            "description": "Save extracted interview Q&A pairs. Use this to store all question-answer pairs you find in the text, regardless of formatting (markdown, code blocks, tables, etc.).",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "qa_pairs": {
-                        "type": "array",
-                        "description": "Array of all Q&A pairs found in the text",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "question": {
-                                    "type": "string",
-                                    "description": "The interview question (cleaned up, no Q: prefix, no markdown headers)"
-                                },
-                                "answer": {
-                                    "type": "string",
-                                    "description": "The corresponding answer (cleaned up, no A: prefix, no code block markers)"
-                                },
-                                "question_type": {
-                                    "type": "string",
-                                    "enum": ["behavioral", "technical", "situational", "general"],
-                                    "description": "Type of question: behavioral (tell me about, describe), technical (how does X work, explain), situational (what would you do), general (other)"
-                                }
-                            },
-                            "required": ["question", "answer", "question_type"]
-                        }
-                    }
-                },
-                "required": ["qa_pairs"]
-            }
-        }]
+        logger.info("Extracting Q&A pairs from text (%d chars)", len(text))
+
+        # Tiered routing: explicit Q:/A: formatting is easy enough for Haiku.
+        # Escalate to the main model only if Haiku returns nothing usable.
+        if QA_PREFIX_PATTERN.search(text):
+            qa_pairs = await self._extract_qa_pairs_with_tool(text, self.fast_model)
+            if qa_pairs:
+                logger.info("Q&A extraction served by %s (no escalation)", self.fast_model)
+                return qa_pairs
+            logger.warning("Q&A extraction escalated: %s -> %s", self.fast_model, self.model)
+
+        return await self._extract_qa_pairs_with_tool(text, self.model)
 
+    async def _extract_qa_pairs_with_tool(self, text: str, model: str) -> list:
+        """
+        Run one Tool Use extraction call against the given model.
+
+        Returns:
+            List of Q&A pair dicts (empty on failure or missing tool_use block)
+        """
         try:
-            logger.info("Sending Q&A extraction request with Tool Use")
+            logger.info("Sending Q&A extraction request with Tool Use (%s)", model)
             response = self.client.messages.create(
-                model=self.model,
+                model=model,
                 max_tokens=8192,
-                tools=tools,
+                tools=EXTRACT_QA_TOOLS,
                 messages=[{
                     "role": "user",
                     "content": f"""Extract all interview Q&A pairs from the following text.
@@ -1281,8 +1394,10 @@ Text to parse:
                     break
 
             if not tool_use_block:
-                logger.error("No tool_use block found in response")
-                logger.error(f"Response content: {response.content}")
+                logger.error("No tool_use block found in response (%s)", model)
+                # Full content can be several KB of model output - only dump when debugging
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Response content: %s", response.content)
                 return []
 
             # Extract structured data from tool call
@@ -1292,12 +1407,13 @@ Text to parse:
             for pair in qa_pairs:
                 pair["source"] = "bulk_upload"
 
-            logger.info(f"Successfully extracted {len(qa_pairs)} Q&A pairs using Tool Use")
+            logger.info("Successfully extracted %d Q&A pairs using Tool Use (%s)", len(qa_pairs), model)
             return qa_pairs
 
         except Exception as e:
-            logger.error(f"Q&A extraction error: {str(e)}", exc_info=True)
-            logger.error(f"Full response: {response if 'response' in locals() else 'No response'}")
+            logger.error("Q&A extraction error (%s): %s", model, e, exc_info=True)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Full response: %s", response if 'response' in locals() else 'No response')
             return []
 
     async def find_matching_qa_pair(self, question: str, qa_pairs: list, user_id: Optional[str] = None) -> Optional[dict]:
@@ -1327,38 +1443,42 @@ Text to parse:
         normalized_q = normalize_question(question)
         threshold = 0.85
 
-        best_match = None
-        best_similarity = 0.0
-        matched_text = ""
-
+        # Flatten main questions + variations into one choice list of UNIQUE texts.
+        # Uploads often repeat a question (as a variation of another pair, or across
+        # rows) - score each normalized text once; the first owner wins, as before.
+        # owners[i] = (qa_pair, original_text) for choices[i]
+        choices = []
+        owners = []
+        seen = set()
         for qa_pair in qa_pairs:
-            qa_question = qa_pair.get("question", "")
-            normalized_qa = normalize_question(qa_question)
-            similarity = calculate_similarity(normalized_q, normalized_qa)
-
+            # Pairs loaded via build_qa_index are already normalized
+            if "_norm_q" not in qa_pair:
+                _prepare_qa_pair(qa_pair)
+
+            candidates = [(qa_pair["_norm_q"], qa_pair.get("question", ""))]
+            candidates.extend(qa_pair["_norm_variations"])
+            for normalized_text, original_text in candidates:
+                if normalized_text in seen:
+                    continue
+                seen.add(normalized_text)
+                choices.append(normalized_text)
+                owners.append((qa_pair, original_text))
+
+        best_index = None
+        best_similarity = 0.0
+        for index, normalized_text in enumerate(choices):
+            similarity = calculate_similarity(normalized_q, normalized_text)
             if similarity > best_similarity:
                 best_similarity = similarity
-                best_match = qa_pair
-                matched_text = qa_question
+                best_index = index
 
-            variations = qa_pair.get("question_variations", [])
-            if variations:
-                for variation in variations:
-                    if variation and variation.strip():
-                        normalized_var = normalize_question(variation)
-                        var_similarity = calculate_similarity(normalized_q, normalized_var)
-
-                        if var_similarity > best_similarity:
-                            best_similarity = var_similarity
-                            best_match = qa_pair
-                            matched_text = variation
-
-        if best_similarity >= threshold:
-            logger.info(f"Found match (string-based, {best_similarity:.2%}): '{question}' ~ '{matched_text}'")
+        if best_index is not None and best_similarity >= threshold:
+            best_match, matched_text = owners[best_index]
+            logger.info("Found match (string-based, %.2f%%): '%s' ~ '%s'", best_similarity * 100, question, matched_text)
             return best_match
-        else:
-            logger.info(f"No match found (best: {best_similarity:.2%})")
-            return None
+
+        logger.info("No match found (below %.0f%% threshold)", threshold * 100)
+        return None
 
     def get_temporary_answer(self, question_type: str) -> str:
         """
@@ -1391,10 +1511,11 @@ def get_claude_service(supabase: Optional[Client] = None) -> ClaudeService:
         qdrant_service = None
         if settings.QDRANT_URL:
             try:
+                from app.core.supabase import get_supabase_client
                 from app.services.qdrant_service import QdrantService
                 qdrant_service = QdrantService(
                     qdrant_url=settings.QDRANT_URL,
-                    openai_api_key=settings.OPENAI_API_KEY
+                    supabase=get_supabase_client()
                 )
                 logger.info("Initialized ClaudeService with Qdrant for vector search")
             except Exception as e:
@@ -1,30 +1,294 @@
 """
 Deepgram Nova-3 API integration for speech-to-text
 Uses WebSocket streaming for real-time, low-latency transcription
-Converts WebM/Opus audio to linear16 PCM using ffmpeg
+Converts WebM/Opus audio to linear16 PCM in-process (libopus), with ffmpeg as fallback
 """
 
 import logging
 import asyncio
+import socket
+import time
+from collections import deque
 from typing import Optional, Callable
+import httpx
 from deepgram import AsyncDeepgramClient
 from deepgram.core.events import EventType
 from app.core.config import settings
+from app.services import webm_opus
 
 logger = logging.getLogger(__name__)
 
+# Client-negotiated input format for raw 16 kHz mono Int16 PCM (no transcoding needed)
+PCM16_FORMAT = "pcm16"
+
+# PCM is forwarded in 6400-byte frames (200ms at 16kHz mono s16le): fewer WebSocket sends
+PCM_CHUNK_BYTES = 6400
+# A partial frame is sent anyway once its audio has waited this long (seconds)
+PCM_FLUSH_DEADLINE = 0.22
+# Send ring capacity (power of two): 64KB = ~2s of 16kHz mono s16le.
+# Bounds the latency a network stall can add; older audio is dropped beyond it.
+PCM_RING_CAPACITY = 1 << 16
+# How long finish() waits for buffered PCM to reach Deepgram before closing
+SENDER_FLUSH_TIMEOUT = 2.0
+# Recent ffmpeg stderr lines kept for diagnosing a crash
+FFMPEG_STDERR_TAIL_LINES = 20
+
+
+# One SDK client, and so one httpx connection pool, shared by the streaming and batch
+# services. Idle HTTPS connections are kept warm so batch requests skip the TLS handshake.
+_shared_client = AsyncDeepgramClient(
+    api_key=settings.DEEPGRAM_API_KEY,
+    httpx_client=httpx.AsyncClient(
+        timeout=60.0,  # SDK default
+        follow_redirects=True,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=300.0),
+    ),
+)
+
+
+def _connection_socket(connection) -> Optional[socket.socket]:
+    """
+    Dig the TCP socket out of a Deepgram SDK socket client (websockets underneath).
+    Returns None if the SDK internals don't look as expected.
+    """
+    websocket = getattr(connection, "_websocket", None)
+    transport = getattr(websocket, "transport", None)
+    if transport is None:
+        return None
+    try:
+        return transport.get_extra_info("socket")
+    except Exception:
+        return None
+
+
+class _PcmRing:
+    """
+    Single-producer/single-consumer byte ring between the PCM sources
+    (decoder, ffmpeg stdout, raw PCM clients) and the Deepgram sender task.
+
+    Storage is preallocated and indexed with a power-of-two mask, so writes are
+    plain slice copies instead of growing/shifting a bytearray. The first
+    `max_read` bytes are mirrored past the end ("ghost region"), which lets
+    peek() hand out one contiguous memoryview even when data wraps around.
+
+    The ring never grows: when a write doesn't fit, the oldest audio is dropped
+    (except the frame at the front, which may be mid-send).
+    """
+
+    def __init__(self, capacity: int = PCM_RING_CAPACITY, max_read: int = PCM_CHUNK_BYTES):
+        assert capacity & (capacity - 1) == 0, "capacity must be a power of two"
+        self._max_read = max_read
+        self._allocate(capacity)
+        self._head = 0  # Total bytes written
+        self._tail = 0  # Total bytes consumed
+
+    def _allocate(self, capacity: int):
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._buf = bytearray(capacity + self._max_read)
+        self._view = memoryview(self._buf)
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def write(self, data) -> int:
+        """
+        Copy data in, dropping the oldest buffered audio if it doesn't fit.
+
+        Returns:
+            Number of bytes dropped (0 normally)
+        """
+        data = memoryview(data).cast("B")
+        n = len(data)
+        if n > self._capacity - len(self):
+            return self._write_dropping_oldest(data)
+
+        pos = self._head & self._mask
+        first = min(n, self._capacity - pos)
+        self._view[pos:pos + first] = data[:first]
+        if first < n:
+            self._view[:n - first] = data[first:]
+        self._head += n
+
+        # Keep the ghost region in sync with the start of the ring
+        if pos < self._max_read or first < n:
+            self._view[self._capacity:] = self._view[:self._max_read]
+        return 0
+
+    def peek(self, max_bytes: int) -> memoryview:
+        """Contiguous view of up to max_bytes (<= max_read) unconsumed bytes."""
+        pos = self._tail & self._mask
+        return self._view[pos:pos + min(len(self), max_bytes, self._max_read)]
+
+    def consume(self, n: int) -> None:
+        self._tail += n
+
+    def clear(self) -> None:
+        self._head = self._tail = 0
+
+    def _write_dropping_oldest(self, data: memoryview) -> int:
+        """
+        Overflow path (sender stalled): rebuild the ring as
+        [front frame][newest audio that fits]. Rare, so a full copy is fine.
+        """
+        pending = len(self)
+        # The front frame may be held by peek() while its send is awaited: keep it
+        keep = min(pending, self._max_read)
+        room = self._capacity - keep
+        total = pending - keep + len(data)
+        dropped = max(0, total - room)
+
+        old_view, old_capacity = self._view, self._capacity
+        tail = self._tail
+
+        def old_bytes(offset: int, length: int):
+            # Pending bytes [offset, offset + length) of the old ring, as up to two views
+            pos = (tail + offset) & (old_capacity - 1)
+            first = min(length, old_capacity - pos)
+            yield old_view[pos:pos + first]
+            if first < length:
+                yield old_view[:length - first]
+
+        # Views handed out by peek() keep the old buffer alive until released
+        self._allocate(old_capacity)
+        out = 0
+        old_kept_from = keep + dropped  # Skip the dropped (oldest) bytes
+        parts = list(old_bytes(0, keep))
+        if old_kept_from < pending:
+            parts += old_bytes(old_kept_from, pending - old_kept_from)
+        parts.append(data[max(0, old_kept_from - pending):])
+        for part in parts:
+            self._view[out:out + len(part)] = part
+            out += len(part)
+        self._view[self._capacity:] = self._view[:self._max_read]
+        self._tail, self._head = 0, out
+        return dropped
+
+
+class _FFmpegProtocol(asyncio.SubprocessProtocol):
+    """
+    Event-loop side of the ffmpeg subprocess.
+
+    stdout PCM is handed to the service's send buffer, stderr lines are logged,
+    and stdin flow control (pause/resume_writing) backs drain().
+    """
+
+    def __init__(self, service: "DeepgramStreamingService"):
+        self.service = service
+        self.transport: Optional[asyncio.SubprocessTransport] = None
+        self.exited = asyncio.get_running_loop().create_future()
+        self._stderr_buf = bytearray()
+        # Last stderr lines (raw bytes), reported if ffmpeg dies; no reads needed after the fact
+        self.stderr_tail = deque(maxlen=FFMPEG_STDERR_TAIL_LINES)
+        self._paused = False
+        self._drain_waiter: Optional[asyncio.Future] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def pipe_data_received(self, fd, data):
+        if fd == 1:
+            self.service._on_ffmpeg_pcm(data)
+        elif fd == 2:
+            if b"\n" not in data:
+                self._stderr_buf += data  # Partial line, wait for the rest
+                return
+            *lines, rest = data.split(b"\n")
+            if self._stderr_buf:
+                self._stderr_buf += lines[0]
+                lines[0] = bytes(self._stderr_buf)
+            self._stderr_buf = bytearray(rest)
+            for line in lines:
+                self._on_stderr_line(line)
+
+    def _on_stderr_line(self, line: bytes):
+        if line.strip():
+            self.stderr_tail.append(line)
+        self.service._log_ffmpeg_stderr(line)
+
+    def stderr_summary(self) -> str:
+        """Recent stderr output, oldest first, for error messages."""
+        return " | ".join(line.decode('utf-8', errors='ignore').strip() for line in self.stderr_tail)
+
+    def pipe_connection_lost(self, fd, exc):
+        if fd == 1:
+            self.service._on_ffmpeg_eof()
+
+    def process_exited(self):
+        returncode = self.transport.get_returncode()
+        if self._stderr_buf:
+            self._on_stderr_line(bytes(self._stderr_buf))
+            self._stderr_buf.clear()
+        if returncode:
+            logger.error(f"🔧 FFmpeg process terminated with exit code {returncode}")
+            if self.stderr_tail:
+                logger.error(f"🔧 FFmpeg last output: {self.stderr_summary()}")
+        self.service._ffmpeg_alive = False
+        if not self.exited.done():
+            self.exited.set_result(returncode)
+        # Wake any writer blocked on a pipe that will never drain
+        self.resume_writing()
+
+    @property
+    def writing_paused(self) -> bool:
+        """True while ffmpeg's stdin buffer is above the high-water mark."""
+        return self._paused
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+        self._drain_waiter = None
+
+    async def drain(self):
+        """Wait until ffmpeg's stdin buffer is below the high-water mark."""
+        if not self._paused:
+            return
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        await self._drain_waiter
+
 
 class DeepgramStreamingService:
-    def __init__(self):
-        self.client = AsyncDeepgramClient(api_key=settings.DEEPGRAM_API_KEY)
+    # v2 (Flux) stream parameters, built once and shared by every connection.
+    # flux-general-en is recommended for general use; audio is 16kHz mono linear16 PCM.
+    _CONNECT_KWARGS = {
+        "model": "flux-general-en",
+        "encoding": "linear16",
+        "sample_rate": 16000,
+        "eot_threshold": 0.7,  # End of turn threshold
+        "eot_timeout_ms": 800,  # 800ms to match our utterance detection
+        "eager_eot_threshold": 0.3,  # Early end of turn detection
+    }
+
+    def __init__(self, client: AsyncDeepgramClient = _shared_client):
+        self.client = client
         self.model = getattr(settings, 'DEEPGRAM_MODEL', 'nova-3')
         self.connection = None
         self.is_connected = False
-        self.ffmpeg_process = None
-        self.converter_task = None
-        self.stderr_task = None
+        self.ffmpeg_transport: Optional[asyncio.SubprocessTransport] = None
+        self.ffmpeg_protocol: Optional[_FFmpegProtocol] = None
+        # Steady-state send path state: cached stdin transport + liveness flipped by process_exited
+        self._ffmpeg_stdin: Optional[asyncio.WriteTransport] = None
+        self._ffmpeg_alive = False
+        self.opus_decoder = None  # In-process WebM/Opus decoder (None = use ffmpeg)
+        self.input_is_pcm = False  # Client streams linear16 PCM directly (format=pcm16)
+        self.sender_task = None  # Single sender: PCM ring -> Deepgram
         self.listening_task = None
-        self.stop_converter = False
+        self._pcm_ring = _PcmRing()
+        self._pcm_ready = asyncio.Event()
+        self._pcm_eof = False
+        self._pcm_pending_since = 0.0  # monotonic time the oldest unsent PCM was queued
+        self._pcm_dropped = 0  # Bytes discarded because the sender fell behind
+        self._end_turn_requested = False  # finalize_turn(): flush now, then ForceEndTurn
+        self._dg_socket = None  # Deepgram TCP socket, for re-asserting TCP_QUICKACK
+        # Pending (transcript, is_final) callbacks; at most one interim waits at a time
+        self._transcript_queue: deque = deque()
+        self._transcript_ready = asyncio.Event()
+        self._transcript_task = None  # Single consumer running transcript callbacks
+        self._final_tasks: set = set()  # In-flight final-transcript callbacks
 
         logger.info(f"Deepgram streaming service initialized with model: {self.model}")
 
@@ -49,115 +313,170 @@ class DeepgramStreamingService:
         self._on_transcript = on_transcript
         self._on_error = on_error
 
-        # Create WebSocket connection with direct parameters (v5 API v2 endpoint)
-        # v2 API uses flux models - flux-general-en is recommended for general use
-        return self.client.listen.v2.connect(
-            model="flux-general-en",
-            encoding="linear16",
-            sample_rate=16000,
-            eot_threshold=0.7,  # End of turn threshold
-            eot_timeout_ms=800,  # 800ms to match our utterance detection
-            eager_eot_threshold=0.3,  # Early end of turn detection
-        )
+        # Create WebSocket connection (v5 API v2 endpoint)
+        return self.client.listen.v2.connect(**self._CONNECT_KWARGS)
 
-    async def _cleanup_ffmpeg(self):
+    async def _stop_sender(self):
         """
-        Clean up existing ffmpeg process and async tasks.
+        Cancel the PCM sender task and drop anything still buffered.
         Safe to call even if nothing is running.
         """
-        logger.debug("🧹 Cleaning up ffmpeg process and tasks...")
-
-        # Stop converter task
-        self.stop_converter = True
-
-        # Cancel async tasks
-        if self.converter_task and not self.converter_task.done():
-            logger.debug("Cancelling converter task...")
-            self.converter_task.cancel()
+        if self.sender_task and not self.sender_task.done():
+            logger.debug("Cancelling sender task...")
+            self.sender_task.cancel()
             try:
-                await self.converter_task
+                await self.sender_task
             except asyncio.CancelledError:
                 pass
 
-        if self.stderr_task and not self.stderr_task.done():
-            logger.debug("Cancelling stderr task...")
-            self.stderr_task.cancel()
-            try:
-                await self.stderr_task
-            except asyncio.CancelledError:
-                pass
+        self.sender_task = None
+        self._pcm_ring.clear()
+        self._pcm_ready.clear()
+        self._pcm_eof = False
+        self._pcm_dropped = 0
+        self._end_turn_requested = False
+
+    async def _cleanup_ffmpeg(self):
+        """
+        Clean up existing ffmpeg process.
+        Safe to call even if nothing is running.
+        """
+        logger.debug("🧹 Cleaning up ffmpeg process...")
 
         # Kill ffmpeg process if running
-        if self.ffmpeg_process:
+        if self.ffmpeg_transport:
             try:
-                if self.ffmpeg_process.returncode is None:  # Still running
+                if self.ffmpeg_transport.get_returncode() is None:  # Still running
                     logger.debug("Terminating existing ffmpeg process")
-                    self.ffmpeg_process.terminate()
+                    self.ffmpeg_transport.terminate()
                     try:
-                        await asyncio.wait_for(self.ffmpeg_process.wait(), timeout=1.0)
+                        await asyncio.wait_for(asyncio.shield(self.ffmpeg_protocol.exited), timeout=1.0)
                     except asyncio.TimeoutError:
                         logger.warning("FFmpeg didn't terminate, killing forcefully")
-                        self.ffmpeg_process.kill()
-                        await self.ffmpeg_process.wait()
-                self.ffmpeg_process = None
+                        self.ffmpeg_transport.kill()
+                        await self.ffmpeg_protocol.exited
             except Exception as e:
                 logger.error(f"Error killing ffmpeg: {e}")
-                self.ffmpeg_process = None
+            finally:
+                self.ffmpeg_transport.close()
+                self.ffmpeg_transport = None
+                self._ffmpeg_stdin = None
+                self._ffmpeg_alive = False
+                self.ffmpeg_protocol = None
 
-        self.converter_task = None
-        self.stderr_task = None
         logger.debug("✅ FFmpeg cleanup complete")
 
-    async def setup_connection(self, connection):
+    async def setup_connection(self, connection, input_is_pcm: bool = False):
         """
-        Set up event handlers for the connection and start ffmpeg converter.
+        Set up event handlers for the connection and prepare the audio decoder.
         Cleans up any existing state from previous connections.
 
         Args:
             connection: Deepgram connection object
+            input_is_pcm: Client sends 16 kHz mono linear16 PCM, so no decoding is needed
         """
-        # CRITICAL: Clean up any existing ffmpeg process from previous connection
+        # CRITICAL: Clean up any existing ffmpeg process / decoder / sender from previous connection
         await self._cleanup_ffmpeg()
+        await self._stop_sender()
+        await self._stop_transcript_consumer()
+        self.opus_decoder = None
+
+        # Fresh wakeup primitives bound to the loop running this connection. The service is
+        # a module-level singleton, so ones created at import (or used by a previous loop,
+        # e.g. a test's asyncio.run) would fail with "bound to a different event loop".
+        self._pcm_ready = asyncio.Event()
+        self._transcript_ready = asyncio.Event()
 
         self.connection = connection
+        self.input_is_pcm = input_is_pcm
 
         # Reset state for new session
         self.is_connected = False
         logger.info("🔄 State reset for new connection")
 
         # Set up event handlers
-        connection.on(EventType.MESSAGE, self._handle_transcript(self._on_transcript))
+        connection.on(EventType.MESSAGE, self._handle_transcript())
         connection.on(EventType.ERROR, self._handle_error(self._on_error))
         connection.on(EventType.OPEN, lambda _: logger.info("✓ Deepgram WebSocket opened"))
         connection.on(EventType.CLOSE, lambda _: logger.info("Deepgram WebSocket closed"))
 
-        # Start ffmpeg immediately (streaming mode handles incomplete headers gracefully)
-        await self._start_ffmpeg()
-        logger.info("✅ FFmpeg started and ready for streaming")
+        # Prefer in-process Opus decoding (no subprocess, no pipes).
+        # ffmpeg is only started if libopus is missing or the demuxer rejects the stream.
+        if input_is_pcm:
+            logger.info("✅ Client streams raw PCM, no transcoding stage")
+        elif webm_opus.is_available():
+            self.opus_decoder = webm_opus.WebMOpusDecoder()
+            logger.info("✅ In-process WebM/Opus decoder ready for streaming")
+        else:
+            self.opus_decoder = None
+            # Start ffmpeg immediately (streaming mode handles incomplete headers gracefully)
+            await self._start_ffmpeg()
+            logger.info("✅ FFmpeg started and ready for streaming")
+
+        # Single sender task drains decoded PCM to Deepgram in order
+        self.sender_task = asyncio.create_task(self._pcm_sender_loop())
+        # Single consumer runs transcript callbacks (no Task per interim result)
+        self._transcript_task = asyncio.create_task(self._transcript_consumer())
 
         # Start listening in background task (non-blocking)
         # start_listening() is an infinite loop that processes Deepgram messages
         self.listening_task = asyncio.create_task(connection.start_listening())
+        self._tune_socket(connection)
         self.is_connected = True
         logger.info("✓ Deepgram WebSocket connected and listening")
 
+    def _tune_socket(self, connection):
+        """
+        Best-effort low-latency TCP options on the Deepgram WebSocket.
+
+        TCP_NODELAY stops Nagle from holding small frames back (asyncio normally
+        sets it already; this makes it explicit). TCP_QUICKACK (Linux) avoids
+        delayed ACKs, but the kernel clears it again, so it's re-asserted as
+        Deepgram messages arrive.
+        """
+        self._dg_socket = _connection_socket(connection)
+        if self._dg_socket is None:
+            logger.debug("Deepgram socket not reachable, skipping TCP tuning")
+            return
+        try:
+            self._dg_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
+            logger.debug(f"Could not set TCP_NODELAY on Deepgram socket: {e}")
+        self._quickack()
+
+    def _quickack(self):
+        """Re-enable TCP_QUICKACK on the Deepgram socket (Linux only, best-effort)."""
+        if self._dg_socket is None or not hasattr(socket, "TCP_QUICKACK"):
+            return
+        try:
+            self._dg_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except OSError:
+            self._dg_socket = None  # Socket gone; stop trying
+
     async def _start_ffmpeg(self):
         """
-        Start ffmpeg process and converter async tasks.
-        Called immediately during setup_connection().
+        Start ffmpeg process (as an asyncio subprocess transport).
+        Called during setup_connection() when in-process decoding isn't available;
+        its stdout feeds the same PCM ring as the other input paths.
         """
         # Defensive: cleanup any zombie process
-        if self.ffmpeg_process is not None:
+        if self.ffmpeg_transport is not None:
             logger.warning("⚠️ FFmpeg process already exists, cleaning up first...")
             await self._cleanup_ffmpeg()
 
         try:
             logger.info("🚀 Starting ffmpeg process...")
-            self.ffmpeg_process = await asyncio.create_subprocess_exec(
+            loop = asyncio.get_running_loop()
+            self.ffmpeg_transport, self.ffmpeg_protocol = await loop.subprocess_exec(
+                lambda: _FFmpegProtocol(self),
                 "ffmpeg",
                 "-loglevel", "warning",
-                "-fflags", "+genpts+igndts",
+                "-fflags", "+genpts+igndts+nobuffer",
                 "-err_detect", "ignore_err",
+                # Codec parameters come from the WebM header (Opus CodecPrivate), so
+                # don't hold the first packets back to probe/analyze the stream
+                "-probesize", "32",
+                "-analyzeduration", "0",
                 "-f", "webm",
                 "-i", "pipe:0",
                 "-vn",
@@ -165,25 +484,27 @@ class DeepgramStreamingService:
                 "-ar", "16000",
                 "-ac", "1",
                 "-fflags", "+discardcorrupt",
+                # Write each packet to stdout immediately instead of filling a 32KB
+                # output buffer first (~1s of 16kHz s16le)
+                "-flush_packets", "1",
                 "pipe:1",
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
 
-            # Start background tasks to read from ffmpeg and send to Deepgram
-            self.stop_converter = False
-            self.converter_task = asyncio.create_task(self._ffmpeg_to_deepgram_loop())
-            self.stderr_task = asyncio.create_task(self._ffmpeg_stderr_monitor())
-
+            self._ffmpeg_stdin = self.ffmpeg_transport.get_pipe_transport(0)
+            self._ffmpeg_alive = True
             logger.info("✅ FFmpeg process started successfully")
         except Exception as e:
             logger.error(f"❌ Failed to start ffmpeg: {e}", exc_info=True)
             raise
 
-    def _handle_transcript(self, callback: Callable):
-        """Create transcript event handler for v2 API."""
+    def _handle_transcript(self):
+        """Create transcript event handler for v2 API (feeds the transcript consumer)."""
         def handler(result):
+            # Linux drops QUICKACK after reads; keep ACKs immediate for the next frames
+            self._quickack()
             try:
                 # v2 API returns different message structure
                 event = getattr(result, "event", None)
@@ -194,8 +515,7 @@ class DeepgramStreamingService:
 
                 if transcript and transcript.strip():
                     logger.info(f"Transcript ({'final' if is_final else 'interim'}): '{transcript}'")
-                    # Schedule async callback
-                    asyncio.create_task(callback(transcript, is_final))
+                    self._queue_transcript(transcript, is_final)
 
                 # Log turn events
                 if event == "StartOfTurn":
@@ -211,6 +531,65 @@ class DeepgramStreamingService:
 
         return handler
 
+    def _queue_transcript(self, transcript: str, is_final: bool):
+        """
+        Hand a transcript to the consumer task.
+
+        Flux interims carry the whole turn so far, so a newer interim replaces one
+        that is still waiting (stale interims are dropped under backlog). Finals
+        are always delivered.
+        """
+        queue = self._transcript_queue
+        if not is_final and queue and not queue[-1][1]:
+            queue[-1] = (transcript, False)
+            logger.debug("Transcript backlog, replaced stale interim result")
+        else:
+            queue.append((transcript, is_final))
+        self._transcript_ready.set()
+
+    async def _transcript_consumer(self):
+        """
+        Run transcript callbacks in arrival order from one long-lived task.
+
+        Interim results are awaited inline (they only forward text to the client).
+        Finals can trigger answer generation, so they get their own task to keep
+        interims flowing meanwhile.
+        """
+        queue = self._transcript_queue
+        try:
+            while True:
+                await self._transcript_ready.wait()
+                self._transcript_ready.clear()
+
+                while queue:
+                    transcript, is_final = queue.popleft()
+                    try:
+                        if is_final:
+                            task = asyncio.create_task(self._on_transcript(transcript, is_final))
+                            self._final_tasks.add(task)
+                            task.add_done_callback(self._final_tasks.discard)
+                            # Let it start before later interims so the client sees them in order
+                            await asyncio.sleep(0)
+                        else:
+                            await self._on_transcript(transcript, is_final)
+                    except Exception as e:
+                        logger.error(f"Error in transcript callback: {e}", exc_info=True)
+        except asyncio.CancelledError:
+            logger.debug("Transcript consumer cancelled")
+            raise
+
+    async def _stop_transcript_consumer(self):
+        """Cancel the transcript consumer and drop queued results. Safe if not running."""
+        if self._transcript_task and not self._transcript_task.done():
+            self._transcript_task.cancel()
+            try:
+                await self._transcript_task
+            except asyncio.CancelledError:
+                pass
+        self._transcript_task = None
+        self._transcript_queue.clear()
+        self._transcript_ready.clear()
+
     def _handle_error(self, callback: Optional[Callable]):
         """Create error event handler."""
         def handler(error):
@@ -221,116 +600,179 @@ class DeepgramStreamingService:
 
         return handler
 
-    async def _ffmpeg_stderr_monitor(self):
-        """Monitor ffmpeg stderr for errors and warnings."""
-        try:
-            while not self.stop_converter and self.ffmpeg_process:
-                line = await self.ffmpeg_process.stderr.readline()
-                if not line:
-                    # No more data - check if process died
-                    if self.ffmpeg_process.returncode is not None:
-                        logger.error(f"🔧 FFmpeg process terminated with exit code {self.ffmpeg_process.returncode}")
-                    break
-
-                error_msg = line.decode('utf-8', errors='ignore').strip()
-                if error_msg:
-                    # Categorize messages
-                    if 'error' in error_msg.lower() or 'fatal' in error_msg.lower():
-                        logger.error(f"🔧 FFmpeg ERROR: {error_msg}")
-                    elif 'warning' in error_msg.lower():
-                        logger.warning(f"🔧 FFmpeg WARNING: {error_msg}")
-                    else:
-                        logger.debug(f"🔧 FFmpeg: {error_msg}")
-        except asyncio.CancelledError:
-            logger.debug("FFmpeg stderr monitor cancelled")
-            raise
-        except Exception as e:
-            logger.error(f"Error monitoring ffmpeg stderr: {e}", exc_info=True)
-
-    async def _ffmpeg_to_deepgram_loop(self):
+    def _log_ffmpeg_stderr(self, line: bytes):
         """
-        Background async task that reads converted audio from ffmpeg stdout
-        and sends it to Deepgram.
+        Log one ffmpeg stderr line at a level matching its content.
+        Triage happens on bytes; the line is only decoded if it will be logged.
         """
-        try:
-            # Read in chunks (2560 bytes = 160ms at 16kHz mono s16le)
-            chunk_size = 2560
-            total_sent = 0
+        line = line.strip()
+        if not line:
+            return
+        # Categorize messages
+        lowered = line.lower()
+        if b'error' in lowered or b'fatal' in lowered:
+            level, label = logging.ERROR, "FFmpeg ERROR:"
+        elif b'warning' in lowered:
+            level, label = logging.WARNING, "FFmpeg WARNING:"
+        else:
+            level, label = logging.DEBUG, "FFmpeg:"
+        if logger.isEnabledFor(level):
+            logger.log(level, "🔧 %s %s", label, line.decode('utf-8', errors='ignore'))
+
+    def _enqueue_pcm(self, data: bytes):
+        """Hand PCM to the sender task (no awaits; producers never block on the network)."""
+        was_empty = not len(self._pcm_ring)
+        dropped = self._pcm_ring.write(data)
+        if dropped:
+            self._pcm_dropped += dropped
+            logger.warning(
+                f"⚠️ Deepgram send backlog full, dropped {dropped} bytes of oldest audio "
+                f"(total dropped: {self._pcm_dropped})"
+            )
+        if was_empty:
+            # Wake the sender so it arms the partial-frame deadline
+            self._pcm_pending_since = time.monotonic()
+            self._pcm_ready.set()
+        elif len(self._pcm_ring) >= PCM_CHUNK_BYTES:
+            self._pcm_ready.set()
+
+    def _on_ffmpeg_pcm(self, data: bytes):
+        """PCM read from ffmpeg stdout."""
+        self._enqueue_pcm(data)
+
+    def _on_ffmpeg_eof(self):
+        """ffmpeg closed stdout: let the sender flush what's left and stop."""
+        logger.info("📭 No more data from ffmpeg stdout")
+        self._pcm_eof = True
+        self._pcm_ready.set()
+
+    async def _pcm_sender_loop(self):
+        """
+        Background async task that sends buffered PCM to Deepgram.
+        Being the only sender keeps chunks in order.
 
-            logger.info("🔄 FFmpeg converter loop started")
+        Full 200ms frames go out as soon as they're buffered; a shorter tail is
+        sent once it's been waiting PCM_FLUSH_DEADLINE, at end of stream, or
+        when finalize_turn() asks for it (followed by ForceEndTurn, so the
+        control message always lands after the turn's audio).
+        """
+        ring = self._pcm_ring
+        total_sent = 0
+        try:
+            logger.info("🔄 PCM sender loop started")
 
-            while not self.stop_converter and self.ffmpeg_process:
+            while True:
+                timeout = None
+                if 0 < len(ring) < PCM_CHUNK_BYTES and not self._pcm_eof:
+                    timeout = max(0.0, self._pcm_pending_since + PCM_FLUSH_DEADLINE - time.monotonic())
                 try:
-                    # Check if ffmpeg is still alive
-                    if self.ffmpeg_process.returncode is not None:
-                        logger.error(f"❌ FFmpeg died in converter loop (exit code: {self.ffmpeg_process.returncode})")
-                        break
+                    await asyncio.wait_for(self._pcm_ready.wait(), timeout)
+                    self._pcm_ready.clear()
+                    flush_partial = self._pcm_eof or self._end_turn_requested
+                except asyncio.TimeoutError:
+                    flush_partial = True
 
-                    # Read chunk from ffmpeg stdout
-                    data = await self.ffmpeg_process.stdout.read(chunk_size)
-                    if not data:
-                        logger.info("📭 No more data from ffmpeg stdout")
-                        break
+                while len(ring) >= PCM_CHUNK_BYTES or (flush_partial and len(ring)):
+                    chunk = ring.peek(PCM_CHUNK_BYTES)
+                    size = len(chunk)
 
-                    total_sent += len(data)
-                    logger.debug(f"📤 Read {len(data)} bytes from ffmpeg (total: {total_sent})")
-
-                    # Send converted PCM data to Deepgram directly (no timeout issues!)
+                    # Send PCM straight from the ring (no copy); consumed only afterwards
                     if self.connection and self.is_connected:
                         try:
-                            await self.connection.send_media(data)
-                            logger.debug(f"✅ Sent {len(data)} bytes to Deepgram")
+                            await self.connection.send_media(chunk)
+                            total_sent += size
+                            logger.debug("✅ Sent %d bytes to Deepgram (total: %d)", size, total_sent)
                         except Exception as send_err:
                             logger.error(f"❌ Failed to send to Deepgram: {send_err}")
-                            # Check if connection is still valid
-                            if not self.is_connected:
-                                logger.error("Connection lost, stopping converter loop")
-                                break
                             # Continue on error - don't stop the whole stream for one chunk
                     else:
                         logger.warning("⚠️ Connection not ready, skipping chunk")
+                    chunk.release()
+                    ring.consume(size)
+
+                if self._end_turn_requested and not len(ring):
+                    self._end_turn_requested = False
+                    await self._send_force_end_turn()
 
-                except asyncio.CancelledError:
-                    logger.debug("FFmpeg converter loop cancelled")
-                    raise
-                except Exception as e:
-                    if not self.stop_converter:
-                        logger.error(f"❌ Error in converter loop: {e}", exc_info=True)
+                if len(ring):
+                    self._pcm_pending_since = time.monotonic()
+                elif self._pcm_eof:
                     break
 
         except asyncio.CancelledError:
-            logger.debug("FFmpeg converter task cancelled")
+            logger.debug("PCM sender task cancelled")
             raise
         except Exception as e:
-            logger.error(f"❌ FFmpeg converter task error: {e}", exc_info=True)
+            logger.error(f"❌ PCM sender task error: {e}", exc_info=True)
         finally:
-            logger.info(f"🛑 FFmpeg converter task stopped (sent {total_sent} bytes total)")
+            logger.info(f"🛑 PCM sender task stopped (sent {total_sent} bytes total)")
 
     async def send_audio(self, audio_data: bytes):
         """
-        Send audio chunk to ffmpeg for conversion, which will then forward to Deepgram.
+        Decode an audio chunk to linear16 PCM and forward it to Deepgram.
+
+        PCM clients are queued as-is. Otherwise uses the in-process WebM/Opus
+        decoder when available, or writes the chunk to ffmpeg. Either way the
+        PCM lands in the send ring and the sender task forwards it.
+
+        Never blocks the event loop: no pipe reads, only awaits ffmpeg stdin
+        back-pressure.
 
         Args:
-            audio_data: Raw audio bytes (WebM/Opus format from client)
+            audio_data: Raw audio bytes (linear16 PCM or WebM/Opus from client)
         """
-        if not self.ffmpeg_process or not self.ffmpeg_process.stdin:
-            logger.warning("⚠️ Cannot send audio: ffmpeg not started")
-            return False
+        if self.input_is_pcm:
+            if not self.connection or not self.is_connected:
+                logger.error("❌ Deepgram not connected")
+                return False
+            self._enqueue_pcm(audio_data)
+            return True
 
-        # Check if ffmpeg process is still alive
-        if self.ffmpeg_process.returncode is not None:
-            exit_code = self.ffmpeg_process.returncode
-            logger.error(f"❌ FFmpeg process died with exit code {exit_code}")
+        chunks = (audio_data,)
+        if self.opus_decoder is not None:
+            try:
+                pcm = self.opus_decoder.decode(audio_data)
+            except webm_opus.UnsupportedStreamError as e:
+                logger.warning(f"⚠️ In-process decoder rejected stream ({e}), falling back to ffmpeg")
+                chunks = self.opus_decoder.fallback_chunks
+                self.opus_decoder = None
+                await self._start_ffmpeg()
+            else:
+                if pcm:
+                    self._enqueue_pcm(pcm)
+                return True
+
+        # Steady state: one flag and one attribute check, no transport/process queries
+        stdin = self._ffmpeg_stdin
+        if not self._ffmpeg_alive or stdin is None or stdin.is_closing():
+            if not self.ffmpeg_transport:
+                logger.warning("⚠️ Cannot send audio: ffmpeg not started")
+            elif not self._ffmpeg_alive:
+                # stderr was already collected by the protocol; never read the pipe here
+                last_line = "no output"
+                if self.ffmpeg_protocol.stderr_tail:
+                    last_line = self.ffmpeg_protocol.stderr_tail[-1].decode('utf-8', errors='ignore').strip()
+                exit_code = self.ffmpeg_transport.get_returncode()
+                logger.error(f"❌ FFmpeg process died with exit code {exit_code} ({last_line})")
+            else:
+                logger.warning("⚠️ Cannot send audio: ffmpeg stdin closed")
             return False
 
         try:
             # Write WebM/Opus data to ffmpeg stdin
             # ffmpeg will convert it to linear16 PCM and output to stdout
-            # The converter task will read from stdout and send to Deepgram
-            logger.debug(f"📥 Received {len(audio_data)} bytes from client, writing to ffmpeg")
-            self.ffmpeg_process.stdin.write(audio_data)
-            await self.ffmpeg_process.stdin.drain()
-            logger.debug(f"✅ Wrote {len(audio_data)} bytes to ffmpeg stdin")
+            # The protocol queues stdout PCM for the sender task
+            # The pipe transport writes straight from our buffers (no copy unless the pipe is full)
+            written = 0
+            for chunk in chunks:
+                if chunk:
+                    stdin.write(chunk)
+                    written += len(chunk)
+            # Only wait when ffmpeg is actually behind (buffer above the high-water mark)
+            if self.ffmpeg_protocol.writing_paused:
+                logger.debug("⏳ FFmpeg stdin backlogged, waiting for drain")
+                await self.ffmpeg_protocol.drain()
+            logger.debug("✅ Wrote %d bytes to ffmpeg stdin", written)
             return True
         except BrokenPipeError:
             logger.error(f"❌ BrokenPipeError: ffmpeg stdin pipe is broken (process may have crashed)")
@@ -339,15 +781,53 @@ class DeepgramStreamingService:
             logger.error(f"❌ Error sending audio to ffmpeg: {e}", exc_info=True)
             return False
 
+    async def _send_force_end_turn(self):
+        """Ask Flux to close the current turn now instead of waiting for its EOT timeout."""
+        send_force_end_turn = getattr(self.connection, "send_force_end_turn", None)
+        if send_force_end_turn is None or not self.is_connected:
+            # Older SDKs can't send it; Flux still ends the turn on its own
+            logger.debug("ForceEndTurn not available, relying on Flux end-of-turn detection")
+            return
+        try:
+            await send_force_end_turn()
+            logger.debug("➡️ Sent ForceEndTurn to Deepgram")
+        except Exception as e:
+            logger.error(f"❌ Failed to send ForceEndTurn: {e}")
+
+    def finalize_turn(self):
+        """
+        End the current turn but keep the stream open for the next one.
+
+        Buffered audio is sent right away (without waiting for a full frame or
+        the flush deadline), then ForceEndTurn. The WebSocket, decoder and
+        ffmpeg all stay up, so the next turn starts without a reconnect.
+        """
+        if not self.sender_task or self.sender_task.done():
+            return
+        self._end_turn_requested = True
+        self._pcm_ready.set()
+
     async def finish(self):
-        """Signal end of audio stream."""
+        """Signal end of audio stream (closes the Deepgram stream for good)."""
         # Close ffmpeg stdin to signal end of input
-        if self.ffmpeg_process and self.ffmpeg_process.stdin:
+        stdin = self._ffmpeg_stdin
+        if stdin and not stdin.is_closing():
             try:
-                self.ffmpeg_process.stdin.close()
+                stdin.close()
                 logger.info("FFmpeg input stream closed")
             except Exception as e:
                 logger.error(f"Error closing ffmpeg stdin: {e}", exc_info=True)
+        elif not self.ffmpeg_transport:
+            # In-process / raw PCM: nothing upstream left to flush
+            self._pcm_eof = True
+            self._pcm_ready.set()
+
+        # Let the sender push buffered PCM (ffmpeg's tail included) before closing
+        if self.sender_task and not self.sender_task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self.sender_task), timeout=SENDER_FLUSH_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️ Timed out flushing buffered audio to Deepgram")
 
         if self.connection:
             try:
@@ -369,8 +849,10 @@ class DeepgramStreamingService:
                 pass
             logger.debug("Deepgram listening task cancelled")
 
-        # Use centralized cleanup for ffmpeg
+        # Use centralized cleanup for ffmpeg, the sender and transcript tasks
         await self._cleanup_ffmpeg()
+        await self._stop_sender()
+        await self._stop_transcript_consumer()
 
         # Close Deepgram connection
         if self.connection:
@@ -378,15 +860,21 @@ class DeepgramStreamingService:
                 await self.connection.close()
                 self.is_connected = False
                 self.connection = None
+                self._dg_socket = None
                 logger.info("Deepgram WebSocket disconnected")
             except Exception as e:
                 logger.error(f"Error disconnecting: {e}", exc_info=True)
 
 
+# Ask for an uncompressed batch response: a compressed (zstd) body has to be fully
+# buffered before it can be decoded, which holds up the transcript
+BATCH_REQUEST_OPTIONS = {"additional_headers": {"Accept-Encoding": "identity"}}
+
+
 # For backward compatibility - batch transcription fallback
 class DeepgramBatchService:
-    def __init__(self):
-        self.client = AsyncDeepgramClient(api_key=settings.DEEPGRAM_API_KEY)
+    def __init__(self, client: AsyncDeepgramClient = _shared_client):
+        self.client = client
         self.model = getattr(settings, 'DEEPGRAM_MODEL', 'nova-3')
 
     async def transcribe(self, audio_data: bytes, language: str = "en") -> str:
@@ -401,6 +889,7 @@ class DeepgramBatchService:
                 language=language,
                 smart_format=True,
                 punctuate=True,
+                request_options=BATCH_REQUEST_OPTIONS,
             )
 
             if response and response.results and response.results.channels:
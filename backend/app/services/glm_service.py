@@ -13,13 +13,79 @@ Performance:
 - Total answer time: 2-3s for 150 tokens
 """
 
+import asyncio
+import io
 import logging
+import threading
 from typing import Optional, AsyncIterator
 from zhipuai import ZhipuAI
 from app.core.config import settings
+from app.core.messages import ANSWER_ERROR_MESSAGE
 
 logger = logging.getLogger(__name__)
 
+# System prompts (optimized for GLM-4.6)
+BULLET_SYSTEM_PROMPT = """You are an interview coach for OpenAI Solutions Architect interviews.
+
+CRITICAL FORMAT REQUIREMENT:
+- Output ONLY bullet points (use "-" prefix)
+- Each bullet: 1 concise sentence (10-15 words max)
+- Total: 3-5 bullets covering key points
+- NO introductory text, NO paragraphs
+- Start immediately with first bullet
+
+CONTENT REQUIREMENTS (Birth2Death Project):
+- Birth2Death has NOT launched - NO real users, NO customers, NO revenue
+- Tested with ~20 friends for feedback only
+- Resume had inflated "1,000+ users" claim - address upfront if relevant
+- Validation suite built Dec 16-18, 2025 (THIS WEEK)
+- Cost reduction: 92.6% measured with real OpenAI API calls
+- GitHub pushed Dec 18, 2025 (commit and push dates match)
+
+FORBIDDEN PHRASES:
+- "We had customers", "users were", "paying customers"
+- "Built a month ago", "validated in November"
+
+REQUIRED PHRASES:
+- "Tested with friends", "haven't launched yet"
+- "Validated this week", "measured with real API calls"
+- "Pushed to GitHub yesterday"
+
+Style:
+- Direct, confident, no filler
+- Metrics-driven (e.g., "92.6% cost reduction measured")
+- Action-focused (e.g., "Built validation suite in 3 days")
+
+Example Output Format:
+- I'm Heejin Jo, founder building on OpenAI's API for mental health support
+- Birth2Death hasn't launched yet, but validated 92.6% cost reduction this week
+- Measured with real API calls, pushed proof to GitHub yesterday
+- Resume had wrong "1,000+ users" claim - addressed upfront because honesty matters"""
+
+# Paragraph format (fallback)
+PARAGRAPH_SYSTEM_PROMPT = """You are an interview coach for OpenAI Solutions Architect interviews. Generate concise, professional answers (2-3 sentences, 30-45 seconds spoken).
+
+[Same content requirements as bullet format, but output in paragraph form]"""
+
+STAR_STORY_TEMPLATE = (
+    "Story: {title}\n"
+    "Situation: {situation}\n"
+    "Task: {task}\n"
+    "Action: {action}\n"
+    "Result: {result}"
+)
+
+
+# End-of-stream marker from GLMService._stream_completion
+_STREAM_DONE = object()
+
+
+class _StoryFields(dict):
+    """STAR story row for STAR_STORY_TEMPLATE.format_map: missing fields render as '' (title: 'Untitled')."""
+
+    def __missing__(self, key):
+        return "Untitled" if key == "title" else ""
+
 
 class GLMService:
     def __init__(self):
@@ -61,14 +127,9 @@ class GLMService:
             context_parts.append(f"RESUME:\n{resume_text}")
 
         if star_stories:
-            stories_text = "\n\n".join([
-                f"Story: {s.get('title', 'Untitled')}\n"
-                f"Situation: {s.get('situation', '')}\n"
-                f"Task: {s.get('task', '')}\n"
-                f"Action: {s.get('action', '')}\n"
-                f"Result: {s.get('result', '')}"
-                for s in star_stories
-            ])
+            stories_text = "\n\n".join(
+                STAR_STORY_TEMPLATE.format_map(_StoryFields(s)) for s in star_stories
+            )
             context_parts.append(f"STAR STORIES:\n{stories_text}")
 
         if talking_points:
@@ -78,84 +139,88 @@ class GLMService:
         context = "\n\n---\n\n".join(context_parts) if context_parts else "No specific context provided."
 
         # System prompt (optimized for GLM-4.6)
-        if format == "bullet":
-            system_prompt = """You are an interview coach for OpenAI Solutions Architect interviews.
+        system_prompt = BULLET_SYSTEM_PROMPT if format == "bullet" else PARAGRAPH_SYSTEM_PROMPT
 
-CRITICAL FORMAT REQUIREMENT:
-- Output ONLY bullet points (use "-" prefix)
-- Each bullet: 1 concise sentence (10-15 words max)
-- Total: 3-5 bullets covering key points
-- NO introductory text, NO paragraphs
-- Start immediately with first bullet
+        user_prompt = f"""CANDIDATE BACKGROUND:
+{context}
 
-CONTENT REQUIREMENTS (Birth2Death Project):
-- Birth2Death has NOT launched - NO real users, NO customers, NO revenue
-- Tested with ~20 friends for feedback only
-- Resume had inflated "1,000+ users" claim - address upfront if relevant
-- Validation suite built Dec 16-18, 2025 (THIS WEEK)
-- Cost reduction: 92.6% measured with real OpenAI API calls
-- GitHub pushed Dec 18, 2025 (commit and push dates match)
+INTERVIEW QUESTION:
+{question}
 
-FORBIDDEN PHRASES:
-- "We had customers", "users were", "paying customers"
-- "Built a month ago", "validated in November"
+Generate suggested answer (bullet point format):"""
 
-REQUIRED PHRASES:
-- "Tested with friends", "haven't launched yet"
-- "Validated this week", "measured with real API calls"
-- "Pushed to GitHub yesterday"
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
-Style:
-- Direct, confident, no filler
-- Metrics-driven (e.g., "92.6% cost reduction measured")
-- Action-focused (e.g., "Built validation suite in 3 days")
+        # zhipuai's client is synchronous: run the request and the SSE read loop in a
+        # worker thread and hand chunks back through a queue, so the event loop keeps
+        # serving other connections while GLM streams
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        loop.run_in_executor(None, self._stream_completion, messages, loop, queue, cancelled)
 
-Example Output Format:
-- I'm Heejin Jo, founder building on OpenAI's API for mental health support
-- Birth2Death hasn't launched yet, but validated 92.6% cost reduction this week
-- Measured with real API calls, pushed proof to GitHub yesterday
-- Resume had wrong "1,000+ users" claim - addressed upfront because honesty matters"""
-        else:
-            # Paragraph format (fallback)
-            system_prompt = """You are an interview coach for OpenAI Solutions Architect interviews. Generate concise, professional answers (2-3 sentences, 30-45 seconds spoken).
+        try:
+            # Stream chunks
+            chunk_count = 0
+            while True:
+                item = await queue.get()
+                if item is _STREAM_DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                chunk_count += 1
+                yield item
 
-[Same content requirements as bullet format, but output in paragraph form]"""
+            logger.info(f"Streaming complete: {chunk_count} chunks sent")
 
-        user_prompt = f"""CANDIDATE BACKGROUND:
-{context}
+        except Exception as e:
+            logger.error(f"GLM API error: {str(e)}", exc_info=True)
+            yield ANSWER_ERROR_MESSAGE
+        finally:
+            # Consumer gone (finished, failed or closed early) - stop the worker
+            cancelled.set()
 
-INTERVIEW QUESTION:
-{question}
+    def _stream_completion(
+        self,
+        messages: list,
+        loop: asyncio.AbstractEventLoop,
+        queue: asyncio.Queue,
+        cancelled: threading.Event
+    ):
+        """
+        Blocking GLM streaming call; runs in a worker thread.
 
-Generate suggested answer (bullet point format):"""
+        Every text chunk, then any exception, then _STREAM_DONE is put on queue
+        (via the event loop, since asyncio.Queue isn't thread-safe).
 
+        Args:
+            messages: Chat messages for the request
+            loop: Event loop that owns queue
+            queue: Receives text chunks for generate_answer_stream
+            cancelled: Set when the consumer stops reading
+        """
         try:
             # Call GLM API with streaming
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 max_tokens=200,  # ~50 words for bullet points
                 temperature=0.7,
                 stream=True  # Enable SSE streaming
             )
-
-            # Stream chunks
-            chunk_count = 0
             for chunk in response:
-                if chunk.choices[0].delta.content:
-                    text = chunk.choices[0].delta.content
-                    chunk_count += 1
-                    logger.debug(f"Streaming chunk #{chunk_count}: {len(text)} chars")
-                    yield text
-
-            logger.info(f"Streaming complete: {chunk_count} chunks sent")
-
+                if cancelled.is_set():
+                    break
+                text = chunk.choices[0].delta.content
+                if text:
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
         except Exception as e:
-            logger.error(f"GLM API error: {str(e)}", exc_info=True)
-            yield "\n\n⚠️ Error generating answer. Please try again."
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_DONE)
 
     async def generate_answer(
         self,
@@ -179,13 +244,13 @@ Generate suggested answer (bullet point format):"""
         Returns:
             str: Complete generated answer
         """
-        chunks = []
+        answer = io.StringIO()
         async for chunk in self.generate_answer_stream(
             question, resume_text, star_stories, talking_points, format
         ):
-            chunks.append(chunk)
+            answer.write(chunk)
 
-        return "".join(chunks)
+        return answer.getvalue()
 
 
 # Global GLM service instance
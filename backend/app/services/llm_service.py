@@ -8,9 +8,15 @@ Strategy options:
 - "hybrid": Try GLM first, fallback to Claude if error (best of both worlds)
 """
 
+import asyncio
+import hashlib
+import inspect
 import logging
+import time
 from typing import Optional, AsyncIterator
+import numpy as np
 from app.core.config import settings
+from app.core.messages import ANSWER_ERROR_MESSAGE
 from app.services.claude import get_claude_service
 from app.services.glm_service import glm_service
 from app.core.supabase import get_supabase_client
@@ -46,6 +52,122 @@ class LLMService:
             self.primary_service = claude_service
             self.fallback_service = None
 
+        # Parameters the primary service's streaming method accepts (Claude takes session
+        # parameters, GLM doesn't). Resolved once here instead of reflecting per request.
+        stream_method = getattr(self.primary_service, 'generate_answer_stream', None)
+        self._primary_stream_params = (
+            frozenset(inspect.signature(stream_method).parameters) if stream_method else frozenset()
+        )
+
+        # Semantic answer cache: near-duplicate questions ("tell me about yourself" vs
+        # "introduce yourself") reuse the generated answer instead of another LLM call.
+        # Needs Qdrant's embedding client; disabled without it.
+        # Scoped to the interview profile and the exact custom_instructions (which
+        # carry the A/B prompt variant), so answers never cross profiles or variants.
+        # Format: {(user_id, profile_id, instructions_hash, format):
+        #          [(question_embedding, answer, cached_at)]}
+        self.qdrant_service = claude_service.qdrant_service
+        self._semantic_cache = {}
+        self._semantic_cache_threshold = 0.95  # Cosine similarity to reuse an answer
+        self._semantic_cache_ttl = 3600.0  # Seconds before a cached answer goes stale
+        self._max_semantic_cache_size = 50  # Entries per cache key
+        # Longest the first token waits on the question embedding for a cache lookup
+        self._semantic_cache_lookup_timeout = 0.3
+
+    async def _embed_question(self, question: str) -> Optional[np.ndarray]:
+        """
+        Embed a question for the semantic answer cache.
+
+        Args:
+            question: The interview question
+
+        Returns:
+            Embedding as a float32 vector, or None if embedding failed
+        """
+        try:
+            embedding = (await self.qdrant_service.generate_embeddings([question]))[0]
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        if not embedding:
+            return None
+        return np.asarray(embedding, dtype=np.float32)
+
+    @staticmethod
+    def _semantic_cache_key(user_profile: dict, format: str) -> tuple:
+        """
+        Build the semantic cache key for an answer request.
+
+        Args:
+            user_profile: Interview profile row, with the session's prompt variant
+                already merged into custom_instructions
+            format: Answer format
+
+        Returns:
+            (user_id, profile_id, instructions_hash, format)
+        """
+        instructions = user_profile.get('custom_instructions') or ""
+        return (
+            user_profile.get('user_id'),
+            user_profile.get('id'),
+            hashlib.sha256(instructions.encode('utf-8')).hexdigest(),
+            format
+        )
+
+    def invalidate_user_answers(self, user_id: str):
+        """
+        Drop a user's cached answers. Call after their Q&A pairs, contexts or
+        profiles change.
+
+        Args:
+            user_id: User ID
+        """
+        for key in [key for key in self._semantic_cache if key[0] == user_id]:
+            self._semantic_cache.pop(key, None)
+
+    def _get_semantic_cached_answer(self, query: np.ndarray, question: str, key: tuple) -> Optional[str]:
+        """
+        Look up a cached answer for a semantically similar question.
+
+        Args:
+            query: Question embedding (from _embed_question)
+            question: The interview question (for logging)
+            key: Cache key from _semantic_cache_key (never shared across users)
+
+        Returns:
+            Cached answer, or None on a miss
+        """
+        now = time.monotonic()
+        entries = [
+            entry for entry in self._semantic_cache.get(key, [])
+            if now - entry[2] < self._semantic_cache_ttl
+        ]
+        self._semantic_cache[key] = entries
+        if not entries:
+            return None
+
+        # OpenAI embeddings are unit length, so cosine similarity is a dot product
+        scores = np.stack([entry[0] for entry in entries]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] >= self._semantic_cache_threshold:
+            logger.info(f"Semantic cache hit ({scores[best]:.1%}) for user {key[0]}: '{question[:60]}'")
+            return entries[best][1]
+        return None
+
+    def _cache_semantic_answer(self, embedding: np.ndarray, answer: str, key: tuple):
+        """
+        Remember a generated answer under its question embedding.
+
+        Args:
+            embedding: Question embedding (from _embed_question)
+            answer: Complete generated answer
+            key: Cache key from _semantic_cache_key
+        """
+        entries = self._semantic_cache.setdefault(key, [])
+        if len(entries) >= self._max_semantic_cache_size:
+            entries.pop(0)  # Oldest first
+        entries.append((embedding, answer, time.monotonic()))
+
     async def generate_answer_stream(
         self,
         question: str,
@@ -57,7 +179,8 @@ class LLMService:
         user_profile: Optional[dict] = None,
         session_history: list = None,
         examples_used: list = None,
-        pre_fetched_qa_pairs: list = None
+        pre_fetched_qa_pairs: list = None,
+        no_cache: bool = False
     ) -> AsyncIterator[str]:
         """
         Generate streaming answer with automatic failover.
@@ -72,16 +195,40 @@ class LLMService:
             user_profile: User's interview profile settings
             session_history: Previous Q&A in this session for context
             examples_used: Examples already used in session to avoid repetition
+            no_cache: Skip the semantic answer cache and always generate a fresh answer
 
         Yields:
             str: Text chunks as they're generated
         """
+        user_id = user_profile.get('user_id') if user_profile else None
+        cache_key = self._semantic_cache_key(user_profile, format) if user_id else None
+        cache_embedding = None
+        embedding_task = None
+        if not no_cache and user_id and self.qdrant_service:
+            # Embed concurrently with generation: the first token only waits for
+            # the lookup up to _semantic_cache_lookup_timeout; a late embedding
+            # is still used to cache the answer once it's complete
+            embedding_task = asyncio.create_task(self._embed_question(question))
+            try:
+                async with asyncio.timeout(self._semantic_cache_lookup_timeout):
+                    cache_embedding = await asyncio.shield(embedding_task)
+            except asyncio.TimeoutError:
+                logger.info(f"Semantic cache lookup skipped: embedding took over {self._semantic_cache_lookup_timeout}s")
+            else:
+                if cache_embedding is not None:
+                    cached_answer = self._get_semantic_cached_answer(cache_embedding, question, cache_key)
+                    if cached_answer is not None:
+                        yield cached_answer
+                        return
+
         try:
             # Try primary service
             if hasattr(self.primary_service, 'generate_answer_stream'):
-                logger.warning(f"RAG_DEBUG: Using primary service: {self.primary_service.__class__.__name__}")
-                logger.warning(f"RAG_DEBUG: Passing {len(qa_pairs or [])} Q&A pairs to service")
-                logger.warning(f"RAG_DEBUG: user_profile exists: {user_profile is not None}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"RAG_DEBUG: Using primary service: {self.primary_service.__class__.__name__}, "
+                        f"passing {len(qa_pairs or [])} Q&A pairs, user_profile exists: {user_profile is not None}"
+                    )
 
                 # Build kwargs dynamically to support services with different signatures
                 kwargs = {
@@ -95,17 +242,26 @@ class LLMService:
                 }
 
                 # Add session parameters only if the service supports them (Claude does, GLM doesn't)
-                import inspect
-                sig = inspect.signature(self.primary_service.generate_answer_stream)
-                if "session_history" in sig.parameters:
+                if "session_history" in self._primary_stream_params:
                     kwargs["session_history"] = session_history
-                if "examples_used" in sig.parameters:
+                if "examples_used" in self._primary_stream_params:
                     kwargs["examples_used"] = examples_used
-                if "pre_fetched_qa_pairs" in sig.parameters:
+                if "pre_fetched_qa_pairs" in self._primary_stream_params:
                     kwargs["pre_fetched_qa_pairs"] = pre_fetched_qa_pairs
 
+                chunks = []
                 async for chunk in self.primary_service.generate_answer_stream(**kwargs):
+                    chunks.append(chunk)
                     yield chunk
+
+                # Services report their own errors as a final ANSWER_ERROR_MESSAGE
+                # chunk - never cache those
+                failed = bool(chunks) and chunks[-1] == ANSWER_ERROR_MESSAGE
+                answer = "".join(chunks)
+                if cache_embedding is None and embedding_task is not None and embedding_task.done():
+                    cache_embedding = embedding_task.result()
+                if cache_embedding is not None and answer and not failed:
+                    self._cache_semantic_answer(cache_embedding, answer, cache_key)
             else:
                 # Primary service doesn't support streaming, use non-streaming method
                 logger.info(f"Primary service doesn't support streaming, using non-streaming")
@@ -129,10 +285,13 @@ class LLMService:
 
                 except Exception as fallback_error:
                     logger.error(f"Fallback service also failed: {str(fallback_error)}")
-                    yield "\n\n⚠️ Error generating answer. Please try again."
+                    yield ANSWER_ERROR_MESSAGE
             else:
                 # No fallback available
-                yield "\n\n⚠️ Error generating answer. Please try again."
+                yield ANSWER_ERROR_MESSAGE
+        finally:
+            if embedding_task is not None and not embedding_task.done():
+                embedding_task.cancel()
 
     async def generate_answer(
         self,
@@ -13,15 +13,21 @@ Incremental generation: 10 more Q&A pairs when new context added
 
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+import json
+import re
+import string
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID, uuid4
-from openai import AsyncOpenAI
-from anthropic import Anthropic
 from pydantic import BaseModel, Field
-from difflib import SequenceMatcher
+import tiktoken
 
 from app.core.config import settings
+from app.core.openai_client import get_openai_client
 from app.core.supabase import get_supabase_client
+from app.services.question_dedup import QuestionDedupIndex
 
 logger = logging.getLogger(__name__)
 
@@ -37,10 +43,383 @@ class QAPairBatch(BaseModel):
     qa_pairs: List[QAPairGenerated] = Field(description="List of generated Q&A pairs")
 
 
+QA_GENERATION_MODEL = "gpt-4o-mini"
+
+# OpenAI Batch API polling (initial generation with use_batch_api=True)
+BATCH_POLL_INITIAL_DELAY = 5.0   # seconds
+BATCH_POLL_MAX_DELAY = 300.0     # seconds
+BATCH_TERMINAL_FAILURES = {'failed', 'expired', 'cancelled'}
+
+# Rough output budget per generated Q&A, for TPM accounting before the call
+ESTIMATED_TOKENS_PER_QA = 300
+
+
+class _TokenBucket:
+    """Async token bucket holding up to `rate` tokens, refilled over `period` seconds."""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.capacity = float(rate)
+        self._tokens = float(rate)
+        self._refill_per_second = rate / period
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available and take them."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._refill_per_second)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self._refill_per_second)
+
+
+# Shared across all generation calls in this process
+_rpm_limiter = _TokenBucket(settings.OPENAI_RPM)
+_tpm_limiter = _TokenBucket(settings.OPENAI_TPM)
+
+# Shared first message of every generation call. Keeping the resume (the
+# largest input) in an identical leading block lets OpenAI's automatic prompt
+# caching reuse it across the four category calls.
+CANDIDATE_CONTEXT_HEADER = """You are an expert interview coach creating realistic, high-quality interview Q&A pairs tailored to the candidate's specific experience.
+
+CANDIDATE RESUME:
+"""
+ADDITIONAL_CONTEXT_HEADER = "\n\nADDITIONAL CONTEXT:\n"
+
+DEDUP_INSTRUCTION_HEADER = "\n\nIMPORTANT: AVOID generating questions similar to these existing ones:\n"
+
+RESUME_PROMPT_TMPL = """You are an expert interview coach. Generate {count} high-quality interview Q&A pairs based on this candidate's resume.
+
+INSTRUCTIONS:
+1. Generate {count} Q&A pairs that interviewers would likely ask based on this resume
+2. Mix of behavioral (60%) and technical (40%) questions
+3. Questions should target specific projects, achievements, and skills mentioned
+4. Answers should:
+   - Use STAR method (Situation, Task, Action, Result) for behavioral questions
+   - Provide technical depth and show expertise for technical questions
+   - Reference specific numbers, metrics, and achievements from the resume
+   - Sound natural and conversational (not robotic)
+   - Be 60-90 seconds when spoken aloud
+5. Make questions diverse - cover different experiences, projects, and skills{dedup_instruction}
+
+BEHAVIORAL QUESTIONS (60%) should ask about:
+- Specific projects mentioned (e.g., "Tell me about the [project name] project and your role")
+- Challenges faced ("Describe a time you had to optimize costs in a production system")
+- Team collaboration, leadership, conflict resolution
+- Problem-solving and decision-making
+- Impact and results ("Walk me through how you achieved [specific metric]")
+
+TECHNICAL QUESTIONS (40%) should ask about:
+- Architecture decisions ("How did you design the [system name] architecture?")
+- Technical tradeoffs ("Why did you choose [technology A] over [technology B]?")
+- Implementation details ("Explain your approach to [technical challenge]")
+- System design and scalability
+- Performance optimization
+
+ANSWER GUIDELINES:
+- Behavioral: Use STAR method, reference specific metrics (e.g., "reduced costs by 92.6%")
+- Technical: Show depth, explain reasoning, discuss tradeoffs
+- Keep answers concise but comprehensive (60-90 seconds)
+- Sound like a real person, not a textbook
+
+Generate exactly {count} Q&A pairs."""
+
+COMPANY_PROMPT_TMPL = """Generate {count} situational interview Q&A pairs that align with this company's culture and mission.
+
+COMPANY INFORMATION:
+{company_text}
+
+INSTRUCTIONS:
+1. Generate {count} situational questions that test alignment with company values/culture
+2. Questions should be "What would you do if..." or "How would you handle..." scenarios
+3. Questions must be relevant to this specific company's mission, values, and challenges
+4. Answers should:
+   - Demonstrate understanding of company mission and values
+   - Reference candidate's relevant experience from resume
+   - Show how past experience prepares them for company-specific challenges
+   - Sound authentic and thoughtful (not generic)
+   - Be 60-90 seconds when spoken{dedup_instruction}
+
+FOCUS AREAS:
+- Company values and culture fit
+- Decision-making aligned with company principles
+- Handling conflicts between competing priorities
+- Stakeholder management in company context
+- Company-specific challenges or initiatives
+
+EXAMPLES OF GOOD QUESTIONS:
+- "How would you prioritize feature development if [company value] conflicts with user demand?"
+- "Describe how you'd approach [company-specific challenge] based on your experience"
+- "What would you do if you discovered a technical decision violates [company principle]?"
+- "How would you handle a situation where [company mission] and [business goal] are in tension?"
+
+Generate exactly {count} company-aligned Q&A pairs."""
+
+JOB_POSTING_PROMPT_TMPL = """Generate {count} interview Q&A pairs focused on this job posting's requirements.
+
+JOB POSTING:
+{job_text}
+
+INSTRUCTIONS:
+1. Generate {count} questions that probe specific job requirements
+2. Identify potential gaps between resume and job requirements
+3. Create questions that let candidate bridge gaps with transferable skills
+4. Mix technical requirements (50%) and soft skills/qualifications (50%)
+5. Answers should address gaps honestly while highlighting relevant experience{dedup_instruction}
+
+FOCUS AREAS:
+- Required technical skills/technologies mentioned in JD
+- Years of experience or seniority level expectations
+- Specific tools, frameworks, or methodologies listed
+- Domain knowledge requirements
+- Responsibilities that aren't obvious from resume
+- Required vs nice-to-have qualifications
+
+QUESTION TYPES:
+- Gap-bridging: "This role requires [X]. How would you quickly ramp up?"
+- Transferable skills: "You have experience with [A]. How would you apply that to [B]?"
+- Depth-testing: "The job mentions [requirement]. Can you walk me through your experience with that?"
+- Scenario-based: "In this role, you'd need to [responsibility]. How would you approach that?"
+
+ANSWER STRATEGY:
+- Be honest about experience gaps
+- Highlight transferable skills and quick learning ability
+- Reference specific examples from resume that demonstrate adaptability
+- Show enthusiasm and clear learning plan for new areas
+
+Generate exactly {count} job-requirement Q&A pairs."""
+
+GENERAL_PROMPT_TMPL = """Generate {count} common interview Q&A pairs, personalized to this candidate.
+
+COMPANY (if available):
+{company_summary}
+
+INSTRUCTIONS:
+Generate {count} common interview questions with highly personalized answers.
+
+COMMON QUESTIONS TO CHOOSE FROM:
+1. "Tell me about yourself" - 60-second elevator pitch
+2. "Why are you interested in this role/company?"
+3. "What are your greatest strengths?"
+4. "What's a weakness you're working on?"
+5. "Where do you see yourself in 5 years?"
+6. "Why should we hire you?"
+7. "Tell me about a time you failed and what you learned"
+8. "What's your biggest professional achievement?"
+9. "Do you have any questions for us?"
+
+ANSWER REQUIREMENTS:
+- Reference specific resume achievements and metrics
+- Show genuine interest in company (if info available)
+- Be concise (60-90 seconds when spoken)
+- Sound natural and authentic, not robotic
+- For "Tell me about yourself": Follow past → present → future structure
+- For strengths: Back up with concrete examples
+- For weaknesses: Show self-awareness and growth mindset
+
+Generate exactly {count} general Q&A pairs."""
+
+
+TemplateParts = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _compile_template(template: str) -> TemplateParts:
+    """Split a {field} template once into (literal, field) pairs for _render_template."""
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(template))
+
+
+def _render_template(parts: TemplateParts, values: Dict[str, Any]) -> str:
+    """Fill a compiled template; the literal blocks are reused as-is."""
+    return "".join([
+        piece
+        for literal, field in parts
+        for piece in (literal, str(values[field]) if field is not None else "")
+    ])
+
+
+def _postprocess_resume(qa: QAPairGenerated):
+    if qa.question_type not in ['behavioral', 'technical']:
+        # Default to behavioral if type is unclear
+        qa.question_type = 'behavioral'
+
+
+def _postprocess_company(qa: QAPairGenerated):
+    qa.question_type = 'situational'
+
+
+# Job-posting questions mentioning any of these are classed as technical
+_TECHNICAL_RE = re.compile(r'technical|technology|how does|explain|architecture', re.IGNORECASE)
+
+
+def _postprocess_job_posting(qa: QAPairGenerated):
+    # Mix of technical and situational based on content
+    qa.question_type = 'technical' if _TECHNICAL_RE.search(qa.question) else 'situational'
+
+
+def _postprocess_general(qa: QAPairGenerated):
+    qa.question_type = 'general'
+
+
+# Per-category generation settings:
+#   requires:  context type that must be present (category is skipped otherwise)
+#   required:  generation failure aborts the batch (otherwise degrades to [])
+STRATEGIES: Dict[str, Dict[str, Any]] = {
+    'resume_based': {
+        'system': "Mix behavioral and technical questions grounded in the candidate's actual projects, achievements, and skills.",
+        'template': _compile_template(RESUME_PROMPT_TMPL),
+        'temperature': 0.8,  # Higher diversity for varied questions
+        'requires': None,
+        'required': True,
+        'post_process': _postprocess_resume,
+    },
+    'company_aligned': {
+        'system': "You create situational interview questions that test company culture fit and alignment with mission/values.",
+        'template': _compile_template(COMPANY_PROMPT_TMPL),
+        'temperature': 0.8,
+        'requires': 'company_info',
+        'required': False,
+        'post_process': _postprocess_company,
+    },
+    'job_posting': {
+        'system': "You create questions that probe job requirement fit and help candidates bridge experience gaps with transferable skills.",
+        'template': _compile_template(JOB_POSTING_PROMPT_TMPL),
+        'temperature': 0.7,
+        'requires': 'job_posting',
+        'required': False,
+        'post_process': _postprocess_job_posting,
+    },
+    'general': {
+        'system': "You create personalized answers to common interview questions based on the candidate's specific background.",
+        'template': _compile_template(GENERAL_PROMPT_TMPL),
+        'temperature': 0.6,  # Slightly lower for more consistent common questions
+        'requires': None,
+        'required': True,
+        'post_process': _postprocess_general,
+    },
+}
+
+# Single-call generation (settings.QA_SINGLE_CALL_GENERATION): all categories
+# in one request, each tagged through generation_strategy
+SINGLE_CALL_TEMPERATURE = 0.7
+SINGLE_CALL_PROMPT_TMPL = """Generate {total} interview Q&A pairs for this candidate in one list: {counts}.
+
+Each section below describes one category. Follow its instructions for the pairs in that
+category and set generation_strategy on every pair to the section's generation_strategy value.
+
+{sections}"""
+
+# Short-lived cache of per-user fetches, so a burst of generations (e.g. three
+# uploads in a row) doesn't re-query the same contexts and questions each time.
+# Keyed by (kind, user_id, profile_id) where kind is 'contexts' or 'questions'.
+USER_DATA_CACHE_TTL = 30.0  # seconds
+USER_DATA_CACHE_SIZE = 512
+_user_data_cache: Dict[Tuple[str, str, Optional[str]], Tuple[float, Any]] = {}
+
+
+def _get_cached_user_data(key: Tuple[str, str, Optional[str]]) -> Optional[Any]:
+    entry = _user_data_cache.get(key)
+    if entry is None:
+        return None
+    cached_at, value = entry
+    if time.monotonic() - cached_at > USER_DATA_CACHE_TTL:
+        _user_data_cache.pop(key, None)
+        return None
+    return value
+
+
+def _cache_user_data(key: Tuple[str, str, Optional[str]], value: Any):
+    if key not in _user_data_cache and len(_user_data_cache) >= USER_DATA_CACHE_SIZE:
+        # Evict the oldest insertion
+        _user_data_cache.pop(next(iter(_user_data_cache)), None)
+    _user_data_cache[key] = (time.monotonic(), value)
+
+
+def invalidate_user_cache(user_id: str, kind: Optional[str] = None):
+    """
+    Drop cached fetches for a user. Call after their contexts change.
+
+    Args:
+        user_id: User ID
+        kind: 'contexts' or 'questions' (both if None)
+    """
+    for key in [key for key in _user_data_cache if key[1] == user_id and kind in (None, key[0])]:
+        _user_data_cache.pop(key, None)
+
+
+# Token budgets for each context block in the prompts
+RESUME_TOKEN_BUDGET = 2500
+ADDITIONAL_TOKEN_BUDGET = 1000
+COMPANY_TOKEN_BUDGET = 1500
+JOB_POSTING_TOKEN_BUDGET = 1500
+COMPANY_SUMMARY_TOKEN_BUDGET = 250  # Company blurb in the general-questions prompt
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional["tiktoken.Encoding"]:
+    """
+    Load the model's tokenizer once, or None if it can't be loaded.
+
+    tiktoken downloads the BPE file on first use, which fails in offline or
+    restricted containers; generation then falls back to estimated counts.
+    """
+    try:
+        return tiktoken.encoding_for_model(QA_GENERATION_MODEL)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, truncating prompt contexts by estimated token count: {e}")
+        return None
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most max_tokens model tokens.
+
+    Falls back to ~4 characters per token if the tokenizer can't be loaded.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+# Rows per qa_pairs insert request (keeps PostgREST payloads small)
+QA_INSERT_CHUNK_SIZE = 100
+
+
+def _strict_json_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark every object in a Pydantic JSON schema as closed (required for strict mode)."""
+    if schema.get('type') == 'object':
+        schema['additionalProperties'] = False
+    for value in schema.values():
+        if isinstance(value, dict):
+            _strict_json_schema(value)
+    return schema
+
+
+# Same structured output as beta.chat.completions.parse(response_format=QAPairBatch),
+# spelled out because Batch API request bodies are raw JSON
+QA_BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "QAPairBatch",
+        "schema": _strict_json_schema(QAPairBatch.model_json_schema()),
+        "strict": True
+    }
+}
+
+
 class QAGenerationService:
     def __init__(self):
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.claude_client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.openai_client = get_openai_client().with_options(
+            max_retries=settings.OPENAI_MAX_RETRIES
+        )
         self.supabase = get_supabase_client()
 
         # Category distribution for 30 initial Q&As
@@ -63,7 +442,8 @@ class QAGenerationService:
         self,
         user_id: str,
         profile_id: Optional[str] = None,
-        batch_id: Optional[UUID] = None
+        batch_id: Optional[UUID] = None,
+        use_batch_api: bool = False
     ) -> Dict[str, Any]:
         """
         Generate initial 30 Q&A pairs from all available user contexts.
@@ -80,6 +460,10 @@ class QAGenerationService:
             user_id: User ID
             profile_id: Profile ID (for multi-profile support)
             batch_id: Optional batch ID (generated if not provided)
+            use_batch_api: Submit the four prompts as one OpenAI Batch API job
+                (half price, no per-request rate limits) instead of four
+                real-time calls. Completion can take minutes to hours, so only
+                use this from a background task.
 
         Returns:
             Dict with batch_id, generated_count, category_breakdown, qa_pairs
@@ -105,74 +489,85 @@ class QAGenerationService:
         )
 
         # Step 3: Generate Q&As by category (CONCURRENT for speed)
-        all_qa_pairs = []
+        saved_pairs = []
 
         try:
-            logger.info("Starting concurrent Q&A generation across all categories...")
+            if use_batch_api or settings.QA_SINGLE_CALL_GENERATION:
+                if use_batch_api:
+                    all_qa_pairs = await self._generate_initial_via_batch_api(contexts)
+                else:
+                    all_qa_pairs = await self._generate_all_categories(contexts, self.initial_distribution)
 
-            # Prepare all generation tasks
-            tasks = []
+                # Steps 4-5: Save and complete the batch record in one transaction
+                logger.info(f"Saving {len(all_qa_pairs)} Q&A pairs to database...")
+                saved_pairs = await self._finalize_batch(user_id, batch_id, all_qa_pairs, profile_id=profile_id)
+            else:
+                logger.info("Starting concurrent Q&A generation across all categories...")
 
-            # Always generate resume-based Q&As (required)
-            tasks.append(self._generate_resume_based_qas(
-                contexts,
-                count=self.initial_distribution['resume_based']
-            ))
+                # Each category is saved as soon as it's generated, so a late
+                # failure doesn't lose the categories that already finished
+                tasks = []
 
-            # Conditionally add company-aligned Q&As
-            if contexts['company_info']:
-                tasks.append(self._generate_company_aligned_qas(
+                # Always generate resume-based Q&As (required)
+                tasks.append(self._generate_and_save(
+                    user_id,
+                    batch_id,
+                    'resume_based',
                     contexts,
-                    count=self.initial_distribution['company_aligned']
+                    count=self.initial_distribution['resume_based'],
+                    profile_id=profile_id
                 ))
-            else:
-                logger.warning("No company info available, skipping company-aligned Q&As")
 
-            # Conditionally add job-posting Q&As
-            if contexts['job_posting']:
-                tasks.append(self._generate_job_posting_qas(
+                # Conditionally add company-aligned Q&As
+                if contexts['company_info']:
+                    tasks.append(self._generate_and_save(
+                        user_id,
+                        batch_id,
+                        'company_aligned',
+                        contexts,
+                        count=self.initial_distribution['company_aligned'],
+                        profile_id=profile_id
+                    ))
+                else:
+                    logger.warning("No company info available, skipping company-aligned Q&As")
+
+                # Conditionally add job-posting Q&As
+                if contexts['job_posting']:
+                    tasks.append(self._generate_and_save(
+                        user_id,
+                        batch_id,
+                        'job_posting',
+                        contexts,
+                        count=self.initial_distribution['job_posting'],
+                        profile_id=profile_id
+                    ))
+                else:
+                    logger.warning("No job posting available, skipping job-posting Q&As")
+
+                # Always generate general Q&As
+                tasks.append(self._generate_and_save(
+                    user_id,
+                    batch_id,
+                    'general',
                     contexts,
-                    count=self.initial_distribution['job_posting']
+                    count=self.initial_distribution['general'],
+                    profile_id=profile_id
                 ))
-            else:
-                logger.warning("No job posting available, skipping job-posting Q&As")
-
-            # Always generate general Q&As
-            tasks.append(self._generate_general_qas(
-                contexts,
-                count=self.initial_distribution['general']
-            ))
-
-            # Execute all tasks concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
 
-            # Process results
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Task {i} failed: {result}", exc_info=result)
-                    raise result
-                all_qa_pairs.extend(result)
+                await self._gather_saved(tasks, saved_pairs)
+                logger.info(f"✅ Generated and saved {len(saved_pairs)} Q&A pairs concurrently")
 
-            logger.info(f"✅ Generated {len(all_qa_pairs)} Q&A pairs concurrently")
+            counts = Counter(row['generation_strategy'] for row in saved_pairs)
+            category_breakdown = {strategy: counts[strategy] for strategy in STRATEGIES}
 
-            # Step 4: Save to database
-            logger.info(f"Saving {len(all_qa_pairs)} Q&A pairs to database...")
-            saved_pairs = await self._save_qa_pairs(user_id, batch_id, all_qa_pairs, profile_id=profile_id)
-
-            # Step 5: Update batch record
-            category_breakdown = {
-                'resume_based': len([q for q in all_qa_pairs if q.generation_strategy == 'resume_based']),
-                'company_aligned': len([q for q in all_qa_pairs if q.generation_strategy == 'company_aligned']),
-                'job_posting': len([q for q in all_qa_pairs if q.generation_strategy == 'job_posting']),
-                'general': len([q for q in all_qa_pairs if q.generation_strategy == 'general']),
-            }
-
-            await self._update_batch_record(
-                batch_id,
-                'completed',
-                len(saved_pairs),
-                category_breakdown=category_breakdown
-            )
+            if not (use_batch_api or settings.QA_SINGLE_CALL_GENERATION):
+                # Step 5: Update batch record (categories were saved as they finished)
+                await self._update_batch_record(
+                    batch_id,
+                    'completed',
+                    len(saved_pairs),
+                    category_breakdown=category_breakdown
+                )
 
             logger.info(f"✅ Successfully generated {len(saved_pairs)} Q&A pairs for user {user_id}")
 
@@ -184,7 +579,8 @@ class QAGenerationService:
             }
 
         except Exception as e:
-            await self._update_batch_record(batch_id, 'failed', 0, error=str(e))
+            # Categories that finished before the failure stay saved
+            await self._update_batch_record(batch_id, 'failed', len(saved_pairs), error=str(e))
             logger.error(f"Q&A generation failed: {e}", exc_info=True)
             raise
 
@@ -217,6 +613,9 @@ class QAGenerationService:
         # Fetch all contexts + existing Q&As for deduplication (filtered by profile)
         contexts = await self._fetch_user_contexts(user_id, profile_id)
         existing_qas = await self._fetch_existing_questions(user_id, profile_id)
+        dedup_index = QuestionDedupIndex(existing_qas)
+        # A few spread-out examples steer the prompt; the index filters the rest
+        avoid_duplicates = dedup_index.exemplars(3)
 
         # Create batch record
         await self._create_batch_record(
@@ -228,52 +627,64 @@ class QAGenerationService:
             profile_id
         )
 
-        try:
-            all_qa_pairs = []
+        saved_pairs = []
 
-            # Generate with deduplication
-            logger.info("Generating 5 incremental resume-based Q&As...")
-            resume_qas = await self._generate_resume_based_qas(
+        try:
+            # Generate with deduplication (CONCURRENT for speed, same as initial batch);
+            # each category is filtered against dedup_index and saved as it finishes
+            logger.info("Starting concurrent incremental Q&A generation across all categories...")
+            tasks = [self._generate_and_save(
+                user_id,
+                batch_id,
+                'resume_based',
                 contexts,
                 count=5,
-                avoid_duplicates=existing_qas
-            )
-            all_qa_pairs.extend(resume_qas)
+                source='incremental_ai',
+                profile_id=profile_id,
+                avoid_duplicates=avoid_duplicates,
+                dedup_index=dedup_index
+            )]
 
             if contexts['company_info']:
-                logger.info("Generating 2 incremental company-aligned Q&As...")
-                company_qas = await self._generate_company_aligned_qas(
+                tasks.append(self._generate_and_save(
+                    user_id,
+                    batch_id,
+                    'company_aligned',
                     contexts,
                     count=2,
-                    avoid_duplicates=existing_qas
-                )
-                all_qa_pairs.extend(company_qas)
+                    source='incremental_ai',
+                    profile_id=profile_id,
+                    avoid_duplicates=avoid_duplicates,
+                    dedup_index=dedup_index
+                ))
 
             if contexts['job_posting']:
-                logger.info("Generating 2 incremental job-posting Q&As...")
-                job_qas = await self._generate_job_posting_qas(
+                tasks.append(self._generate_and_save(
+                    user_id,
+                    batch_id,
+                    'job_posting',
                     contexts,
                     count=2,
-                    avoid_duplicates=existing_qas
-                )
-                all_qa_pairs.extend(job_qas)
-
-            logger.info("Generating 1 incremental general Q&A...")
-            general_qas = await self._generate_general_qas(
-                contexts,
-                count=1,
-                avoid_duplicates=existing_qas
-            )
-            all_qa_pairs.extend(general_qas)
+                    source='incremental_ai',
+                    profile_id=profile_id,
+                    avoid_duplicates=avoid_duplicates,
+                    dedup_index=dedup_index
+                ))
 
-            # Save and update
-            saved_pairs = await self._save_qa_pairs(
+            tasks.append(self._generate_and_save(
                 user_id,
                 batch_id,
-                all_qa_pairs,
+                'general',
+                contexts,
+                count=1,
                 source='incremental_ai',
-                profile_id=profile_id
-            )
+                profile_id=profile_id,
+                avoid_duplicates=avoid_duplicates,
+                dedup_index=dedup_index
+            ))
+
+            # Resume/general failures abort the batch; company/job already degrade to []
+            await self._gather_saved(tasks, saved_pairs)
             await self._update_batch_record(batch_id, 'completed', len(saved_pairs))
 
             logger.info(f"✅ Generated {len(saved_pairs)} incremental Q&A pairs")
@@ -285,205 +696,148 @@ class QAGenerationService:
             }
 
         except Exception as e:
-            await self._update_batch_record(batch_id, 'failed', 0, error=str(e))
+            await self._update_batch_record(batch_id, 'failed', len(saved_pairs), error=str(e))
             raise
 
-    async def _generate_resume_based_qas(
+    async def _generate_and_save(
         self,
+        user_id: str,
+        batch_id: UUID,
+        strategy: str,
         contexts: Dict[str, Any],
         count: int,
-        avoid_duplicates: Optional[List[str]] = None
-    ) -> List[QAPairGenerated]:
+        source: str = 'ai_generated',
+        profile_id: Optional[str] = None,
+        avoid_duplicates: Optional[List[str]] = None,
+        dedup_index: Optional[QuestionDedupIndex] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Generate behavioral/technical Q&As from resume.
-
-        Mix: 60% behavioral (STAR method), 40% technical
+        Generate one category and insert it right away.
 
         Args:
+            user_id: User ID
+            batch_id: Generation batch ID
+            strategy: resume_based, company_aligned, job_posting, or general
             contexts: All user contexts
             count: Number of Q&As to generate
+            source: qa_pairs.source value
+            profile_id: Profile ID (for multi-profile support)
             avoid_duplicates: List of existing questions to avoid
+            dedup_index: Drop near-duplicates of indexed questions (and of each other)
 
         Returns:
-            List of QAPairGenerated objects
+            Saved qa_pairs rows
         """
-        resume_text = contexts['resume']
-        additional_context = "\n\n".join(contexts.get('additional', []))
-
-        dedup_instruction = ""
-        if avoid_duplicates:
-            dedup_instruction = f"\n\nIMPORTANT: AVOID generating questions similar to these existing ones:\n{', '.join(avoid_duplicates[:10])}"
-
-        additional_context_section = f"ADDITIONAL CONTEXT:\n{additional_context}\n\n" if additional_context else ""
-
-        prompt = f"""You are an expert interview coach. Generate {count} high-quality interview Q&A pairs based on this candidate's resume.
-
-RESUME:
-{resume_text}
-
-{additional_context_section}INSTRUCTIONS:
-1. Generate {count} Q&A pairs that interviewers would likely ask based on this resume
-2. Mix of behavioral (60%) and technical (40%) questions
-3. Questions should target specific projects, achievements, and skills mentioned
-4. Answers should:
-   - Use STAR method (Situation, Task, Action, Result) for behavioral questions
-   - Provide technical depth and show expertise for technical questions
-   - Reference specific numbers, metrics, and achievements from the resume
-   - Sound natural and conversational (not robotic)
-   - Be 60-90 seconds when spoken aloud
-5. Make questions diverse - cover different experiences, projects, and skills{dedup_instruction}
-
-BEHAVIORAL QUESTIONS (60%) should ask about:
-- Specific projects mentioned (e.g., "Tell me about the [project name] project and your role")
-- Challenges faced ("Describe a time you had to optimize costs in a production system")
-- Team collaboration, leadership, conflict resolution
-- Problem-solving and decision-making
-- Impact and results ("Walk me through how you achieved [specific metric]")
-
-TECHNICAL QUESTIONS (40%) should ask about:
-- Architecture decisions ("How did you design the [system name] architecture?")
-- Technical tradeoffs ("Why did you choose [technology A] over [technology B]?")
-- Implementation details ("Explain your approach to [technical challenge]")
-- System design and scalability
-- Performance optimization
-
-ANSWER GUIDELINES:
-- Behavioral: Use STAR method, reference specific metrics (e.g., "reduced costs by 92.6%")
-- Technical: Show depth, explain reasoning, discuss tradeoffs
-- Keep answers concise but comprehensive (60-90 seconds)
-- Sound like a real person, not a textbook
-
-Generate exactly {count} Q&A pairs."""
-
-        try:
-            completion = await self.openai_client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert interview coach creating realistic, high-quality interview Q&A pairs tailored to the candidate's specific experience."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format=QAPairBatch,
-                temperature=0.8  # Higher diversity for varied questions
-            )
-
-            parsed = completion.choices[0].message.parsed
-
-            if not parsed or not parsed.qa_pairs:
-                logger.error("OpenAI returned no Q&A pairs")
-                return []
+        qa_pairs = await self._generate_category(strategy, contexts, count, avoid_duplicates)
+
+        if dedup_index is not None:
+            unique_qa_pairs = []
+            for qa in qa_pairs:
+                if dedup_index.is_duplicate(qa.question):
+                    logger.info(f"Skipping near-duplicate question: {qa.question}")
+                    continue
+                dedup_index.add(qa.question)
+                unique_qa_pairs.append(qa)
+            qa_pairs = unique_qa_pairs
+
+        saved = await self._save_qa_pairs(user_id, batch_id, qa_pairs, source=source, profile_id=profile_id)
+        logger.info(f"Saved {len(saved)} {strategy} Q&As for batch {batch_id}")
+        return saved
+
+    async def _gather_saved(self, tasks: List[Any], saved_pairs: List[Dict[str, Any]]):
+        """
+        Run _generate_and_save tasks concurrently, collecting rows into saved_pairs.
 
-            # Set strategy and validate question types
-            for qa in parsed.qa_pairs:
-                qa.generation_strategy = 'resume_based'
-                if qa.question_type not in ['behavioral', 'technical']:
-                    # Default to behavioral if type is unclear
-                    qa.question_type = 'behavioral'
+        Every task runs to completion and its rows are collected before the
+        first failure (if any) is raised, so callers can still report what
+        was saved.
+        """
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
-            logger.info(f"Generated {len(parsed.qa_pairs)} resume-based Q&As")
-            return parsed.qa_pairs[:count]  # Ensure exact count
+        failure = None
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Task {i} failed: {result}", exc_info=result)
+                failure = failure or result
+                continue
+            saved_pairs.extend(result)
 
-        except Exception as e:
-            logger.error(f"Resume-based Q&A generation failed: {e}", exc_info=True)
-            raise
+        if failure is not None:
+            raise failure
 
-    async def _generate_company_aligned_qas(
+    def _category_request(
         self,
+        strategy: str,
         contexts: Dict[str, Any],
         count: int,
         avoid_duplicates: Optional[List[str]] = None
-    ) -> List[QAPairGenerated]:
+    ) -> Optional[Dict[str, Any]]:
         """
-        Generate situational Q&As matching company culture/mission.
+        Build the chat completion request for one generation category.
+
+        Every request starts with the same candidate-context system message
+        (CANDIDATE_CONTEXT_HEADER + resume), followed by the category's own instructions.
 
         Args:
+            strategy: resume_based, company_aligned, job_posting, or general
             contexts: All user contexts
             count: Number of Q&As to generate
             avoid_duplicates: List of existing questions to avoid
 
         Returns:
-            List of QAPairGenerated objects
+            Chat completion arguments (messages, temperature), or None if the
+            context this category needs is missing
         """
-        company_text = "\n\n".join(contexts.get('company_info', []))
-        resume_text = contexts['resume']
+        config = STRATEGIES[strategy]
+        if config['requires'] and not contexts.get(config['requires']):
+            logger.warning(f"No {config['requires']} available for {strategy} Q&As")
+            return None
 
-        if not company_text:
-            logger.warning("No company info available for company-aligned Q&As")
-            return []
+        prompt_texts = contexts['prompt_texts']
+        additional_context = prompt_texts['additional']
 
         dedup_instruction = ""
         if avoid_duplicates:
-            dedup_instruction = f"\n\nAVOID duplicating: {', '.join(avoid_duplicates[:10])}"
-
-        prompt = f"""Generate {count} situational interview Q&A pairs that align with this company's culture and mission.
-
-COMPANY INFORMATION:
-{company_text}
-
-CANDIDATE RESUME (for context):
-{resume_text[:2000]}...
-
-INSTRUCTIONS:
-1. Generate {count} situational questions that test alignment with company values/culture
-2. Questions should be "What would you do if..." or "How would you handle..." scenarios
-3. Questions must be relevant to this specific company's mission, values, and challenges
-4. Answers should:
-   - Demonstrate understanding of company mission and values
-   - Reference candidate's relevant experience from resume
-   - Show how past experience prepares them for company-specific challenges
-   - Sound authentic and thoughtful (not generic)
-   - Be 60-90 seconds when spoken{dedup_instruction}
-
-FOCUS AREAS:
-- Company values and culture fit
-- Decision-making aligned with company principles
-- Handling conflicts between competing priorities
-- Stakeholder management in company context
-- Company-specific challenges or initiatives
-
-EXAMPLES OF GOOD QUESTIONS:
-- "How would you prioritize feature development if [company value] conflicts with user demand?"
-- "Describe how you'd approach [company-specific challenge] based on your experience"
-- "What would you do if you discovered a technical decision violates [company principle]?"
-- "How would you handle a situation where [company mission] and [business goal] are in tension?"
-
-Generate exactly {count} company-aligned Q&A pairs."""
-
-        try:
-            completion = await self.openai_client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You create situational interview questions that test company culture fit and alignment with mission/values."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format=QAPairBatch,
-                temperature=0.8
-            )
-
-            parsed = completion.choices[0].message.parsed
-
-            if not parsed or not parsed.qa_pairs:
-                return []
-
-            for qa in parsed.qa_pairs:
-                qa.generation_strategy = 'company_aligned'
-                qa.question_type = 'situational'
-
-            return parsed.qa_pairs[:count]
-
-        except Exception as e:
-            logger.error(f"Company-aligned Q&A generation failed: {e}", exc_info=True)
-            return []  # Graceful degradation
+            dedup_instruction = DEDUP_INSTRUCTION_HEADER + ', '.join(avoid_duplicates[:10])
+
+        candidate_context = "".join([
+            CANDIDATE_CONTEXT_HEADER,
+            prompt_texts['resume'],
+            ADDITIONAL_CONTEXT_HEADER if additional_context else "",
+            additional_context
+        ])
+        prompt = _render_template(config['template'], {
+            'count': count,
+            'dedup_instruction': dedup_instruction,
+            'company_text': prompt_texts['company_text'],
+            'company_summary': prompt_texts['company_summary'],
+            'job_text': prompt_texts['job_text']
+        })
+
+        return {
+            "messages": [
+                {"role": "system", "content": candidate_context},
+                {"role": "system", "content": config['system']},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": config['temperature']
+        }
 
-    async def _generate_job_posting_qas(
+    async def _generate_category(
         self,
+        strategy: str,
         contexts: Dict[str, Any],
         count: int,
         avoid_duplicates: Optional[List[str]] = None
     ) -> List[QAPairGenerated]:
         """
-        Generate Q&As focused on job requirements and gap analysis.
+        Generate Q&As for one category.
+
+        Failures in required categories (resume-based, general) are raised;
+        optional ones (company-aligned, job posting) degrade to an empty list.
 
         Args:
+            strategy: resume_based, company_aligned, job_posting, or general
             contexts: All user contexts
             count: Number of Q&As to generate
             avoid_duplicates: List of existing questions to avoid
@@ -491,166 +845,279 @@ Generate exactly {count} company-aligned Q&A pairs."""
         Returns:
             List of QAPairGenerated objects
         """
-        job_text = "\n\n".join(contexts.get('job_posting', []))
-        resume_text = contexts['resume']
-
-        if not job_text:
-            logger.warning("No job posting available for job-posting Q&As")
+        request = self._category_request(strategy, contexts, count, avoid_duplicates)
+        if request is None:
             return []
 
-        dedup_instruction = ""
-        if avoid_duplicates:
-            dedup_instruction = f"\n\nAVOID: {', '.join(avoid_duplicates[:10])}"
+        try:
+            parsed = await self._parse_completion(request, count)
+            return self._finish_qas(parsed, strategy, count)
 
-        prompt = f"""Generate {count} interview Q&A pairs focused on this job posting's requirements.
+        except Exception as e:
+            logger.error(f"{strategy} Q&A generation failed: {e}", exc_info=True)
+            if STRATEGIES[strategy]['required']:
+                raise
+            return []  # Graceful degradation
 
-JOB POSTING:
-{job_text}
+    async def _generate_all_categories(
+        self,
+        contexts: Dict[str, Any],
+        distribution: Dict[str, int]
+    ) -> List[QAPairGenerated]:
+        """
+        Generate every category in a single structured-output call.
 
-CANDIDATE RESUME:
-{resume_text[:2000]}...
+        The per-category instructions are combined into one prompt that asks
+        the model to tag each pair with its generation_strategy; the result is
+        partitioned by that tag. Categories that come back short are topped up
+        with a regular per-category call.
 
-INSTRUCTIONS:
-1. Generate {count} questions that probe specific job requirements
-2. Identify potential gaps between resume and job requirements
-3. Create questions that let candidate bridge gaps with transferable skills
-4. Mix technical requirements (50%) and soft skills/qualifications (50%)
-5. Answers should address gaps honestly while highlighting relevant experience{dedup_instruction}
+        Args:
+            contexts: All user contexts
+            distribution: Number of Q&As per strategy
 
-FOCUS AREAS:
-- Required technical skills/technologies mentioned in JD
-- Years of experience or seniority level expectations
-- Specific tools, frameworks, or methodologies listed
-- Domain knowledge requirements
-- Responsibilities that aren't obvious from resume
-- Required vs nice-to-have qualifications
+        Returns:
+            List of QAPairGenerated objects
+        """
+        requests = {}
+        for strategy, count in distribution.items():
+            request = self._category_request(strategy, contexts, count)
+            if request is not None:
+                requests[strategy] = request
+
+        strategies = list(requests)
+        sections = [
+            f"### generation_strategy=\"{strategy}\" ({distribution[strategy]} pairs)\n"
+            f"{STRATEGIES[strategy]['system']}\n\n{request['messages'][-1]['content']}"
+            for strategy, request in requests.items()
+        ]
+        total = sum(distribution[strategy] for strategy in strategies)
+        counts = ", ".join(f"{distribution[strategy]} {strategy}" for strategy in strategies)
+        # Shared candidate-context message, identical to the per-category calls
+        candidate_context = requests[strategies[0]]['messages'][0]
+        prompt = SINGLE_CALL_PROMPT_TMPL.format(total=total, counts=counts, sections="\n\n".join(sections))
+
+        parsed = await self._parse_completion({
+            "messages": [candidate_context, {"role": "user", "content": prompt}],
+            "temperature": SINGLE_CALL_TEMPERATURE
+        }, total)
+
+        by_strategy: Dict[str, List[QAPairGenerated]] = {strategy: [] for strategy in strategies}
+        for qa in (parsed.qa_pairs if parsed else []):
+            bucket = by_strategy.get(qa.generation_strategy)
+            if bucket is None:
+                logger.warning(f"Dropping Q&A with unknown generation_strategy {qa.generation_strategy!r}")
+                continue
+            bucket.append(qa)
 
-QUESTION TYPES:
-- Gap-bridging: "This role requires [X]. How would you quickly ramp up?"
-- Transferable skills: "You have experience with [A]. How would you apply that to [B]?"
-- Depth-testing: "The job mentions [requirement]. Can you walk me through your experience with that?"
-- Scenario-based: "In this role, you'd need to [responsibility]. How would you approach that?"
+        all_qa_pairs = []
+        for strategy in strategies:
+            count = distribution[strategy]
+            qa_pairs = []
+            if by_strategy[strategy]:
+                qa_pairs = self._finish_qas(QAPairBatch(qa_pairs=by_strategy[strategy]), strategy, count)
+            missing = count - len(qa_pairs)
+            if missing > 0:
+                logger.info(f"Single-call generation returned {len(qa_pairs)}/{count} {strategy} Q&As, topping up")
+                qa_pairs += await self._generate_category(
+                    strategy,
+                    contexts,
+                    count=missing,
+                    avoid_duplicates=[qa.question for qa in qa_pairs]
+                )
+            all_qa_pairs.extend(qa_pairs)
 
-ANSWER STRATEGY:
-- Be honest about experience gaps
-- Highlight transferable skills and quick learning ability
-- Reference specific examples from resume that demonstrate adaptability
-- Show enthusiasm and clear learning plan for new areas
+        logger.info(f"✅ Generated {len(all_qa_pairs)} Q&A pairs in a single call")
+        return all_qa_pairs
 
-Generate exactly {count} job-requirement Q&A pairs."""
+    async def _parse_completion(
+        self,
+        request: Dict[str, Any],
+        count: int
+    ) -> Optional[QAPairBatch]:
+        """
+        Run one structured-output generation call under the shared rate limits.
 
-        try:
-            completion = await self.openai_client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You create questions that probe job requirement fit and help candidates bridge experience gaps with transferable skills."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format=QAPairBatch,
-                temperature=0.7
-            )
+        Transient failures (429, 5xx, timeouts, dropped connections) are retried
+        by the OpenAI client itself with exponential backoff and jitter
+        (settings.OPENAI_MAX_RETRIES).
 
-            parsed = completion.choices[0].message.parsed
+        Args:
+            request: Chat completion arguments (messages, temperature)
+            count: Number of Q&As requested
 
-            if not parsed or not parsed.qa_pairs:
-                return []
+        Returns:
+            Parsed structured output (may be None if the model refused)
+        """
+        # ~4 characters per token for the prompt, plus the expected output
+        prompt_chars = sum(len(message['content']) for message in request['messages'])
+        await _rpm_limiter.acquire()
+        await _tpm_limiter.acquire(prompt_chars / 4 + count * ESTIMATED_TOKENS_PER_QA)
+
+        completion = await self.openai_client.beta.chat.completions.parse(
+            model=QA_GENERATION_MODEL,
+            response_format=QAPairBatch,
+            **request
+        )
+        return completion.choices[0].message.parsed
 
-            for qa in parsed.qa_pairs:
-                qa.generation_strategy = 'job_posting'
-                # Mix of technical and situational based on content
-                if any(keyword in qa.question.lower() for keyword in ['technical', 'technology', 'how does', 'explain', 'architecture']):
-                    qa.question_type = 'technical'
-                else:
-                    qa.question_type = 'situational'
+    def _finish_qas(
+        self,
+        parsed: Optional[QAPairBatch],
+        strategy: str,
+        count: int
+    ) -> List[QAPairGenerated]:
+        """
+        Tag parsed Q&As with their strategy and normalize question types.
 
-            return parsed.qa_pairs[:count]
+        Args:
+            parsed: Structured output from OpenAI (may be None/empty)
+            strategy: resume_based, company_aligned, job_posting, or general
+            count: Number of Q&As requested
 
-        except Exception as e:
-            logger.error(f"Job posting Q&A generation failed: {e}", exc_info=True)
+        Returns:
+            At most count QAPairGenerated objects
+        """
+        if not parsed or not parsed.qa_pairs:
+            logger.error(f"OpenAI returned no {strategy} Q&A pairs")
             return []
 
-    async def _generate_general_qas(
-        self,
-        contexts: Dict[str, Any],
-        count: int,
-        avoid_duplicates: Optional[List[str]] = None
-    ) -> List[QAPairGenerated]:
+        post_process = STRATEGIES[strategy]['post_process']
+        for qa in parsed.qa_pairs:
+            qa.generation_strategy = strategy
+            post_process(qa)
+
+        logger.info(f"Generated {len(parsed.qa_pairs)} {strategy} Q&As")
+        return parsed.qa_pairs[:count]  # Ensure exact count
+
+    async def _generate_initial_via_batch_api(self, contexts: Dict[str, Any]) -> List[QAPairGenerated]:
         """
-        Generate common interview questions personalized to candidate.
+        Generate the initial Q&As through a single OpenAI Batch API job.
+
+        Uses the same prompts and post-processing as the real-time path.
+        Resume-based and general Q&As are required, as in the real-time path;
+        a failed company or job-posting request just yields no Q&As.
 
         Args:
             contexts: All user contexts
-            count: Number of Q&As to generate
-            avoid_duplicates: List of existing questions to avoid
 
         Returns:
             List of QAPairGenerated objects
         """
-        resume_text = contexts['resume']
-        company_text = "\n\n".join(contexts.get('company_info', []))
+        requests = {}
+        for strategy in STRATEGIES:
+            request = self._category_request(strategy, contexts, self.initial_distribution[strategy])
+            if request is not None:
+                requests[strategy] = request
 
-        prompt = f"""Generate {count} common interview Q&A pairs, personalized to this candidate.
-
-CANDIDATE RESUME:
-{resume_text[:1500]}...
+        openai_batch_id = await self._submit_batch_job(requests)
+        logger.info(f"Submitted OpenAI batch {openai_batch_id} with {len(requests)} Q&A requests")
+        results = await self._poll_batch(openai_batch_id)
 
-COMPANY (if available):
-{company_text[:1000] if company_text else "Generic company"}
+        all_qa_pairs = []
+        for strategy in requests:
+            if strategy not in results:
+                if STRATEGIES[strategy]['required']:
+                    raise RuntimeError(f"OpenAI batch {openai_batch_id} has no result for {strategy}")
+                continue
+            all_qa_pairs.extend(
+                self._finish_qas(results[strategy], strategy, self.initial_distribution[strategy])
+            )
 
-INSTRUCTIONS:
-Generate {count} common interview questions with highly personalized answers.
+        logger.info(f"✅ Generated {len(all_qa_pairs)} Q&A pairs via OpenAI batch {openai_batch_id}")
+        return all_qa_pairs
 
-COMMON QUESTIONS TO CHOOSE FROM:
-1. "Tell me about yourself" - 60-second elevator pitch
-2. "Why are you interested in this role/company?"
-3. "What are your greatest strengths?"
-4. "What's a weakness you're working on?"
-5. "Where do you see yourself in 5 years?"
-6. "Why should we hire you?"
-7. "Tell me about a time you failed and what you learned"
-8. "What's your biggest professional achievement?"
-9. "Do you have any questions for us?"
+    async def _submit_batch_job(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Upload chat completion requests as JSONL and create an OpenAI batch.
 
-ANSWER REQUIREMENTS:
-- Reference specific resume achievements and metrics
-- Show genuine interest in company (if info available)
-- Be concise (60-90 seconds when spoken)
-- Sound natural and authentic, not robotic
-- For "Tell me about yourself": Follow past → present → future structure
-- For strengths: Back up with concrete examples
-- For weaknesses: Show self-awareness and growth mindset
+        Args:
+            requests: Chat completion arguments keyed by generation strategy
+                (used as the custom_id)
 
-Generate exactly {count} general Q&A pairs."""
+        Returns:
+            OpenAI batch ID
+        """
+        lines = [
+            json.dumps({
+                "custom_id": strategy,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": QA_GENERATION_MODEL,
+                    "response_format": QA_BATCH_RESPONSE_FORMAT,
+                    **request
+                }
+            })
+            for strategy, request in requests.items()
+        ]
+
+        input_file = await self.openai_client.files.create(
+            file=("qa_generation_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = await self.openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
 
-        try:
-            completion = await self.openai_client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You create personalized answers to common interview questions based on the candidate's specific background."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format=QAPairBatch,
-                temperature=0.6  # Slightly lower for more consistent common questions
-            )
+    async def _poll_batch(self, batch_id: str) -> Dict[str, Optional[QAPairBatch]]:
+        """
+        Wait for an OpenAI batch to finish and parse its output.
 
-            parsed = completion.choices[0].message.parsed
+        Polls with exponential backoff (BATCH_POLL_INITIAL_DELAY doubling up to
+        BATCH_POLL_MAX_DELAY). Requests that errored are left out of the result.
 
-            if not parsed or not parsed.qa_pairs:
-                logger.error("OpenAI returned no general Q&A pairs")
-                return []
+        Args:
+            batch_id: OpenAI batch ID
 
-            for qa in parsed.qa_pairs:
-                qa.generation_strategy = 'general'
-                qa.question_type = 'general'
+        Returns:
+            Parsed Q&A batches keyed by custom_id
+        """
+        delay = BATCH_POLL_INITIAL_DELAY
+        while True:
+            batch = await self.openai_client.batches.retrieve(batch_id)
+            if batch.status == 'completed':
+                break
+            if batch.status in BATCH_TERMINAL_FAILURES:
+                raise RuntimeError(f"OpenAI batch {batch_id} ended with status {batch.status}")
+            logger.debug(f"OpenAI batch {batch_id} is {batch.status}, checking again in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX_DELAY)
+
+        if not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch_id} completed without an output file")
+
+        output = await self.openai_client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get('response') or {}
+            if response.get('status_code') != 200:
+                logger.error(f"OpenAI batch request {record.get('custom_id')} failed: {record.get('error') or response.get('status_code')}")
+                continue
+
+            content = response['body']['choices'][0]['message'].get('content')
+            results[record['custom_id']] = QAPairBatch.model_validate_json(content) if content else None
+
+        return results
 
-            return parsed.qa_pairs[:count]
+    async def _fetch_user_contexts(self, user_id: str, profile_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Fetch all user contexts from database, optionally filtered by profile (cached briefly).
 
-        except Exception as e:
-            logger.error(f"General Q&A generation failed: {e}", exc_info=True)
-            raise
+        Also adds 'prompt_texts': the context blocks already truncated to their
+        prompt token budgets, shared by every category request.
+        """
+        cache_key = ('contexts', user_id, profile_id)
+        cached = _get_cached_user_data(cache_key)
+        if cached is not None:
+            return cached
 
-    async def _fetch_user_contexts(self, user_id: str, profile_id: Optional[str] = None) -> Dict[str, Any]:
-        """Fetch all user contexts from database, optionally filtered by profile."""
         query = self.supabase.table("user_contexts") \
             .select("*") \
             .eq("user_id", user_id)
@@ -658,7 +1125,7 @@ Generate exactly {count} general Q&A pairs."""
         if profile_id:
             query = query.eq("profile_id", profile_id)
 
-        result = query.execute()
+        result = await asyncio.to_thread(query.execute)
 
         contexts = {
             'resume': None,
@@ -671,17 +1138,31 @@ Generate exactly {count} general Q&A pairs."""
             context_type = row['context_type']
             if context_type == 'resume':
                 contexts['resume'] = row['extracted_text']
-            elif context_type == 'company_info':
-                contexts['company_info'].append(row['extracted_text'])
-            elif context_type == 'job_posting':
-                contexts['job_posting'].append(row['extracted_text'])
-            elif context_type == 'additional':
-                contexts['additional'].append(row['extracted_text'])
+            else:
+                texts = contexts.get(context_type)
+                if texts is not None:
+                    texts.append(row['extracted_text'])
+
+        # Truncate to the prompt budgets once here, not in every category request
+        company_text = "\n\n".join(contexts['company_info'])
+        contexts['prompt_texts'] = {
+            'resume': _truncate(contexts['resume'] or "", RESUME_TOKEN_BUDGET),
+            'additional': _truncate("\n\n".join(contexts['additional']), ADDITIONAL_TOKEN_BUDGET),
+            'company_text': _truncate(company_text, COMPANY_TOKEN_BUDGET),
+            'company_summary': _truncate(company_text, COMPANY_SUMMARY_TOKEN_BUDGET) if company_text else "Generic company",
+            'job_text': _truncate("\n\n".join(contexts['job_posting']), JOB_POSTING_TOKEN_BUDGET)
+        }
 
+        _cache_user_data(cache_key, contexts)
         return contexts
 
     async def _fetch_existing_questions(self, user_id: str, profile_id: Optional[str] = None) -> List[str]:
-        """Fetch existing question texts for deduplication, optionally filtered by profile."""
+        """Fetch existing question texts for deduplication, optionally filtered by profile (cached briefly)."""
+        cache_key = ('questions', user_id, profile_id)
+        cached = _get_cached_user_data(cache_key)
+        if cached is not None:
+            return cached
+
         query = self.supabase.table("qa_pairs") \
             .select("question") \
             .eq("user_id", user_id)
@@ -689,9 +1170,11 @@ Generate exactly {count} general Q&A pairs."""
         if profile_id:
             query = query.eq("profile_id", profile_id)
 
-        result = query.execute()
+        result = await asyncio.to_thread(query.execute)
 
-        return [row['question'] for row in result.data]
+        questions = [row['question'] for row in result.data]
+        _cache_user_data(cache_key, questions)
+        return questions
 
     async def _create_batch_record(
         self,
@@ -709,14 +1192,29 @@ Generate exactly {count} general Q&A pairs."""
             'batch_type': batch_type,
             'target_count': target_count,
             'status': 'in_progress',
-            'context_snapshot': contexts,
+            'context_snapshot': self._context_snapshot(contexts),
             'started_at': 'now()'
         }
 
         if profile_id:
             data['profile_id'] = profile_id
 
-        self.supabase.table("generation_batches").insert(data).execute()
+        await asyncio.to_thread(self.supabase.table("generation_batches").insert(data).execute)
+
+    @staticmethod
+    def _context_snapshot(contexts: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Summarize the contexts a batch was generated from.
+
+        Only sizes are stored; the texts themselves already live in
+        user_contexts, and copying them into every batch row bloats the table.
+        """
+        snapshot = {'resume_chars': len(contexts['resume'] or '')}
+        for context_type in ('company_info', 'job_posting', 'additional'):
+            texts = contexts.get(context_type, [])
+            snapshot[f'{context_type}_count'] = len(texts)
+            snapshot[f'{context_type}_chars'] = sum(len(text) for text in texts)
+        return snapshot
 
     async def _update_batch_record(
         self,
@@ -739,17 +1237,19 @@ Generate exactly {count} general Q&A pairs."""
         if category_breakdown:
             update_data['category_breakdown'] = category_breakdown
 
-        self.supabase.table("generation_batches").update(update_data).eq('id', str(batch_id)).execute()
+        await asyncio.to_thread(
+            self.supabase.table("generation_batches").update(update_data).eq('id', str(batch_id)).execute
+        )
 
-    async def _save_qa_pairs(
+    def _qa_records(
         self,
         user_id: str,
         batch_id: UUID,
         qa_pairs: List[QAPairGenerated],
-        source: str = 'ai_generated',
+        source: str,
         profile_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Save generated Q&A pairs to database."""
+        """Build qa_pairs rows for generated Q&A pairs."""
         data = []
         for qa in qa_pairs:
             record = {
@@ -767,9 +1267,63 @@ Generate exactly {count} general Q&A pairs."""
                 record['profile_id'] = profile_id
 
             data.append(record)
+        return data
+
+    async def _save_qa_pairs(
+        self,
+        user_id: str,
+        batch_id: UUID,
+        qa_pairs: List[QAPairGenerated],
+        source: str = 'ai_generated',
+        profile_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Save generated Q&A pairs to database."""
+        data = self._qa_records(user_id, batch_id, qa_pairs, source, profile_id)
+
+        if not data:
+            return []
 
-        result = self.supabase.table("qa_pairs").insert(data).execute()
-        return result.data
+        chunks = [data[i:i + QA_INSERT_CHUNK_SIZE] for i in range(0, len(data), QA_INSERT_CHUNK_SIZE)]
+        results = await asyncio.gather(*[
+            asyncio.to_thread(lambda chunk=chunk: self.supabase.table("qa_pairs").insert(chunk).execute())
+            for chunk in chunks
+        ])
+        # The user's question list changed; don't dedup against a stale copy
+        invalidate_user_cache(user_id, 'questions')
+        return [row for result in results for row in result.data]
 
-# Global instance
-qa_generation_service = QAGenerationService()
+    async def _finalize_batch(
+        self,
+        user_id: str,
+        batch_id: UUID,
+        qa_pairs: List[QAPairGenerated],
+        source: str = 'ai_generated',
+        profile_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Save a whole batch of Q&A pairs and mark the batch completed atomically.
+
+        Uses the finalize_batch RPC (migration 047), which inserts the rows and
+        updates generation_batches (count and category breakdown from the
+        stored rows) in one transaction.
+
+        Returns:
+            Saved qa_pairs rows of the batch
+        """
+        data = self._qa_records(user_id, batch_id, qa_pairs, source, profile_id)
+        result = await asyncio.to_thread(
+            self.supabase.rpc("finalize_batch", {"p_batch_id": str(batch_id), "p_qa": data}).execute
+        )
+        invalidate_user_cache(user_id, 'questions')
+        return result.data or []
+
+@lru_cache(maxsize=1)
+def get_qa_generation_service() -> QAGenerationService:
+    """
+    Shared QAGenerationService, created on first use.
+
+    Use as a FastAPI dependency (Depends(get_qa_generation_service)) so importing
+    this module doesn't build API clients; tests can override it through
+    app.dependency_overrides.
+    """
+    return QAGenerationService()
@@ -4,22 +4,93 @@ Handles all vector similarity search using Qdrant
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Optional, Tuple
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Dict, Optional, Set, Tuple
+import numpy as np
 from openai import AsyncOpenAI
 from qdrant_client import QdrantClient
+from supabase import Client
 from qdrant_client.models import (
+    Datatype,
     Distance,
     VectorParams,
     PointStruct,
     Filter,
     FieldCondition,
-    MatchValue
+    FilterSelector,
+    MatchValue,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams
 )
 
+from app.core.config import settings
+from app.core.openai_client import get_openai_client
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _get_qdrant_client(qdrant_url: str) -> QdrantClient:
+    """One QdrantClient (and connection pool) per server, shared by all QdrantService instances"""
+    # gRPC sends vectors as protobuf instead of JSON number arrays - a 1536-dim
+    # vector is ~6KB on the wire instead of ~30KB - over one HTTP/2 connection
+    return QdrantClient(
+        url=qdrant_url,
+        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        grpc_port=settings.QDRANT_GRPC_PORT
+    )
+
+
+class _SemanticSearchCache:
+    """
+    Recent search results for one (user, threshold, limit), looked up by query similarity
+
+    Query vectors are kept L2-normalized in one float32 matrix, so a lookup is
+    a single matrix-vector product over the cached queries.
+    """
+
+    def __init__(self, capacity: int, dim: int):
+        self.capacity = capacity
+        self.created_at = time.monotonic()
+        # Row i is the query vector of slot i; grown by doubling up to capacity
+        self._vectors = np.empty((min(capacity, 16), dim), dtype=np.float32)
+        # Slot -> results, least recently used first. Slots are reused on
+        # eviction, so the keys are always 0..len-1
+        self._slots: "OrderedDict[int, List[Dict]]" = OrderedDict()
+
+    def get(self, query: np.ndarray, min_similarity: float) -> Optional[List[Dict]]:
+        """Results of the most similar cached query, if it is at least min_similarity"""
+        if not self._slots:
+            return None
+        scores = self._vectors[:len(self._slots)] @ query
+        slot = int(scores.argmax())
+        if scores[slot] < min_similarity:
+            return None
+        self._slots.move_to_end(slot)
+        return self._slots[slot]
+
+    def put(self, query: np.ndarray, results: List[Dict]):
+        """Cache results for a query, evicting the least recently used at capacity"""
+        if len(self._slots) < self.capacity:
+            slot = len(self._slots)
+            if slot == len(self._vectors):
+                grown = np.empty((min(2 * slot, self.capacity), self._vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self._vectors
+                self._vectors = grown
+        else:
+            slot, _ = self._slots.popitem(last=False)
+        self._vectors[slot] = query
+        self._slots[slot] = results
+
+
 class QdrantService:
     """
     Service for managing Q&A embeddings in Qdrant vector database
@@ -32,37 +103,273 @@ class QdrantService:
     """
 
     COLLECTION_NAME = "qa_pairs"
-    VECTOR_SIZE = 1536  # OpenAI text-embedding-3-small
     EMBEDDING_MODEL = "text-embedding-3-small"
-
-    def __init__(self, qdrant_url: str, openai_api_key: str):
+    # text-embedding-3 models can return shortened vectors (the `dimensions`
+    # parameter) that keep most of the quality at 512/768: less RAM and less
+    # work per distance in Qdrant. Default is the full 1536
+    VECTOR_SIZE = settings.EMBEDDING_DIMENSIONS
+    # Model key for cached embeddings, so shortened and full vectors never mix
+    EMBEDDING_CACHE_MODEL = EMBEDDING_MODEL if VECTOR_SIZE == 1536 else f"{EMBEDDING_MODEL}:{VECTOR_SIZE}"
+    EMBEDDING_CACHE_TABLE = "embedding_cache"  # See migrations 045, 048
+    EMBEDDING_CACHE_DTYPE = np.dtype('>f4')  # Packed big-endian float32 (as float4send)
+    # Hashes per cache lookup: they go in the GET URL (64 hex chars each), which
+    # PostgREST and proxies cap at a few KB
+    EMBEDDING_CACHE_LOOKUP_CHUNK_SIZE = 100
+    EMBEDDING_BATCH_SIZE = 512  # Texts per OpenAI request (API limit is 2048)
+    EMBEDDING_CONCURRENCY = 5  # Requests in flight per call, to stay clear of 429s
+    MEMORY_CACHE_SIZE = 1024  # Recently used embeddings kept in-process (~6KB each as floats)
+    UPSERT_BATCH_SIZE = 256  # Points per Qdrant upsert request
+    UPSERT_CONCURRENCY = 4  # Upsert requests in flight per batch
+    # int8 copies of the vectors kept in RAM for HNSW traversal (half the size of
+    # the float16 originals); the top candidates are rescored with the originals
+    QUANTIZATION_CONFIG = ScalarQuantization(
+        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+    )
+    SEARCH_PARAMS = SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+    )
+    SEMANTIC_CACHE_SIZE = 512  # Cached searches per (user, threshold, limit)
+    SEMANTIC_CACHE_KEYS = 128  # (user, threshold, limit) combinations kept
+    SEMANTIC_CACHE_SIMILARITY = 0.97  # Query cosine similarity that counts as "same search"
+    SEMANTIC_CACHE_TTL = 300.0  # Seconds before a cache is dropped, bounds staleness
+
+    # Shared by all instances: searches (ClaudeService) and writes (qa_pairs API)
+    # use different QdrantService objects, and writes must invalidate searches.
+    # Format: {(user_id, similarity_threshold, limit): _SemanticSearchCache}
+    _search_caches: "OrderedDict[Tuple[str, float, int], _SemanticSearchCache]" = OrderedDict()
+    # (qdrant_url, collection) pairs already checked/created by this process
+    _ensured_collections: Set[Tuple[str, str]] = set()
+
+    def __init__(
+        self,
+        qdrant_url: str,
+        supabase: Optional[Client] = None,
+        openai_client: Optional[AsyncOpenAI] = None
+    ):
         """
         Initialize Qdrant client
 
         Args:
             qdrant_url: Qdrant server URL (e.g., "http://localhost:6333")
-            openai_api_key: OpenAI API key for generating embeddings
+            supabase: Supabase client for the persistent embedding cache (optional)
+            openai_client: OpenAI client for generating embeddings (default: the shared one)
         """
-        self.client = QdrantClient(url=qdrant_url)
-        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
-        self.ensure_collection_exists()
+        self.client = _get_qdrant_client(qdrant_url)
+        # Embedding requests are short - don't wait out the SDK's long default timeout
+        self.openai_client = (openai_client or get_openai_client()).with_options(timeout=30.0)
+        self.supabase = supabase
+        self._cache_writes: Set[asyncio.Task] = set()  # Keep fire-and-forget writes alive
+        # LRU of recent embeddings, in front of the persistent cache
+        # Format: {(model, text_hash): embedding}
+        self._memory_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        # Only the first instance per server pays the get_collection round trip
+        if (qdrant_url, self.COLLECTION_NAME) not in self._ensured_collections:
+            self.ensure_collection_exists()
+            self._ensured_collections.add((qdrant_url, self.COLLECTION_NAME))
 
     def ensure_collection_exists(self):
-        """Create collection if it doesn't exist"""
+        """Create collection if it doesn't exist, and bring older ones up to date (quantization, user_id index)"""
         try:
-            self.client.get_collection(self.COLLECTION_NAME)
+            collection = self.client.get_collection(self.COLLECTION_NAME)
             logger.info(f"Qdrant collection '{self.COLLECTION_NAME}' exists")
         except Exception:
+            collection = None
+
+        if collection is not None:
+            vector_size = getattr(collection.config.params.vectors, 'size', None)
+            if vector_size != self.VECTOR_SIZE:
+                # Not fixed automatically: recreating the collection drops every point
+                logger.error(
+                    f"Qdrant collection '{self.COLLECTION_NAME}' holds {vector_size}-dim vectors "
+                    f"but EMBEDDING_DIMENSIONS is {self.VECTOR_SIZE} - delete the collection and "
+                    f"re-sync Q&A pairs (see QDRANT_DEPLOYMENT.md)"
+                )
+            if collection.config.quantization_config is None:
+                # Quantized in the background by Qdrant - no re-upsert needed
+                logger.info(f"Enabling int8 quantization on '{self.COLLECTION_NAME}'")
+                try:
+                    self.client.update_collection(
+                        collection_name=self.COLLECTION_NAME,
+                        quantization_config=self.QUANTIZATION_CONFIG
+                    )
+                except Exception as e:
+                    # Optimization only - search still works on the original vectors
+                    logger.warning(f"Failed to enable quantization on '{self.COLLECTION_NAME}': {e}")
+        else:
             logger.info(f"Creating Qdrant collection '{self.COLLECTION_NAME}'")
             self.client.create_collection(
                 collection_name=self.COLLECTION_NAME,
                 vectors_config=VectorParams(
                     size=self.VECTOR_SIZE,
-                    distance=Distance.COSINE
-                )
+                    distance=Distance.COSINE,
+                    # Half the memory of float32; embeddings don't carry that much precision
+                    datatype=Datatype.FLOAT16
+                ),
+                quantization_config=self.QUANTIZATION_CONFIG
             )
             logger.info(f"Collection '{self.COLLECTION_NAME}' created successfully")
 
+        # Every search and bulk delete filters on user_id; without an index Qdrant
+        # checks the payload of each point it visits
+        if collection is None or 'user_id' not in (collection.payload_schema or {}):
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.COLLECTION_NAME,
+                    field_name="user_id",
+                    field_schema=PayloadSchemaType.KEYWORD
+                )
+                logger.info(f"Created user_id payload index on '{self.COLLECTION_NAME}'")
+            except Exception as e:
+                # e.g. created concurrently by another worker
+                logger.warning(f"Failed to create user_id payload index: {e}")
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        """Cache key for a text (paired with EMBEDDING_CACHE_MODEL in the cache table)"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _pack_embedding(cls, embedding: List[float]) -> str:
+        """Embedding as a bytea hex literal for the cache table (12KB of hex instead of ~30KB of JSON)"""
+        return '\\x' + np.asarray(embedding, dtype=cls.EMBEDDING_CACHE_DTYPE).tobytes().hex()
+
+    @classmethod
+    def _unpack_embedding(cls, packed: str) -> List[float]:
+        """Inverse of _pack_embedding (PostgREST returns bytea as a '\\x...' hex string)"""
+        return np.frombuffer(bytes.fromhex(packed[2:]), dtype=cls.EMBEDDING_CACHE_DTYPE).tolist()
+
+    def _remember_embeddings(self, embeddings: Dict[str, List[float]]):
+        """Add embeddings to the in-process LRU, evicting the least recently used"""
+        for text_hash, embedding in embeddings.items():
+            key = (self.EMBEDDING_CACHE_MODEL, text_hash)
+            self._memory_cache[key] = embedding
+            self._memory_cache.move_to_end(key)
+        while len(self._memory_cache) > self.MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+
+    async def _get_cached_embeddings(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up previously generated embeddings (in-process LRU, then persistent cache)
+
+        Args:
+            hashes: Text hashes (see _text_hash)
+
+        Returns:
+            Dict of text hash -> embedding for the hashes that were found
+        """
+        found: Dict[str, List[float]] = {}
+        for text_hash in hashes:
+            key = (self.EMBEDDING_CACHE_MODEL, text_hash)
+            embedding = self._memory_cache.get(key)
+            if embedding is not None:
+                self._memory_cache.move_to_end(key)
+                found[text_hash] = embedding
+
+        remaining = [text_hash for text_hash in hashes if text_hash not in found]
+        if self.supabase is None or not remaining:
+            return found
+
+        # Supabase client is synchronous - run in thread pool
+        def _do_lookup(chunk: List[str]):
+            return self.supabase.table(self.EMBEDDING_CACHE_TABLE)\
+                .select("text_hash, embedding_f32")\
+                .eq("model", self.EMBEDDING_CACHE_MODEL)\
+                .in_("text_hash", chunk)\
+                .execute()
+
+        async def _lookup(chunk: List[str]) -> list:
+            try:
+                return (await asyncio.to_thread(_do_lookup, chunk)).data
+            except Exception as e:
+                # Cache is best-effort - only this chunk falls through to OpenAI
+                logger.warning(f"Embedding cache lookup failed for {len(chunk)} hashes: {e}")
+                return []
+
+        unique = list(dict.fromkeys(remaining))
+        chunks = [
+            unique[start:start + self.EMBEDDING_CACHE_LOOKUP_CHUNK_SIZE]
+            for start in range(0, len(unique), self.EMBEDDING_CACHE_LOOKUP_CHUNK_SIZE)
+        ]
+        if len(chunks) == 1:
+            results = [await _lookup(chunks[0])]
+        else:
+            results = await asyncio.gather(*(_lookup(chunk) for chunk in chunks))
+
+        stored = {
+            row['text_hash']: self._unpack_embedding(row['embedding_f32'])
+            for rows in results for row in rows
+        }
+        self._remember_embeddings(stored)
+        found.update(stored)
+        return found
+
+    def _cache_embeddings(self, embeddings: Dict[str, List[float]]):
+        """
+        Remember new embeddings and write them to the persistent cache in the background
+
+        Args:
+            embeddings: Dict of text hash -> embedding
+        """
+        self._remember_embeddings(embeddings)
+        if self.supabase is None or not embeddings:
+            return
+
+        rows = [
+            {'text_hash': text_hash, 'model': self.EMBEDDING_CACHE_MODEL, 'embedding_f32': self._pack_embedding(embedding)}
+            for text_hash, embedding in embeddings.items()
+        ]
+
+        def _do_store():
+            self.supabase.table(self.EMBEDDING_CACHE_TABLE)\
+                .upsert(rows, on_conflict="text_hash,model", ignore_duplicates=True)\
+                .execute()
+
+        async def _store():
+            try:
+                await asyncio.to_thread(_do_store)
+            except Exception as e:
+                logger.warning(f"Failed to cache {len(rows)} embeddings: {e}")
+
+        # Don't make the caller wait for the write
+        task = asyncio.create_task(_store())
+        self._cache_writes.add(task)
+        task.add_done_callback(self._cache_writes.discard)
+
+    @classmethod
+    def _invalidate_search_cache(cls, user_ids: Optional[Iterable[str]] = None):
+        """
+        Drop cached search results after a write
+
+        Args:
+            user_ids: Users whose Q&As changed (None = all users, when the owner is unknown)
+        """
+        if user_ids is None:
+            cls._search_caches.clear()
+            return
+        user_ids = set(user_ids)
+        for key in [key for key in cls._search_caches if key[0] in user_ids]:
+            del cls._search_caches[key]
+
+    def _cached_search(self, key: Tuple[str, float, int], query: np.ndarray) -> Optional[List[Dict]]:
+        """Results of a near-identical recent search (see SEMANTIC_CACHE_SIMILARITY), if any"""
+        cache = self._search_caches.get(key)
+        if cache is None:
+            return None
+        if time.monotonic() - cache.created_at > self.SEMANTIC_CACHE_TTL:
+            del self._search_caches[key]
+            return None
+        self._search_caches.move_to_end(key)
+        return cache.get(query, self.SEMANTIC_CACHE_SIMILARITY)
+
+    def _remember_search(self, key: Tuple[str, float, int], query: np.ndarray, results: List[Dict]):
+        """Cache search results, evicting the least recently used (user, threshold, limit)"""
+        cache = self._search_caches.get(key)
+        if cache is None:
+            cache = self._search_caches[key] = _SemanticSearchCache(self.SEMANTIC_CACHE_SIZE, self.VECTOR_SIZE)
+            while len(self._search_caches) > self.SEMANTIC_CACHE_KEYS:
+                self._search_caches.popitem(last=False)
+        cache.put(query, results)
+
     async def _generate_embedding(self, text: str) -> Optional[List[float]]:
         """
         Generate embedding vector for text using OpenAI API
@@ -73,17 +380,65 @@ class QdrantService:
         Returns:
             List of floats representing the embedding vector, or None if failed
         """
-        try:
-            response = await self.openai_client.embeddings.create(
-                model=self.EMBEDDING_MODEL,
-                input=text
-            )
-            embedding = response.data[0].embedding
-            return embedding
+        return (await self.generate_embeddings([text]))[0]
 
-        except Exception as e:
-            logger.error(f"Error generating embedding: {e}", exc_info=True)
-            return None
+    async def generate_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Generate embeddings for several texts in as few OpenAI requests as possible
+
+        Large inputs are split into EMBEDDING_BATCH_SIZE slices sent concurrently.
+        Texts embedded before (same text, same model) are served from the
+        persistent cache; only the rest are sent to OpenAI.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            Embedding vectors in input order (None where generation failed)
+        """
+        if not texts:
+            return []
+
+        hashes = [self._text_hash(text) for text in texts]
+        cached = await self._get_cached_embeddings(hashes)
+        embeddings: List[Optional[List[float]]] = [cached.get(text_hash) for text_hash in hashes]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
+        generated: Dict[str, List[float]] = {}
+        semaphore = asyncio.Semaphore(self.EMBEDDING_CONCURRENCY)
+
+        async def _embed_slice(indices: List[int]):
+            async with semaphore:
+                try:
+                    response = await self.openai_client.embeddings.create(
+                        model=self.EMBEDDING_MODEL,
+                        dimensions=self.VECTOR_SIZE,
+                        input=[texts[i] for i in indices]
+                    )
+                except Exception as e:
+                    # Only this slice fails; the others still fill in
+                    logger.error(f"Error generating {len(indices)} embeddings: {e}", exc_info=True)
+                    return
+            # API may return items out of order - place by index
+            for item in response.data:
+                index = indices[item.index]
+                embeddings[index] = item.embedding
+                generated[hashes[index]] = item.embedding
+
+        slices = [
+            missing[start:start + self.EMBEDDING_BATCH_SIZE]
+            for start in range(0, len(missing), self.EMBEDDING_BATCH_SIZE)
+        ]
+        if len(slices) == 1:
+            await _embed_slice(slices[0])
+        else:
+            await asyncio.gather(*(_embed_slice(indices) for indices in slices))
+
+        self._cache_embeddings(generated)
+        return embeddings
 
     async def upsert_qa_pair(
         self,
@@ -103,21 +458,22 @@ class QdrantService:
             answer: Answer text
             user_id: User ID who owns this Q&A
             question_type: Type of question (optional)
-            embedding: Pre-computed embedding (if None, will generate)
+            embedding: Pre-computed embedding (generated if None or not VECTOR_SIZE long)
 
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Generate embedding if not provided
-            if embedding is None:
+            # Generate embedding if not provided (or stored at another size)
+            if embedding is None or len(embedding) != self.VECTOR_SIZE:
                 embedding = await self._generate_embedding(question)
                 if not embedding:
                     logger.error(f"Failed to generate embedding for Q&A {qa_id}")
                     return False
 
-            # Upsert to Qdrant
-            self.client.upsert(
+            # Upsert to Qdrant (sync client - run in thread pool)
+            await asyncio.to_thread(
+                self.client.upsert,
                 collection_name=self.COLLECTION_NAME,
                 points=[
                     PointStruct(
@@ -132,6 +488,7 @@ class QdrantService:
                     )
                 ]
             )
+            self._invalidate_search_cache([user_id])
 
             logger.info(f"Upserted Q&A {qa_id} to Qdrant")
             return True
@@ -147,6 +504,9 @@ class QdrantService:
         """
         Batch upsert multiple Q&A pairs
 
+        Pairs without a question_embedding of VECTOR_SIZE are embedded here, all
+        together via generate_embeddings (batched, concurrent, cached) rather than skipped.
+
         Args:
             qa_pairs: List of dicts with keys: id, question, answer, user_id, question_type, question_embedding
 
@@ -156,11 +516,22 @@ class QdrantService:
         success_count = 0
         failed_count = 0
 
+        # Embed everything that arrived without a usable vector in one pass
+        # (stored question_embeddings are full-size; see EMBEDDING_DIMENSIONS)
+        need_embedding = [
+            qa for qa in qa_pairs
+            if len(qa.get('question_embedding') or ()) != self.VECTOR_SIZE
+        ]
+        embeddings = {}
+        if need_embedding:
+            generated = await self.generate_embeddings([qa['question'] for qa in need_embedding])
+            embeddings = {id(qa): embedding for qa, embedding in zip(need_embedding, generated)}
+
         points = []
         for qa in qa_pairs:
             try:
-                # Skip if no embedding
-                if not qa.get('question_embedding'):
+                vector = embeddings[id(qa)] if id(qa) in embeddings else qa['question_embedding']
+                if not vector:
                     logger.warning(f"Skipping Q&A {qa['id']} - no embedding")
                     failed_count += 1
                     continue
@@ -168,7 +539,7 @@ class QdrantService:
                 points.append(
                     PointStruct(
                         id=qa['id'],
-                        vector=qa['question_embedding'],
+                        vector=vector,
                         payload={
                             'question': qa['question'],
                             'answer': qa['answer'],
@@ -182,19 +553,41 @@ class QdrantService:
                 logger.error(f"Error preparing Q&A {qa.get('id')}: {e}")
                 failed_count += 1
 
-        # Batch upload (Qdrant handles batches efficiently)
+        # Upload in UPSERT_BATCH_SIZE chunks, several in flight at once, off the
+        # event loop (QdrantClient is sync). Each waits for Qdrant to apply it,
+        # so the counts are real and searches after return see the new points
+        semaphore = asyncio.Semaphore(self.UPSERT_CONCURRENCY)
+
+        async def _upsert_chunk(chunk: List[PointStruct]) -> bool:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(
+                        self.client.upsert,
+                        collection_name=self.COLLECTION_NAME,
+                        points=chunk
+                    )
+                    return True
+                except Exception as e:
+                    logger.error(f"Error batch upserting {len(chunk)} points to Qdrant: {e}", exc_info=True)
+                    return False
+
+        chunks = [
+            points[start:start + self.UPSERT_BATCH_SIZE]
+            for start in range(0, len(points), self.UPSERT_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(_upsert_chunk(chunk) for chunk in chunks))
+        for chunk, ok in zip(chunks, results):
+            if ok:
+                success_count += len(chunk)
+            else:
+                failed_count += len(chunk)
+
+        # Failed chunks may still be partly written, so invalidate for every pair
         if points:
-            try:
-                self.client.upsert(
-                    collection_name=self.COLLECTION_NAME,
-                    points=points
-                )
-                success_count = len(points)
-                logger.info(f"Batch upserted {success_count} Q&A pairs to Qdrant")
-            except Exception as e:
-                logger.error(f"Error batch upserting to Qdrant: {e}", exc_info=True)
-                failed_count += len(points)
-                success_count = 0
+            self._invalidate_search_cache(qa['user_id'] for qa in qa_pairs)
+
+        if success_count:
+            logger.info(f"Batch upserted {success_count} Q&A pairs to Qdrant")
 
         return (success_count, failed_count)
 
@@ -209,10 +602,13 @@ class QdrantService:
             True if successful, False otherwise
         """
         try:
-            self.client.delete(
+            await asyncio.to_thread(
+                self.client.delete,
                 collection_name=self.COLLECTION_NAME,
                 points_selector=[qa_id]
             )
+            # Owner isn't known here, so every user's cached searches go
+            self._invalidate_search_cache()
             logger.info(f"Deleted Q&A {qa_id} from Qdrant")
             return True
 
@@ -225,29 +621,45 @@ class QdrantService:
         query_text: str,
         user_id: str,
         similarity_threshold: float = 0.75,
-        limit: int = 5
+        limit: int = 5,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Search for similar Q&A pairs using semantic search
 
         NO MORE FORMAT BUGS! Qdrant SDK handles all serialization.
 
+        Results are cached per (user, threshold, limit); a query whose embedding
+        is within SEMANTIC_CACHE_SIMILARITY of a recent one returns those results
+        (with their original similarity scores) without querying Qdrant.
+
         Args:
             query_text: Question to search for
             user_id: User ID to filter by
             similarity_threshold: Minimum similarity score (0-1)
             limit: Maximum number of results
+            query_embedding: Pre-computed embedding of query_text (skips the OpenAI call)
 
         Returns:
             List of matching Q&A pairs with similarity scores
         """
         try:
-            # Generate embedding for query
-            query_embedding = await self._generate_embedding(query_text)
+            # Generate embedding for query (unless the caller already has it)
+            if query_embedding is None:
+                query_embedding = await self._generate_embedding(query_text)
             if not query_embedding:
                 logger.warning(f"Failed to generate embedding for query: {query_text}")
                 return []
 
+            # Near-identical recent search (e.g. rephrased or repeated prompt): skip Qdrant
+            cache_key = (user_id, similarity_threshold, limit)
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+            cached = self._cached_search(cache_key, query_vector)
+            if cached is not None:
+                logger.info(f"Semantic cache hit for user {user_id} ({len(cached)} Q&A pairs)")
+                return [dict(qa) for qa in cached]
+
             # Search in Qdrant using query_points (v1.7+ API)
             # CRITICAL: QdrantClient is synchronous - must run in thread pool to avoid blocking event loop
             def _do_search():
@@ -264,7 +676,9 @@ class QdrantService:
                     ),
                     limit=limit,
                     score_threshold=similarity_threshold,
-                    with_payload=True
+                    search_params=self.SEARCH_PARAMS,
+                    # Only what the results below use (not user_id etc.)
+                    with_payload=["question", "answer", "question_type"]
                 )
 
             search_result = await asyncio.to_thread(_do_search)
@@ -281,6 +695,7 @@ class QdrantService:
                 }
                 for hit in results
             ]
+            self._remember_search(cache_key, query_vector, [dict(qa) for qa in qa_pairs])
 
             logger.info(
                 f"Found {len(qa_pairs)} similar Q&A pairs for user {user_id} "
@@ -324,47 +739,55 @@ class QdrantService:
         Returns:
             Number of deleted points
         """
-        try:
-            # Qdrant doesn't support delete by filter in old versions
-            # So we scroll through and delete by IDs
-            result = self.client.scroll(
-                collection_name=self.COLLECTION_NAME,
-                scroll_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="user_id",
-                            match=MatchValue(value=user_id)
-                        )
-                    ]
-                ),
-                limit=10000  # Should be enough for one user
-            )
-
-            point_ids = [point.id for point in result[0]]
+        user_filter = Filter(
+            must=[
+                FieldCondition(
+                    key="user_id",
+                    match=MatchValue(value=user_id)
+                )
+            ]
+        )
 
-            if point_ids:
+        # Count, then delete by the same filter server-side - no point IDs
+        # round-trip through the client, and no cap on how many a user has
+        def _do_delete() -> int:
+            count = self.client.count(
+                collection_name=self.COLLECTION_NAME,
+                count_filter=user_filter,
+                exact=True
+            ).count
+            if count:
                 self.client.delete(
                     collection_name=self.COLLECTION_NAME,
-                    points_selector=point_ids
+                    points_selector=FilterSelector(filter=user_filter)
                 )
-                logger.info(f"Deleted {len(point_ids)} Q&A pairs for user {user_id}")
+            return count
+
+        try:
+            deleted = await asyncio.to_thread(_do_delete)
+            if deleted:
+                logger.info(f"Deleted {deleted} Q&A pairs for user {user_id}")
+            self._invalidate_search_cache([user_id])
 
-            return len(point_ids)
+            return deleted
 
         except Exception as e:
             logger.error(f"Error deleting user Q&A pairs: {e}", exc_info=True)
             return 0
 
 
-def get_qdrant_service(qdrant_url: str, openai_api_key: str) -> QdrantService:
+def get_qdrant_service(
+    qdrant_url: str,
+    supabase: Optional[Client] = None
+) -> QdrantService:
     """
     Factory function to create QdrantService instance
 
     Args:
         qdrant_url: Qdrant server URL
-        openai_api_key: OpenAI API key
+        supabase: Supabase client for the persistent embedding cache (optional)
 
     Returns:
         QdrantService instance
     """
-    return QdrantService(qdrant_url, openai_api_key)
+    return QdrantService(qdrant_url, supabase)
@@ -0,0 +1,121 @@
+"""
+Near-duplicate detection for generated interview questions.
+
+MinHash signatures over word 3-gram shingles, indexed with LSH banding, so
+checking a candidate against a user's whole question history costs O(1)
+bucket lookups instead of a pairwise comparison with every existing question.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Set
+
+import numpy as np
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+# 16 bands x 4 rows: candidates are pairs sharing any band (~50% similarity),
+# then confirmed against SIMILARITY_THRESHOLD using the full signature
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SIMILARITY_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed seed so signatures are comparable across index instances
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def _shingles(question: str) -> Set[str]:
+    """Word 3-grams of the lowercased question (the whole question if shorter)."""
+    tokens = _TOKEN_RE.findall(question.lower())
+    if len(tokens) <= SHINGLE_SIZE:
+        return {" ".join(tokens)}
+    return {
+        " ".join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(question: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint64 values) of a question."""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in _shingles(question)),
+        dtype=np.uint64
+    )
+    # (a * x + b) mod p, truncated to 32 bits; uint64 wraparound is harmless here
+    permuted = ((np.outer(hashes, _PERM_A & _MAX_HASH) + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+class QuestionDedupIndex:
+    """
+    MinHash-LSH index over a set of questions.
+
+    Usage:
+        index = QuestionDedupIndex(existing_questions)
+        if not index.is_duplicate(candidate):
+            index.add(candidate)
+    """
+
+    def __init__(self, questions: List[str] = ()):
+        self.questions: List[str] = []
+        # Row i is the signature of questions[i]; grown by doubling
+        self._signatures = np.empty((max(len(questions), 16), NUM_PERM), dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(LSH_BANDS)]
+        for question in questions:
+            self.add(question)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+            for band in range(LSH_BANDS)
+        ]
+
+    def add(self, question: str):
+        """Insert a question into the index."""
+        signature = minhash(question)
+        position = len(self.questions)
+        if position == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[position] = signature
+        self.questions.append(question)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(position)
+
+    def is_duplicate(self, question: str) -> bool:
+        """True if an indexed question is estimated >= SIMILARITY_THRESHOLD similar."""
+        signature = minhash(question)
+        candidates: Set[int] = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        if not candidates:
+            return False
+        rows = self._signatures[np.fromiter(candidates, dtype=np.intp, count=len(candidates))]
+        return bool(((rows == signature).mean(axis=1) >= SIMILARITY_THRESHOLD).any())
+
+    def exemplars(self, k: int = 3) -> List[str]:
+        """
+        Pick k questions that spread across the index (farthest-point sampling
+        on signature similarity), for showing the model what already exists.
+        """
+        if len(self.questions) <= k:
+            return list(self.questions)
+
+        signatures = self._signatures[:len(self.questions)]
+        chosen = [0]
+        closest = (signatures == signatures[0]).mean(axis=1)
+        while len(chosen) < k:
+            nxt = int(closest.argmin())
+            chosen.append(nxt)
+            closest = np.maximum(closest, (signatures == signatures[nxt]).mean(axis=1))
+        return [self.questions[i] for i in chosen]
@@ -3,28 +3,42 @@ File Upload Service
 Handles PDF, image, and text uploads with extraction for Q&A generation context
 """
 
+import asyncio
 import os
 import uuid
 import logging
 import aiofiles
 import base64
 import re
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from fastapi import UploadFile, HTTPException
-from PyPDF2 import PdfReader
+import pypdfium2 as pdfium
 from PIL import Image
-from openai import AsyncOpenAI
 
 from app.core.config import settings
+from app.core.openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from the request per write
+
+# Patterns used by _clean_extracted_text, compiled once
+_WHITESPACE_RE = re.compile(r'\s+')
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]')
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
+# PDFium is not thread-safe, even across separate documents. Every pdfium
+# call in the process (here and in background_extraction_service) runs
+# under this lock so concurrent uploads in to_thread workers never overlap.
+PDFIUM_LOCK = threading.Lock()
+
 class UploadService:
     def __init__(self):
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.openai_client = get_openai_client()
 
         # File size limits per type
         self.max_sizes = {
@@ -66,20 +80,13 @@ class UploadService:
         file_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Save file
-        try:
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-
-            logger.info(f"Saved resume to {file_path} ({len(content)} bytes)")
-        except Exception as e:
-            logger.error(f"Failed to save file: {e}", exc_info=True)
-            raise HTTPException(500, f"Failed to save file: {str(e)}")
+        file_size = await self._save_upload(file, file_path, 'pdf')
+        logger.info(f"Saved resume to {file_path} ({file_size} bytes)")
 
         # Extract text
         try:
-            extracted_text = await self._extract_pdf_text(file_path)
-            logger.info(f"Extracted {len(extracted_text)} characters from PDF")
+            extracted_text, page_count = await self._extract_pdf_text(file_path)
+            logger.info(f"Extracted {len(extracted_text)} characters from {page_count}-page PDF")
         except Exception as e:
             logger.error(f"PDF extraction failed: {e}", exc_info=True)
             raise HTTPException(500, f"PDF text extraction failed: {str(e)}")
@@ -90,8 +97,8 @@ class UploadService:
             'extracted_text': extracted_text,
             'source_format': 'pdf',
             'metadata': {
-                'file_size': len(content),
-                'page_count': self._get_pdf_page_count(file_path)
+                'file_size': file_size,
+                'page_count': page_count
             }
         }
 
@@ -125,15 +132,8 @@ class UploadService:
         file_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Save file
-        try:
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-
-            logger.info(f"Saved screenshot to {file_path} ({len(content)} bytes)")
-        except Exception as e:
-            logger.error(f"Failed to save file: {e}", exc_info=True)
-            raise HTTPException(500, f"Failed to save file: {str(e)}")
+        file_size = await self._save_upload(file, file_path, 'image')
+        logger.info(f"Saved screenshot to {file_path} ({file_size} bytes)")
 
         # Extract text via Vision API
         try:
@@ -149,7 +149,7 @@ class UploadService:
             'extracted_text': extracted_text,
             'source_format': 'image',
             'metadata': {
-                'file_size': len(content),
+                'file_size': file_size,
                 'extraction_method': 'gpt-4o-vision'
             }
         }
@@ -184,28 +184,46 @@ class UploadService:
             }
         }
 
-    async def _extract_pdf_text(self, file_path: Path) -> str:
+    async def _extract_pdf_text(self, file_path: Path) -> Tuple[str, int]:
         """
-        Extract text from PDF using PyPDF2.
+        Extract text from PDF in a worker thread (parsing is CPU-bound).
 
         Args:
             file_path: Path to PDF file
 
         Returns:
-            Extracted and cleaned text
+            Tuple of (extracted and cleaned text, page count)
+        """
+        return await asyncio.to_thread(self._extract_pdf_text_sync, file_path)
+
+    def _extract_pdf_text_sync(self, file_path: Path) -> Tuple[str, int]:
+        """
+        Extract text from PDF using pypdfium2 (PDFium bindings).
+
+        Args:
+            file_path: Path to PDF file
+
+        Returns:
+            Tuple of (extracted and cleaned text, page count)
         """
         try:
-            reader = PdfReader(str(file_path))
             text_parts = []
 
-            for page_num, page in enumerate(reader.pages, 1):
+            with PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(str(file_path))
+                page_count = len(pdf)
+
                 try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-                except Exception as e:
-                    logger.warning(f"Failed to extract page {page_num}: {e}")
-                    continue
+                    for page_num, page in enumerate(pdf, 1):
+                        try:
+                            page_text = page.get_textpage().get_text_range()
+                            if page_text:
+                                text_parts.append(page_text)
+                        except Exception as e:
+                            logger.warning(f"Failed to extract page {page_num}: {e}")
+                            continue
+                finally:
+                    pdf.close()  # Also closes its pages and text pages
 
             if not text_parts:
                 raise ValueError("No text could be extracted from PDF")
@@ -221,10 +239,10 @@ class UploadService:
                     "Please try uploading as screenshots."
                 )
 
-            return full_text
+            return full_text, page_count
 
         except Exception as e:
-            logger.error(f"PyPDF2 extraction failed: {e}", exc_info=True)
+            logger.error(f"PDF extraction failed: {e}", exc_info=True)
             raise
 
     async def _extract_image_text_vision(
@@ -242,10 +260,6 @@ class UploadService:
         Returns:
             Extracted text
         """
-        # Read image as base64
-        with open(file_path, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
-
         # Get MIME type
         ext = file_path.suffix.lower()
         mime_types = {
@@ -256,6 +270,13 @@ class UploadService:
         }
         mime_type = mime_types.get(ext, 'image/jpeg')
 
+        # Read and encode in a worker thread (images can be up to 20MB)
+        def _read_data_url() -> str:
+            raw = file_path.read_bytes()
+            return "data:%s;base64," % mime_type + base64.b64encode(raw).decode("ascii")
+
+        image_url = await asyncio.to_thread(_read_data_url)
+
         # Vision API prompt based on context type
         prompts = {
             'company_info': """Extract all text from this company information screenshot.
@@ -305,7 +326,7 @@ Return the extracted text in a clean, structured format. Preserve the original s
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:{mime_type};base64,{image_data}",
+                                    "url": image_url,
                                     "detail": "high"  # High detail for better OCR
                                 }
                             }
@@ -327,6 +348,40 @@ Return the extracted text in a clean, structured format. Preserve the original s
             logger.error(f"Vision API failed: {e}", exc_info=True)
             raise
 
+    async def _save_upload(self, file: UploadFile, file_path: Path, file_type: str) -> int:
+        """
+        Stream an upload to disk in chunks, enforcing the size limit for its type.
+
+        Args:
+            file: Uploaded file
+            file_path: Destination path
+            file_type: Type whose max_sizes limit applies ('pdf' or 'image')
+
+        Returns:
+            Number of bytes written
+        """
+        max_size = self.max_sizes[file_type]
+        file_size = 0
+        try:
+            async with aiofiles.open(file_path, 'wb') as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        raise HTTPException(
+                            413,
+                            f"File too large (maximum {max_size // (1024 * 1024)}MB)"
+                        )
+                    await f.write(chunk)
+        except HTTPException:
+            file_path.unlink(missing_ok=True)
+            raise
+        except Exception as e:
+            file_path.unlink(missing_ok=True)
+            logger.error(f"Failed to save file: {e}", exc_info=True)
+            raise HTTPException(500, f"Failed to save file: {str(e)}")
+
+        return file_size
+
     def _validate_file(self, file: UploadFile, file_type: str):
         """
         Validate file type and size.
@@ -343,7 +398,7 @@ Return the extracted text in a clean, structured format. Preserve the original s
                 f"Allowed: {', '.join(self.allowed_types[file_type])}"
             )
 
-        # Note: File size validation happens during read in upload methods
+        # Note: File size validation happens while streaming in _save_upload
         # FastAPI doesn't provide size before reading the file
 
     def _clean_extracted_text(self, text: str) -> str:
@@ -357,32 +412,15 @@ Return the extracted text in a clean, structured format. Preserve the original s
             Cleaned text
         """
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
 
         # Remove special control characters
-        text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        text = _CONTROL_CHARS_RE.sub('', text)
 
         # Restore paragraph breaks (replace single newlines with double)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = _PARAGRAPH_BREAK_RE.sub('\n\n', text)
 
         return text.strip()
 
-    def _get_pdf_page_count(self, file_path: Path) -> int:
-        """
-        Get number of pages in PDF.
-
-        Args:
-            file_path: Path to PDF file
-
-        Returns:
-            Number of pages, or 0 if error
-        """
-        try:
-            reader = PdfReader(str(file_path))
-            return len(reader.pages)
-        except Exception as e:
-            logger.warning(f"Failed to count PDF pages: {e}")
-            return 0
-
 # Global instance
 upload_service = UploadService()
@@ -0,0 +1,258 @@
+"""
+In-process WebM/Opus decoding for the Deepgram streaming path.
+
+Browsers' MediaRecorder emits WebM with a single Opus track and no lacing.
+WebMOpusDemuxer walks the EBML byte stream incrementally and yields raw Opus
+packets; WebMOpusDecoder feeds them to libopus (via opuslib) and returns
+16 kHz mono linear16 PCM, ready for Deepgram's send_media().
+
+This replaces a per-connection ffmpeg subprocess (plus its pipes) for the
+common case. Anything the demuxer doesn't understand raises
+UnsupportedStreamError so the caller can fall back to ffmpeg.
+"""
+
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import opuslib
+except Exception as e:  # opuslib raises a plain Exception when libopus is missing
+    opuslib = None
+    logger.warning(f"opuslib unavailable, WebM/Opus will be decoded by ffmpeg: {e}")
+
+# Output format expected by Deepgram (see DeepgramStreamingService.create_connection)
+PCM_SAMPLE_RATE = 16000
+PCM_CHANNELS = 1
+# Opus packets carry at most 120ms of audio per channel
+MAX_FRAME_SAMPLES = PCM_SAMPLE_RATE * 120 // 1000
+
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+
+# EBML element IDs (marker bits included, as they appear on the wire)
+ID_SEGMENT = 0x18538067
+ID_CLUSTER = 0x1F43B675
+ID_TRACKS = 0x1654AE6B
+ID_TRACK_ENTRY = 0xAE
+ID_TRACK_NUMBER = 0xD7
+ID_CODEC_ID = 0x86
+ID_BLOCK_GROUP = 0xA0
+ID_BLOCK = 0xA1
+ID_SIMPLE_BLOCK = 0xA3
+
+# Master elements we descend into instead of skipping
+MASTER_IDS = {ID_SEGMENT, ID_CLUSTER, ID_TRACKS, ID_TRACK_ENTRY, ID_BLOCK_GROUP}
+
+UNKNOWN_SIZE = -1
+
+
+class UnsupportedStreamError(Exception):
+    """Raised when the input isn't a WebM stream this demuxer can handle."""
+
+
+def is_available() -> bool:
+    """True if libopus could be loaded and in-process decoding is possible."""
+    return opuslib is not None
+
+
+def _read_vint(buf, pos: int, keep_marker: bool) -> Optional[tuple]:
+    """
+    Read an EBML variable-length integer.
+
+    Returns:
+        (value, length) or None if the buffer doesn't hold the whole vint yet.
+        value is UNKNOWN_SIZE for an all-ones size field.
+    """
+    if pos >= len(buf):
+        return None
+    first = buf[pos]
+    if first == 0:
+        raise UnsupportedStreamError("Invalid EBML vint (zero length marker)")
+
+    length = 1
+    mask = 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+    if pos + length > len(buf):
+        return None
+
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for i in range(1, length):
+        byte = buf[pos + i]
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+
+    if not keep_marker and all_ones:
+        return UNKNOWN_SIZE, length
+    return value, length
+
+
+class WebMOpusDemuxer:
+    """
+    Incremental WebM demuxer that extracts Opus packets from the audio track.
+
+    Feed arbitrary byte chunks (as they arrive over the WebSocket); each call
+    returns the complete Opus packets found so far. Partial elements are kept
+    in an internal buffer until the rest arrives.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._skip = 0  # Bytes of an ignored element still to discard
+        self._started = False
+        self._track_number: Optional[int] = None
+        self._current_track: Optional[int] = None
+        self._current_codec: Optional[str] = None
+        # Everything before the first Cluster, so ffmpeg can take over mid-stream
+        self.header_bytes = bytearray()
+        self._in_header = True
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Append data and return any complete Opus packets."""
+        if not self._started:
+            self._buf += data
+            if len(self._buf) < len(EBML_MAGIC):
+                return []
+            if not self._buf.startswith(EBML_MAGIC):
+                raise UnsupportedStreamError("Not a WebM/EBML stream")
+            self._started = True
+        else:
+            self._buf += data
+
+        if self._skip:
+            dropped = min(self._skip, len(self._buf))
+            if self._in_header:
+                self.header_bytes += self._buf[:dropped]
+            del self._buf[:dropped]
+            self._skip -= dropped
+
+        packets: List[bytes] = []
+        pos = 0
+        buf = self._buf
+        # Offset of the first Cluster if it shows up in this call: everything
+        # before it is copied into header_bytes right away
+        header_end: Optional[int] = None
+        try:
+            while not self._skip:
+                element_id = _read_vint(buf, pos, keep_marker=True)
+                if element_id is None:
+                    break
+                size = _read_vint(buf, pos + element_id[1], keep_marker=False)
+                if size is None:
+                    break
+                eid, size_value = element_id[0], size[0]
+                header_len = element_id[1] + size[1]
+
+                if eid == ID_CLUSTER and self._in_header:
+                    self._in_header = False
+                    self.header_bytes += buf[:pos]
+                    header_end = pos
+
+                if eid in MASTER_IDS:
+                    # Descend: children follow immediately (works for unknown sizes too)
+                    if eid == ID_TRACK_ENTRY:
+                        self._finish_track_entry()
+                    pos += header_len
+                    continue
+
+                if size_value == UNKNOWN_SIZE:
+                    raise UnsupportedStreamError(f"Unknown-size non-master element 0x{eid:X}")
+
+                end = pos + header_len + size_value
+                if eid in (ID_SIMPLE_BLOCK, ID_BLOCK, ID_TRACK_NUMBER, ID_CODEC_ID):
+                    if end > len(buf):
+                        break  # Wait for the rest of this element
+                    payload = bytes(buf[pos + header_len:end])
+                    if eid == ID_TRACK_NUMBER:
+                        self._current_track = int.from_bytes(payload, "big")
+                        self._finish_track_entry()
+                    elif eid == ID_CODEC_ID:
+                        self._current_codec = payload.rstrip(b"\x00").decode("ascii", "replace")
+                        self._finish_track_entry()
+                    else:
+                        packet = self._parse_block(payload)
+                        if packet is not None:
+                            packets.append(packet)
+                    pos = end
+                elif end <= len(buf):
+                    pos = end
+                else:
+                    # Large element we don't need (Cues, Void, ...): discard as it streams in
+                    self._skip = end - len(buf)
+                    pos = len(buf)
+        except UnsupportedStreamError:
+            # Packets found in this call are never returned, so their blocks
+            # stay buffered for ffmpeg; only the part already copied into
+            # header_bytes goes, or fallback_chunks would replay it twice
+            if header_end is not None:
+                del buf[:header_end]
+            raise
+
+        if self._in_header:
+            self.header_bytes += buf[:pos]
+        del buf[:pos]
+        return packets
+
+    def _finish_track_entry(self):
+        """Pick the Opus track once both TrackNumber and CodecID are known."""
+        if self._current_track is None or self._current_codec is None:
+            return
+        if self._current_codec == "A_OPUS":
+            if self._track_number is None:
+                self._track_number = self._current_track
+        elif self._current_codec.startswith("A_"):
+            raise UnsupportedStreamError(f"Unsupported audio codec {self._current_codec}")
+        self._current_track = None
+        self._current_codec = None
+
+    def _parse_block(self, payload: bytes) -> Optional[bytes]:
+        """Return the Opus packet inside a (Simple)Block, or None for other tracks."""
+        track = _read_vint(payload, 0, keep_marker=False)
+        if track is None:
+            raise UnsupportedStreamError("Truncated block header")
+        if self._track_number is None:
+            raise UnsupportedStreamError("Block before an Opus track was declared")
+        if track[0] != self._track_number:
+            return None
+
+        offset = track[1] + 2  # Skip 16-bit relative timecode
+        if len(payload) <= offset:
+            raise UnsupportedStreamError("Truncated block header")
+        flags = payload[offset]
+        if flags & 0x06:
+            raise UnsupportedStreamError("Laced blocks are not supported")
+        return payload[offset + 1:]
+
+
+class WebMOpusDecoder:
+    """WebM/Opus bytes in, 16 kHz mono linear16 PCM out."""
+
+    def __init__(self):
+        if opuslib is None:
+            raise UnsupportedStreamError("libopus is not available")
+        self.demuxer = WebMOpusDemuxer()
+        self._decoder = opuslib.Decoder(PCM_SAMPLE_RATE, PCM_CHANNELS)
+
+    @property
+    def fallback_chunks(self) -> List[memoryview]:
+        """
+        Data to replay into ffmpeg after UnsupportedStreamError, in order: the WebM
+        header seen so far, then every byte after it not yet returned as a packet
+        (each byte exactly once).
+        Views, not copies; the decoder must not be fed again afterwards.
+        """
+        return [memoryview(self.demuxer.header_bytes), memoryview(self.demuxer._buf)]
+
+    def decode(self, data: bytes) -> bytes:
+        """Decode one client chunk; returns all PCM produced (may be empty)."""
+        pcm = bytearray()
+        for packet in self.demuxer.feed(data):
+            try:
+                pcm += self._decoder.decode(packet, MAX_FRAME_SAMPLES)
+            except opuslib.OpusError as e:
+                # A single corrupt packet shouldn't kill the stream
+                logger.debug(f"Dropping undecodable Opus packet ({len(packet)} bytes): {e}")
+        return bytes(pcm)
@@ -2,22 +2,47 @@
 OpenAI Whisper API integration for speech-to-text
 """
 
+import asyncio
+import hashlib
 import io
 import logging
 import tempfile
 import subprocess
+import wave
+from collections import OrderedDict
 from pathlib import Path
-from openai import OpenAI
+from typing import Optional, Tuple
 from app.core.config import settings
+from app.core.openai_client import get_openai_client
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
+try:
+    import av
+except ImportError:
+    av = None
+    logger.warning("PyAV unavailable, unknown audio formats will be converted by the ffmpeg CLI")
+
+# Conversion target: 16kHz mono 16-bit PCM (what Whisper works at anyway)
+WAV_SAMPLE_RATE = 16000
+
 class WhisperService:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
+        # LRU of recent transcriptions: retries and re-sent buffers return the
+        # same text without another upload + Whisper call
+        # Format: {(blake2b(audio_data), language): text}
+        self._cache: "OrderedDict[Tuple[bytes, str], str]" = OrderedDict()
         logger.info("Whisper service initialized")
 
+    def _remember_transcription(self, key: Tuple[bytes, str], text: str):
+        """Add a transcription to the LRU, evicting the least recently used"""
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > settings.WHISPER_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
     def _detect_audio_format(self, audio_data: bytes) -> str:
         """
         Detect audio format from file header.
@@ -54,18 +79,64 @@ class WhisperService:
         logger.warning(f"Unknown audio format, header: {header.hex()}... defaulting to conversion")
         return None
 
-    def _convert_to_wav(self, input_path: str, output_path: str) -> bool:
+    def _decode_to_wav(self, audio_data: bytes) -> Optional[bytes]:
+        """
+        Decode audio in-process with PyAV (libav) to a 16kHz mono WAV.
+
+        No subprocess and no temp files: decoded straight from memory.
+
+        Returns WAV bytes, or None if PyAV is unavailable or can't decode the input.
+        """
+        if av is None:
+            return None
+
+        try:
+            resampler = av.AudioResampler(format='s16', layout='mono', rate=WAV_SAMPLE_RATE)
+            pcm = bytearray()
+            with av.open(io.BytesIO(audio_data)) as container:
+                for frame in container.decode(audio=0):
+                    for resampled in resampler.resample(frame):
+                        pcm += resampled.to_ndarray().tobytes()
+            # Flush samples still buffered in the resampler
+            for resampled in resampler.resample(None):
+                pcm += resampled.to_ndarray().tobytes()
+
+            if not pcm:
+                logger.warning("PyAV decoded no audio samples")
+                return None
+
+            buffer = io.BytesIO()
+            with wave.open(buffer, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)  # 16-bit
+                wav.setframerate(WAV_SAMPLE_RATE)
+                wav.writeframes(pcm)
+
+            logger.info("Audio decoded to WAV in-process")
+            return buffer.getvalue()
+
+        except Exception as e:
+            logger.warning(f"PyAV could not decode audio: {e}")
+            return None
+
+    def _convert_to_wav(self, audio_data: bytes) -> Optional[bytes]:
         """
-        Convert audio to WAV using ffmpeg.
+        Convert audio to WAV using the ffmpeg CLI (fallback when PyAV can't).
 
-        Returns True if successful, False otherwise.
+        Returns WAV bytes, or None if conversion failed.
         """
+        # ffmpeg needs seekable files for some containers (e.g. MP4), not pipes
+        with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as f:
+            input_path = f.name
+            f.write(audio_data)
+        output_path = input_path + ".wav"
+
         try:
             # Use ffmpeg to convert to WAV (16kHz, mono, 16-bit PCM)
             cmd = [
                 'ffmpeg',
                 '-i', input_path,
-                '-ar', '16000',  # 16kHz sample rate
+                '-ar', str(WAV_SAMPLE_RATE),  # 16kHz sample rate
                 '-ac', '1',      # Mono
                 '-f', 'wav',     # WAV format
                 '-y',            # Overwrite output
@@ -81,20 +152,24 @@ class WhisperService:
 
             if result.returncode == 0:
                 logger.info("Audio converted to WAV successfully")
-                return True
+                return Path(output_path).read_bytes()
             else:
                 logger.error(f"FFmpeg conversion failed: {result.stderr.decode()}")
-                return False
+                return None
 
         except FileNotFoundError:
             logger.error("FFmpeg not found. Please install: brew install ffmpeg")
-            return False
+            return None
         except subprocess.TimeoutExpired:
             logger.error("FFmpeg conversion timeout")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Error converting audio: {str(e)}")
-            return False
+            return None
+
+        finally:
+            for path in (input_path, output_path):
+                Path(path).unlink(missing_ok=True)
 
     async def transcribe(self, audio_data: bytes, language: str = "en") -> str:
         """
@@ -116,42 +191,37 @@ class WhisperService:
             logger.warning(f"Audio data too small ({len(audio_data)} bytes), skipping")
             return ""
 
-        temp_file = None
+        # Same bytes, same language -> same text (model and prompt are fixed)
+        cache_key = (hashlib.blake2b(audio_data, digest_size=16).digest(), language)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            logger.info(f"Transcription cache hit ({len(audio_data)} bytes): '{cached}'")
+            return cached
 
         try:
             logger.info(f"Transcribing audio data: {len(audio_data)} bytes, language: {language}")
 
             # Detect format
             ext = self._detect_audio_format(audio_data)
-            
+
             # If format is unknown, we must convert it
             if ext is None:
-                logger.info("Format unknown, converting to WAV using ffmpeg")
-                # Save raw data
-                with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as f:
-                    raw_path = f.name
-                    f.write(audio_data)
-                
-                # Convert to WAV
-                wav_path = raw_path + ".wav"
-                if self._convert_to_wav(raw_path, wav_path):
-                    # Use the converted file
-                    temp_file = wav_path
-                    # Clean up raw file immediately
-                    try:
-                        Path(raw_path).unlink()
-                    except:
-                        pass
+                logger.info("Format unknown, converting to WAV")
+                # CPU-bound decode (or an ffmpeg subprocess) - keep it off the event loop
+                wav_data = await asyncio.to_thread(self._decode_to_wav, audio_data)
+                if not wav_data:
+                    wav_data = await asyncio.to_thread(self._convert_to_wav, audio_data)
+                if wav_data:
+                    upload = ("audio.wav", wav_data)
                 else:
                     # Conversion failed, try as webm as last resort
                     logger.warning("Conversion failed, attempting as .webm")
-                    temp_file = raw_path
+                    upload = ("audio.webm", audio_data)
             else:
                 logger.info(f"Detected format: {ext} for {len(audio_data)} bytes")
-                # Write accumulated buffer to temp file
-                with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as f:
-                    temp_file = f.name
-                    f.write(audio_data)
+                # Upload the accumulated buffer straight from memory
+                upload = (f"audio{ext}", audio_data)
 
             # Interview-specific prompt to guide transcription
             prompt = (
@@ -162,32 +232,25 @@ class WhisperService:
             )
 
             # Transcribe directly
-            with open(temp_file, 'rb') as audio_file:
-                response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language=language,
-                    response_format="text",
-                    prompt=prompt,
-                    temperature=0.1
-                )
+            response = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=upload,
+                language=language,
+                response_format="text",
+                prompt=prompt,
+                temperature=0.1
+            )
 
             result = response.strip()
             logger.info(f"Transcription successful: '{result}'")
+            if result:
+                self._remember_transcription(cache_key, result)
             return result
 
         except Exception as e:
             logger.error(f"Whisper transcription error: {str(e)}", exc_info=True)
             return ""
 
-        finally:
-            # Clean up temporary file
-            if temp_file and Path(temp_file).exists():
-                try:
-                    Path(temp_file).unlink()
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp file {temp_file}: {e}")
-
     async def transcribe_with_timestamps(self, audio_data: bytes, language: str = "en") -> dict:
         """
         Transcribe audio with word-level timestamps.
@@ -202,7 +265,7 @@ class WhisperService:
             audio_file = io.BytesIO(audio_data)
             audio_file.name = "audio.wav"
 
-            response = self.client.audio.transcriptions.create(
+            response = await self.client.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio_file,
                 language=language,
@@ -0,0 +1,28 @@
+-- Migration 045: Persistent OpenAI embedding cache
+--
+-- QdrantService embeds every question it searches for, and interview
+-- questions recur constantly ("tell me about yourself" across sessions and
+-- users). Each embedding is an OpenAI round-trip (~100-300ms) plus token
+-- cost. Cache them by SHA-256 of the exact text and the embedding model, so a
+-- model switch never serves stale vectors.
+--
+-- embedding is REAL[] rather than VECTOR(1536): nothing searches this table,
+-- and PostgREST returns arrays as JSON arrays (vector comes back as a string).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.embedding_cache (
+    text_hash  TEXT        NOT NULL,  -- sha256(text) hex digest
+    model      TEXT        NOT NULL,  -- e.g. 'text-embedding-3-small'
+    embedding  REAL[]      NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (text_hash, model)
+);
+
+-- Backend-only table (service role bypasses RLS); no client policies
+ALTER TABLE public.embedding_cache ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.embedding_cache IS
+    'OpenAI embeddings keyed by (sha256(text), model). Written and read only by the backend (QdrantService).';
+
+COMMIT;
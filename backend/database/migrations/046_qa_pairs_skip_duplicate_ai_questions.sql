@@ -0,0 +1,46 @@
+-- Migration 046: Drop duplicate AI-generated questions at insert time
+--
+-- QAGenerationService filters generated questions against the user's
+-- existing ones (MinHash index, app side), but that check is advisory: it
+-- works from a snapshot fetched before generation, and exact repeats can
+-- still slip through between concurrent batches. This trigger makes the
+-- database the backstop: an AI-generated row whose question matches an
+-- existing question of the same user/profile (case-insensitive) is skipped.
+--
+-- A trigger rather than a UNIQUE index + ON CONFLICT DO NOTHING because
+-- existing data may already contain duplicates (the index could not be
+-- built without deleting user rows), and manual/bulk uploads should keep
+-- their current behaviour. Skipped rows are simply absent from the insert's
+-- RETURNING, so the service's saved counts stay accurate.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_qa_pairs_user_question_hash
+    ON public.qa_pairs (user_id, md5(lower(question)));
+
+CREATE OR REPLACE FUNCTION skip_duplicate_ai_qa_pair()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.source IN ('ai_generated', 'incremental_ai') AND EXISTS (
+        SELECT 1
+        FROM public.qa_pairs
+        WHERE user_id = NEW.user_id
+          AND md5(lower(question)) = md5(lower(NEW.question))
+          AND profile_id IS NOT DISTINCT FROM NEW.profile_id
+    ) THEN
+        RETURN NULL;  -- Skip this row, keep the rest of the insert
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS skip_duplicate_ai_qa_pair ON public.qa_pairs;
+CREATE TRIGGER skip_duplicate_ai_qa_pair
+    BEFORE INSERT ON public.qa_pairs
+    FOR EACH ROW
+    EXECUTE FUNCTION skip_duplicate_ai_qa_pair();
+
+COMMENT ON FUNCTION skip_duplicate_ai_qa_pair() IS
+    'Skips AI-generated qa_pairs rows whose question already exists (case-insensitive) for the same user/profile.';
+
+COMMIT;
@@ -0,0 +1,68 @@
+-- Migration 047: Save generated Q&As and complete their batch in one call
+--
+-- When a whole generation batch is produced at once (OpenAI Batch API or
+-- single-call generation), QAGenerationService used to insert the qa_pairs
+-- rows and then update generation_batches in a second request. If the
+-- process died between the two, the batch stayed 'in_progress' (or, with
+-- the old ordering, could be 'completed' with rows missing). finalize_batch
+-- does both in one transaction and one round trip.
+--
+-- generated_count and category_breakdown are counted from the rows actually
+-- stored for the batch, so rows skipped by skip_duplicate_ai_qa_pair (046)
+-- are not reported as generated.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION finalize_batch(p_batch_id UUID, p_qa JSONB)
+RETURNS SETOF public.qa_pairs AS $$
+BEGIN
+    INSERT INTO public.qa_pairs (
+        user_id, question, answer, question_type, source,
+        generation_batch_id, generation_strategy, context_sources, profile_id
+    )
+    SELECT
+        user_id, question, answer, question_type, source,
+        generation_batch_id, generation_strategy, context_sources, profile_id
+    FROM jsonb_to_recordset(p_qa) AS qa(
+        user_id UUID,
+        question TEXT,
+        answer TEXT,
+        question_type VARCHAR,
+        source VARCHAR,
+        generation_batch_id UUID,
+        generation_strategy VARCHAR,
+        context_sources JSONB,
+        profile_id UUID
+    );
+
+    UPDATE public.generation_batches AS b
+    SET status = 'completed',
+        generated_count = stats.total,
+        category_breakdown = stats.breakdown,
+        completed_at = NOW()
+    FROM (
+        SELECT
+            COUNT(*) AS total,
+            jsonb_build_object(
+                'resume_based', COUNT(*) FILTER (WHERE generation_strategy = 'resume_based'),
+                'company_aligned', COUNT(*) FILTER (WHERE generation_strategy = 'company_aligned'),
+                'job_posting', COUNT(*) FILTER (WHERE generation_strategy = 'job_posting'),
+                'general', COUNT(*) FILTER (WHERE generation_strategy = 'general')
+            ) AS breakdown
+        FROM public.qa_pairs
+        WHERE generation_batch_id = p_batch_id
+    ) AS stats
+    WHERE b.id = p_batch_id;
+
+    RETURN QUERY
+        SELECT * FROM public.qa_pairs WHERE generation_batch_id = p_batch_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Called by the backend with the service role only
+REVOKE EXECUTE ON FUNCTION finalize_batch(UUID, JSONB) FROM PUBLIC, anon, authenticated;
+
+COMMENT ON FUNCTION finalize_batch IS
+    'Insert generated qa_pairs rows and mark their generation batch completed, atomically. Returns all rows of the batch.';
+
+COMMIT;
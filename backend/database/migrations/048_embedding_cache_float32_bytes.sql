@@ -0,0 +1,32 @@
+-- Migration 048: Store cached embeddings as packed float32 bytes
+--
+-- embedding_cache (045) kept vectors as REAL[], which PostgREST sends both
+-- ways as JSON number arrays: ~30KB of text per 1536-dim vector, parsed float
+-- by float. The same vector as BYTEA is 6KB (12KB as PostgREST's hex text)
+-- and decodes in one step (bytes.fromhex + numpy.frombuffer).
+--
+-- Values are big-endian float32, the byte order float4send produces, so the
+-- existing rows are converted in place instead of being re-embedded.
+--
+-- New column name rather than a type change: a backend still reading
+-- `embedding` gets an error (and falls back to OpenAI) instead of a hex string
+-- where it expects a vector.
+
+BEGIN;
+
+ALTER TABLE public.embedding_cache ADD COLUMN IF NOT EXISTS embedding_f32 BYTEA;
+
+UPDATE public.embedding_cache AS c
+SET embedding_f32 = (
+    SELECT string_agg(float4send(x), ''::BYTEA ORDER BY i)
+    FROM unnest(c.embedding) WITH ORDINALITY AS t(x, i)
+)
+WHERE embedding_f32 IS NULL;
+
+ALTER TABLE public.embedding_cache ALTER COLUMN embedding_f32 SET NOT NULL;
+ALTER TABLE public.embedding_cache DROP COLUMN embedding;
+
+COMMENT ON COLUMN public.embedding_cache.embedding_f32 IS
+    'Embedding as packed big-endian float32 values (4 bytes per dimension).';
+
+COMMIT;
@@ -38,7 +38,7 @@ async def migrate_embeddings_to_qdrant(user_id: str = None):
         supabase = get_supabase_client()
         qdrant = QdrantService(
             qdrant_url=settings.QDRANT_URL,
-            openai_api_key=settings.OPENAI_API_KEY
+            supabase=supabase
         )
 
         # Build query
@@ -133,10 +133,7 @@ async def verify_search_works(user_id: str):
         logger.info("VERIFICATION: Testing semantic search")
         logger.info("="*60)
 
-        qdrant = QdrantService(
-            qdrant_url=settings.QDRANT_URL,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
+        qdrant = QdrantService(qdrant_url=settings.QDRANT_URL)
 
         # Test search
         test_query = "Tell me about yourself"
@@ -1,5 +1,53 @@
 // public/audio-processor.js
+//
+// Always reports the input level ({ type: 'audio-level', level }).
+//
+// Optional raw PCM capture for the backend's `format=pcm16` mode (no WebM/Opus
+// encode in the browser, no decode on the server):
+//
+//   new AudioWorkletNode(ctx, 'audio-processor', { processorOptions: { pcm16: true } })
+//   ws = new WebSocket(`${url}?format=pcm16`)   // or new WebSocket(url, 'pcm16')
+//   node.port.onmessage = (e) => { if (e.data.type === 'pcm16') ws.send(e.data.buffer) }
+//
+// Audio is downsampled to 16 kHz mono Int16 (little-endian) and posted in
+// 100 ms chunks (1600 samples / 3200 bytes), matching the Deepgram stream config.
+const PCM_SAMPLE_RATE = 16000;
+const PCM_CHUNK_SAMPLES = PCM_SAMPLE_RATE / 10; // 100 ms
+
 class AudioProcessor extends AudioWorkletProcessor {
+  constructor(options) {
+    super();
+    this.pcm16 = Boolean(options?.processorOptions?.pcm16);
+    if (this.pcm16) {
+      // `sampleRate` is the AudioContext rate (global in worklet scope)
+      this.step = sampleRate / PCM_SAMPLE_RATE;
+      this.position = 0; // Fractional read position into the current input block
+      this.chunk = new Int16Array(PCM_CHUNK_SAMPLES);
+      this.chunkLength = 0;
+    }
+  }
+
+  capturePcm(inputChannel) {
+    // Linear-interpolation resampler (holds the last sample at block edges)
+    while (this.position < inputChannel.length) {
+      const index = Math.floor(this.position);
+      const frac = this.position - index;
+      const a = inputChannel[index];
+      const b = index + 1 < inputChannel.length ? inputChannel[index + 1] : a;
+      const sample = Math.max(-1, Math.min(1, a + (b - a) * frac));
+      this.chunk[this.chunkLength++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+
+      if (this.chunkLength === PCM_CHUNK_SAMPLES) {
+        const buffer = this.chunk.buffer;
+        this.port.postMessage({ type: 'pcm16', buffer }, [buffer]);
+        this.chunk = new Int16Array(PCM_CHUNK_SAMPLES);
+        this.chunkLength = 0;
+      }
+      this.position += this.step;
+    }
+    this.position -= inputChannel.length;
+  }
+
   process(inputs, outputs, parameters) {
     const input = inputs[0];
     const inputChannel = input[0];
@@ -15,10 +63,14 @@ class AudioProcessor extends AudioWorkletProcessor {
 
       // Send level to main thread
       this.port.postMessage({ type: 'audio-level', level });
+
+      if (this.pcm16) {
+        this.capturePcm(inputChannel);
+      }
     }
 
     return true;
   }
 }
 
-registerProcessor('audio-processor', AudioProcessor);
\ No newline at end of file
+registerProcessor('audio-processor', AudioProcessor);